@@ -0,0 +1,549 @@
+from typing import Dict, List
+import asyncio
+import pandas as pd
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from strava_client import StravaClient, orjson, CLIENT_ID, CLIENT_SECRET, ERROR_CODES_DICT, \
+    SUCCESS_CODES_DICT, BASE_URL, SPLIT_COLNAMES_DICT, REQUEST_TIMEOUT, POOL_MAXSIZE, \
+    MAX_RETRIES, RATE_LIMIT_THRESHOLD, CREDENTIALS_REFRESH_MARGIN, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_SIZE
+from util.ActivityStream import ActivityStream, StreamResponseDecoder, STREAM_KEYS
+
+class AsyncStravaClient(StravaClient):
+    """asyncio version of the Strava Client, the API requests are coroutines
+       sent via one pooled httpx.AsyncClient so that many of them can run
+       concurrently from a single event loop. The credential handling, the
+       status code checking, the rate limiter and all methods that do not
+       request the API are shared with the StravaClient. The coroutines carry
+       an "a" prefix (aget_strava_activity, ...) instead of overriding the sync
+       methods, so the inherited methods that call them (e.g.
+       save_not_existing_data) keep working via the sync session.
+    """
+    def __init__(
+            self,
+            client_id: int=CLIENT_ID,
+            client_secret: str=CLIENT_SECRET,
+            error_codes_dict: Dict[int, Dict[str, str]]=ERROR_CODES_DICT,
+            success_codes_dict: Dict[int, Dict[str, str]]=SUCCESS_CODES_DICT,
+            base_url: str=BASE_URL,
+            client_credential_file_name: str=None,
+            client_credential_path: str=None,
+            proxies: Dict[str, str]=None,
+            verify: bool=None,
+            pool_maxsize: int=POOL_MAXSIZE,
+            max_retries: int=MAX_RETRIES,
+            rate_limit_threshold: float=RATE_LIMIT_THRESHOLD,
+            credentials_refresh_margin: int=CREDENTIALS_REFRESH_MARGIN,
+            response_cache_path: str=None,
+            response_cache_ttl: float=RESPONSE_CACHE_TTL,
+            response_cache_max_size: int=RESPONSE_CACHE_MAX_SIZE,
+            activity_store_path: str=None
+            ):
+        """Initialisation of the async Strava Client, the arguments are the same
+           as for the StravaClient. Requires the optional dependency httpx.
+
+        Args:
+            pool_maxsize (int, optional): Number of kept alive connections, should be at
+                                          least the number of concurrent requests.
+                                          Defaults to POOL_MAXSIZE.
+        """
+        if httpx is None:
+            raise ImportError("AsyncStravaClient requires httpx, install it via: pip install strava_client[async]")
+        super().__init__(
+            client_id=client_id,
+            client_secret=client_secret,
+            error_codes_dict=error_codes_dict,
+            success_codes_dict=success_codes_dict,
+            base_url=base_url,
+            client_credential_file_name=client_credential_file_name,
+            client_credential_path=client_credential_path,
+            proxies=proxies,
+            verify=verify,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+            rate_limit_threshold=rate_limit_threshold,
+            credentials_refresh_margin=credentials_refresh_margin,
+            response_cache_path=response_cache_path,
+            response_cache_ttl=response_cache_ttl,
+            response_cache_max_size=response_cache_max_size,
+            activity_store_path=activity_store_path
+            )
+        verify = True if verify is None else verify
+        mounts = None
+        if proxies is not None:
+            mounts = {
+                f"{scheme}://": httpx.AsyncHTTPTransport(proxy=proxy_url, verify=verify, retries=max_retries)
+                for scheme, proxy_url in proxies.items()
+                }
+        self.async_session = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(verify=verify, retries=max_retries),
+            mounts=mounts,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize)
+            )
+        # requests beyond the pool size wait here instead of running into the pool timeout
+        self.request_semaphore = asyncio.Semaphore(pool_maxsize)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(
+            self
+            ):
+        """Close the async session, the session of the token requests and all
+           their pooled connections.
+        """
+        await self.async_session.aclose()
+        self.close()
+
+    async def __authorize_session(
+            self
+            ):
+        """Internal helper method - check if the credentials are still valid,
+           refresh them once in a worker thread via the token manager of the
+           StravaClient if needed and set the access token as authorization
+           header of the async session.
+        """
+        if self._StravaClient__credentials_expire(credentials=self.credentials):
+            await asyncio.to_thread(self._StravaClient__get_valid_credentials)
+        self.async_session.headers["Authorization"] = f"Bearer {self.credentials['access_token']}"
+
+    async def __resilient_request(
+            self,
+            method: str,
+            url: str,
+            **kwargs
+            ) -> "httpx.Response":
+        """Internal helper method - async counterpart of the request scheduler
+           of the StravaClient: takes a token of the shared rate limiter before
+           each attempt and retries 429 and 5xx responses with exponential
+           backoff and jitter without blocking the event loop. The response
+           cache is shared with the StravaClient.
+
+        Args:
+            method (str): HTTP method of the request
+            url (str): URL of the request
+            **kwargs: passed on to httpx.AsyncClient.build_request, use_cache=False
+                      bypasses the response cache, stream=True returns the response
+                      before its body is downloaded (read it via aiter_bytes), it
+                      keeps its slot of the request semaphore until it is closed
+
+        Returns:
+            httpx.Response: response of the last attempt
+        """
+        use_cache = kwargs.pop("use_cache", True)
+        stream = kwargs.pop("stream", False)
+        cache_key, cached_response = None, None
+        if self.response_cache is not None and use_cache and method == "GET":
+            cache_key, endpoint, activity_id = self.response_cache.get_key(url=url, params=kwargs.get("params"))
+        if cache_key is not None:
+            cached_response = self.response_cache.get(key=cache_key)
+            if cached_response is not None:
+                if cached_response["fresh"]:
+                    return self.__create_cached_response(method=method, url=url, cached_response=cached_response)
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **self.response_cache.get_validators(cached_response=cached_response)}
+        for attempt in range(self.max_retries + 1):
+            wait_seconds = self.rate_limiter.try_acquire()
+            while wait_seconds > 0:
+                await asyncio.sleep(wait_seconds)
+                wait_seconds = self.rate_limiter.try_acquire()
+            # the slot is held until the body is read, a streamed response releases it when closed
+            await self.request_semaphore.acquire()
+            try:
+                request = self.async_session.build_request(method=method, url=url, **kwargs)
+                response = await self.async_session.send(request, stream=stream)
+            except BaseException:
+                self.request_semaphore.release()
+                raise
+            if stream:
+                self.__release_semaphore_on_close(response=response)
+            else:
+                self.request_semaphore.release()
+            rate_limit_usage = response.headers.get("X-RateLimit-Usage")
+            rate_limit_limit = response.headers.get("X-RateLimit-Limit")
+            if rate_limit_usage and rate_limit_limit:
+                self.rate_limiter.update(
+                    rate_limit_usage=rate_limit_usage,
+                    rate_limit_limit=rate_limit_limit
+                    )
+            if (response.status_code != 429 and response.status_code < 500) or attempt == self.max_retries:
+                break
+            # release the connection of a streamed response that is not read
+            await response.aclose()
+            backoff_seconds = self.rate_limiter.get_backoff_seconds(attempt=attempt)
+            print(f"Status code: {response.status_code} for URL: {response.url}, retry {attempt + 1}/{self.max_retries} in {backoff_seconds:.1f}s")
+            await asyncio.sleep(backoff_seconds)
+        # not modified since the cached response
+        if response.status_code == 304 and cached_response is not None:
+            await response.aclose()
+            self.response_cache.refresh(key=cache_key)
+            return self.__create_cached_response(method=method, url=url, cached_response=cached_response)
+        # httpx responses expose status_code and url like requests responses
+        self._StravaClient__check_status_code(response=response)
+        if cache_key is not None and response.status_code == 200:
+            cache_kwargs = {"key": cache_key, "endpoint": endpoint, "activity_id": activity_id, "url": url, "headers": response.headers}
+            if stream:
+                # a streamed body is stored while it is read instead of being buffered here,
+                # the compressed body is kept in memory until the last chunk
+                aiter_bytes = response.aiter_bytes
+                response.aiter_bytes = lambda chunk_size=None: self.response_cache.atee(
+                    chunks=aiter_bytes(chunk_size=chunk_size),
+                    **cache_kwargs
+                    )
+            else:
+                self.response_cache.set(body=response.content, **cache_kwargs)
+        return response
+
+    def __release_semaphore_on_close(
+            self,
+            response: "httpx.Response"
+            ):
+        """Internal helper method - release the slot of a streamed response in the
+           request semaphore once it is closed, aiter_bytes closes it after the last
+           chunk."""
+        aclose = response.aclose
+        released = False
+
+        async def release_and_aclose():
+            nonlocal released
+            try:
+                await aclose()
+            finally:
+                if not released:
+                    released = True
+                    self.request_semaphore.release()
+        response.aclose = release_and_aclose
+
+    def __create_cached_response(
+            self,
+            method: str,
+            url: str,
+            cached_response: Dict
+            ) -> "httpx.Response":
+        """Internal helper method - response object of a cached response."""
+        return httpx.Response(
+            status_code=200,
+            headers=cached_response["headers"],
+            content=cached_response["body"],
+            request=httpx.Request(method=method, url=url)
+            )
+
+    async def __get_activities_page(
+            self,
+            page: int,
+            items_per_page: int,
+            request_timeout: int=REQUEST_TIMEOUT
+            ) -> List[Dict]:
+        """Internal helper method - request a single page of the
+           /athlete/activities endpoint.
+
+        Returns:
+            List[Dict]: records of the page, an empty list after the last page
+
+        Raises:
+            Exception: if the page is not answered with a 200 (after the retries)
+        """
+        print(f"Requesting data from page: {page}")
+        params = {
+             "per_page": f"{items_per_page}",
+             "page": f"{page}"
+            }
+        url = f"{self.base_url}activities"
+        response = await self.__resilient_request(
+            method="GET",
+            url=url,
+            params=params,
+            timeout=request_timeout
+            )
+        if response.status_code != 200:
+            raise Exception(f"Activities request failed for page: {page}, status code: {response.status_code}")
+        return response.json()
+
+    async def aget_strava_activities(
+            self,
+            page:int=1,
+            items_per_page: int=200,
+            save_activities: bool=False,
+            activities_file_name: str=None,
+            activities_path: str=None,
+            request_timeout: int=REQUEST_TIMEOUT,
+            max_workers: int=None
+            ) -> pd.DataFrame:
+        """Coroutine version of StravaClient.get_strava_activities.
+
+        Args:
+            max_workers (int, optional): Number of pages that are requested concurrently.
+                                         Pages are still collected in order and paging
+                                         stops at the first empty page.
+                                         Defaults to None (one page at a time).
+
+        Returns:
+            pd.DataFrame: activities overview with one row per activity
+        """
+        # check if the credentials are still valid and set the access token on the session
+        await self.__authorize_session()
+        concurrent_pages = 1 if max_workers is None else max_workers
+        activities_records = []
+        last_page_reached = False
+        while not last_page_reached:
+            # gather returns the pages in order, paging stops at the first empty page
+            pages_records = await asyncio.gather(*[
+                self.__get_activities_page(
+                    page=page_,
+                    items_per_page=items_per_page,
+                    request_timeout=request_timeout
+                    )
+                for page_ in range(page, page + concurrent_pages)
+                ])
+            for r in pages_records:
+                if not r:
+                    last_page_reached = True
+                    break
+                activities_records.extend(r)
+            page += concurrent_pages
+        activities_df = self.create_activities_df(activities_records=activities_records)
+        if save_activities:
+            if (activities_file_name and activities_path) is not None:
+                self._StravaClient__check_path_existence(path=activities_path)
+                activities_full_save_path = f"{activities_path}/{activities_file_name}"
+                activities_df.to_csv(activities_full_save_path, index=False)
+                print(f"Activities successfully saved: {activities_full_save_path}")
+        return activities_df
+
+    async def aget_strava_activity(
+            self,
+            activity_id: str,
+            request_timeout: int=REQUEST_TIMEOUT,
+            use_cache: bool=True
+            ) -> Dict:
+        """Coroutine version of StravaClient.get_strava_activity.
+
+        Args:
+            activity_id (str): ID of the activity
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            use_cache (bool, optional): Use the response cache of the client. Defaults to True.
+
+        Returns:
+            Dict: details of the activity
+        """
+        # check if the credentials are still valid and set the access token on the session
+        await self.__authorize_session()
+
+        url = f"{self.base_url}activities/{activity_id}"
+        response = await self.__resilient_request(
+            method="GET",
+            url=url,
+            timeout=request_timeout,
+            use_cache=use_cache
+            )
+        return response.json()
+
+    async def aget_activity_stream(
+            self,
+            activity_id: str,
+            request_timeout: int=REQUEST_TIMEOUT,
+            keys: List[str]=None,
+            use_cache: bool=True
+            ) -> Dict[str, Dict[str, List[List[float]]]]:
+        """Coroutine version of StravaClient.get_activity_stream.
+
+        Args:
+            activity_id (str): ID of the activity
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            keys (List[str], optional): Stream types requested in the one request.
+                                        Defaults to None (["latlng"]).
+            use_cache (bool, optional): Use the response cache of the client. Defaults to True.
+
+        Returns:
+            Dict[str, Dict[str, List[List[float]]]]: activity stream dict
+        """
+        response = await self.__request_activity_stream(
+            activity_id=activity_id,
+            request_timeout=request_timeout,
+            keys=keys,
+            use_cache=use_cache
+            )
+        return response.json()
+
+    async def __request_activity_stream(
+            self,
+            activity_id: str,
+            request_timeout: int,
+            keys: List[str]=None,
+            stream: bool=False,
+            use_cache: bool=True
+            ) -> "httpx.Response":
+        """Internal helper method - request the streams of an activity, with stream
+           the body is downloaded while it is read from the response."""
+        # check if the credentials are still valid and set the access token on the session
+        await self.__authorize_session()
+
+        url = f"{self.base_url}activities/{activity_id}/streams"
+        params = {
+            "keys": ",".join(keys or ["latlng"]),
+            "key_by_type": "true"
+        }
+        response = await self.__resilient_request(
+            method="GET",
+            url=url,
+            params=params,
+            timeout=request_timeout,
+            stream=stream,
+            use_cache=use_cache
+            )
+        if response.status_code == 200:
+            print(f"Data Request successfull for stream for id: {activity_id}")
+        return response
+
+    async def aget_activity_stream_arrays(
+            self,
+            activity_id: int,
+            keys: List[str]=STREAM_KEYS,
+            request_timeout: int=REQUEST_TIMEOUT,
+            json_decoder: str="incremental",
+            chunk_size: int=65536,
+            use_cache: bool=True
+            ) -> ActivityStream:
+        """Coroutine version of StravaClient.get_activity_stream_arrays, the
+           incremental decoder parses the body chunk by chunk while it is
+           downloaded.
+
+        Returns:
+            ActivityStream: typed streams of the activity
+        """
+        if json_decoder not in ["incremental", "orjson", "json"]:
+            raise ValueError('json_decoder is expected to be one of: ["incremental", "orjson", "json"]')
+        if json_decoder == "orjson" and orjson is None:
+            raise ImportError("The orjson decoder requires orjson, install it via: pip install strava_client[fast]")
+        response = await self.__request_activity_stream(
+            activity_id=activity_id,
+            request_timeout=request_timeout,
+            keys=keys,
+            stream=json_decoder == "incremental",
+            use_cache=use_cache
+            )
+        if json_decoder == "incremental":
+            stream_response_decoder = StreamResponseDecoder()
+            try:
+                async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+                    stream_response_decoder.feed(chunk=chunk)
+            finally:
+                await response.aclose()
+            streams, activity_stream = stream_response_decoder.close()
+        elif json_decoder == "orjson":
+            activity_stream = orjson.loads(response.content)
+        else:
+            activity_stream = response.json()
+        # error responses of the API hold a message and a list of errors
+        if "errors" in activity_stream:
+            raise Exception(f"Stream request failed for activity id: {activity_id}: {activity_stream.get('message')}")
+        if json_decoder == "incremental":
+            return ActivityStream(streams=streams, activity_id=activity_id)
+        return ActivityStream.from_response(stream_response=activity_stream, activity_id=activity_id)
+
+    async def aget_activity_splits(
+            self,
+            activity_type: str,
+            activities_df: pd.DataFrame,
+            base_url: str=BASE_URL,
+            split_colnames_dict: Dict[str, List[str]]=SPLIT_COLNAMES_DICT,
+            request_timeout: int=REQUEST_TIMEOUT,
+            split_item: str="splits_metric",
+            max_workers: int=None,
+            use_cache: bool=True,
+            save_activity_store: bool=False,
+            return_failed_activity_ids: bool=False
+            ) -> pd.DataFrame:
+        """Coroutine version of StravaClient.get_activity_splits, the details of
+           the activities of the type are requested by max_workers concurrent
+           workers and a failing activity is skipped without stopping the others.
+
+        Args:
+            max_workers (int, optional): Number of concurrent requests.
+                                         Defaults to None (pool_maxsize of the client).
+
+        Returns:
+            pd.DataFrame: splits of all activities of the type, with return_failed_activity_ids
+                          a tuple of it and the failed activity ids with their error messages
+        """
+        # check if the credentials are still valid and set the access token on the session
+        await self.__authorize_session()
+        # filter for the activity
+        activity_type_df = activities_df[activities_df.type == activity_type]
+        col_names = self._StravaClient__get_split_col_names(
+            activity_type=activity_type,
+            split_colnames_dict=split_colnames_dict,
+            split_item=split_item
+            )
+        # a bounded number of workers takes the ids one by one instead of a
+        # coroutine per activity, the shared iterator is only used by the event loop
+        activity_ids = iter(activity_type_df['id'])
+        results = {}
+
+        async def request_activities_details():
+            for activity_id in activity_ids:
+                try:
+                    results[activity_id] = await self.__request_activity_details(
+                        activity_id=activity_id,
+                        base_url=base_url,
+                        request_timeout=request_timeout,
+                        use_cache=use_cache
+                        )
+                except Exception as e:
+                    results[activity_id] = e
+        await asyncio.gather(*[
+            request_activities_details()
+            for _ in range(min(max_workers or self.pool_maxsize, len(activity_type_df)))
+            ])
+        activities_details = {}
+        failed_activity_ids = {}
+        for activity_id in activity_type_df['id']:
+            result = results[activity_id]
+            if isinstance(result, Exception):
+                failed_activity_ids[activity_id] = repr(result)
+                print(f"Request of the details failed for activity id: {activity_id}: {result!r}")
+            else:
+                activities_details[activity_id] = result
+        activity_type_splits_df = self._StravaClient__create_splits_df(
+            activity_ids=list(activities_details),
+            activities_details=list(activities_details.values()),
+            col_names=col_names,
+            split_item=split_item
+            )
+        if failed_activity_ids:
+            print(f"Loaded splits of activities: {len(activities_details)}, failed activities: {len(failed_activity_ids)}")
+        if save_activity_store:
+            self._StravaClient__check_activity_store()
+            self.activity_store.save_splits(splits_df=activity_type_splits_df, split_item=split_item)
+        if return_failed_activity_ids:
+            return activity_type_splits_df, failed_activity_ids
+        return activity_type_splits_df
+
+    async def __request_activity_details(
+            self,
+            activity_id: int,
+            base_url: str,
+            request_timeout: int,
+            use_cache: bool=True
+            ) -> Dict:
+        """Internal helper method - request the details of an activity, error
+           responses of the API raise an exception."""
+        response = await self.__resilient_request(
+            method="GET",
+            url=f"{base_url}activities/{activity_id}",
+            timeout=request_timeout,
+            use_cache=use_cache
+            )
+        activity_details = response.json()
+        # error responses of the API hold a message and a list of errors
+        if "errors" in activity_details:
+            raise Exception(f"Details request failed for activity id: {activity_id}: {activity_details.get('message')}")
+        return activity_details
@@ -48,6 +48,12 @@ SPLIT_COLNAMES_DICT = {
 
 }
 REQUEST_TIMEOUT = 90
+POOL_MAXSIZE = 10 # kept alive connections of the session, at least the number of concurrent workers
+MAX_RETRIES = 3 # retries of failed connections, 429 and 5xx responses
+RATE_LIMIT_THRESHOLD = 0.9 # used share of the 15 minute and daily rate limits
+CREDENTIALS_REFRESH_MARGIN = 300 # seconds before expires_at at which the access token is refreshed
+RESPONSE_CACHE_TTL = 7 * 24 * 3600 # seconds a cached activity response is used without revalidation
+RESPONSE_CACHE_MAX_SIZE = 1_000_000_000 # bytes of cached responses before the least recently used are evicted
 
 BOUNDING_BOX = {
     'latitude_top_right': 54.5,
@@ -36,4 +36,11 @@ setup(
     include_package_data=True,
     python_requires='>=3.6',
     install_requires=install_requirements,
+    # optional dependencies: AsyncStravaClient, coordinate store, fast JSON decoding
+    extras_require={
+        "async": ["httpx"],
+        "parquet": ["pyarrow"],
+        "fast": ["orjson"],
+        "all": ["httpx", "pyarrow", "orjson"],
+    },
 )
@@ -4,10 +4,27 @@ import webbrowser
 import json
 import datetime as dt
 import inspect
+import time
+import threading
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
 import gpxpy
 import gpxpy.gpx
+try:
+    import pyarrow as pa
+    import pyarrow.dataset
+    import pyarrow.parquet
+except ImportError:
+    pa = None
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 import config as cfg
@@ -23,11 +40,51 @@ ERROR_CODES_DICT = cfg.ERROR_CODES_DICT
 SUCCESS_CODES_DICT = cfg.SUCCESS_CODES_DICT
 COLOR_MAP = cfg.COLOR_MAP
 SPLIT_COLNAMES_DICT = cfg.SPLIT_COLNAMES_DICT
+# items of the detailed activity that hold one record per split, lap or effort
+SPLIT_ITEMS = ["splits_metric", "splits_standard", "laps", "best_efforts"]
 REQUEST_TIMEOUT = cfg.REQUEST_TIMEOUT
+POOL_MAXSIZE = cfg.POOL_MAXSIZE
+MAX_RETRIES = cfg.MAX_RETRIES
+RATE_LIMIT_THRESHOLD = cfg.RATE_LIMIT_THRESHOLD
+CREDENTIALS_REFRESH_MARGIN = cfg.CREDENTIALS_REFRESH_MARGIN
+RESPONSE_CACHE_TTL = cfg.RESPONSE_CACHE_TTL
+RESPONSE_CACHE_MAX_SIZE = cfg.RESPONSE_CACHE_MAX_SIZE
+# Columns and dtypes of the columnar coordinate store
+COORDINATE_STORE_DTYPES = {
+    "lat": "float32",
+    "lon": "float32",
+    "activity_id": "int64",
+    "activity_type": "category"
+    }
+# Columns and dtypes of the activities overview DataFrame
+ACTIVITIES_COLNAMES = [
+    "id",
+    "name",
+    "start_date_local",
+    "type",
+    "distance",
+    "moving_time",
+    "elapsed_time",
+    "total_elevation_gain",
+    "end_latlng",
+    "external_id"
+    ]
+ACTIVITIES_DTYPES = {
+    "id": "int64",
+    "distance": "float64",
+    "moving_time": "int64",
+    "elapsed_time": "int64",
+    "total_elevation_gain": "float64"
+    }
 
 # For type hint checking and overall data type integrity import self written
 # checking function
 from util.TypeHintCheck import check_data_types, check_data_types_decorator, apply_decorator_to_methods
+from util.RateLimiter import StravaRateLimiter
+from util.ActivityTracks import StravaActivitiesTracks
+from util.ActivityStream import ActivityStream, STREAM_KEYS, decode_stream_response
+from util.ResponseCache import StravaResponseCache
+from util.ActivityStore import StravaActivityStore
 
 #@apply_decorator_to_methods(check_data_types_decorator)
 class StravaClient():
@@ -45,7 +102,16 @@ class StravaClient():
             client_credential_file_name: str=None,
             client_credential_path: str=None,
             proxies: Dict[str, str]=None,
-            verify: bool=None
+            verify: bool=None,
+            pool_maxsize: int=POOL_MAXSIZE,
+            max_retries: int=MAX_RETRIES,
+            session: requests.Session=None,
+            rate_limit_threshold: float=RATE_LIMIT_THRESHOLD,
+            credentials_refresh_margin: int=CREDENTIALS_REFRESH_MARGIN,
+            response_cache_path: str=None,
+            response_cache_ttl: float=RESPONSE_CACHE_TTL,
+            response_cache_max_size: int=RESPONSE_CACHE_MAX_SIZE,
+            activity_store_path: str=None
             ):
         """Initialisation of the Strava Client
            Expected:
@@ -68,6 +134,38 @@ class StravaClient():
                                                          Defaults to None.
             client_credential_path (str, optional): Place where the potential credentials file is stored.
                                                     Defaults to None.
+            proxies (Dict[str, str], optional): Proxies set on the session for all requests.
+                                                Defaults to None.
+            verify (bool, optional): TLS verification setting of the session for all requests.
+                                     Defaults to None (requests default).
+            pool_maxsize (int, optional): Number of kept alive connections per host, should be
+                                          at least the number of concurrent workers.
+                                          Defaults to POOL_MAXSIZE.
+            max_retries (int, optional): Retries with exponential backoff and jitter of failed
+                                         connections and of requests answered with a 429 or
+                                         5xx status code.
+                                         Defaults to MAX_RETRIES.
+            session (requests.Session, optional): Custom session used for all requests instead of
+                                                  the one created by the client.
+                                                  Defaults to None.
+            rate_limit_threshold (float, optional): Share of the Strava rate limits (15 minute and daily
+                                                    window) that the client uses before it waits for
+                                                    the next window.
+                                                    Defaults to RATE_LIMIT_THRESHOLD.
+            credentials_refresh_margin (int, optional): Seconds before expires_at at which the access
+                                                        token is already refreshed.
+                                                        Defaults to CREDENTIALS_REFRESH_MARGIN.
+            response_cache_path (str, optional): SQLite file of the persistent cache of the activity
+                                                 details and streams responses.
+                                                 Defaults to None (no cache).
+            response_cache_ttl (float, optional): Seconds a cached response is used without revalidation.
+                                                  Defaults to RESPONSE_CACHE_TTL.
+            response_cache_max_size (int, optional): Bytes of the cached responses before the least
+                                                     recently used ones are evicted.
+                                                     Defaults to RESPONSE_CACHE_MAX_SIZE.
+            activity_store_path (str, optional): SQLite file of the local store of the activities,
+                                                 their coordinates and splits.
+                                                 Defaults to None (no store).
         """
         self.base_url = base_url
         self.client_id = client_id
@@ -78,6 +176,28 @@ class StravaClient():
         self.success_codes_dict = success_codes_dict
         self.proxies = proxies
         self.verify = verify
+        self.max_retries = max_retries
+        self.pool_maxsize = pool_maxsize
+        self.credentials_refresh_margin = credentials_refresh_margin
+        # only one thread refreshes expired credentials, the others reuse the result
+        self.credentials_lock = threading.Lock()
+        # token buckets of the 15 minute and the daily window shared by all requests
+        self.rate_limiter = StravaRateLimiter(rate_limit_threshold=rate_limit_threshold)
+        # completed activities rarely change, their responses are kept on disk
+        self.response_cache = StravaResponseCache(
+            cache_path=response_cache_path,
+            ttl=response_cache_ttl,
+            max_size=response_cache_max_size
+            ) if response_cache_path is not None else None
+        # activities, coordinates and splits in one indexed file instead of a file per activity
+        self.activity_store = StravaActivityStore(
+            store_path=activity_store_path
+            ) if activity_store_path is not None else None
+        # one pooled session with kept alive connections for all requests
+        self.session = session if session is not None else self.__create_session(
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries
+            )
         if self.client_credential_path is not None and self.client_credential_file_name is not None:
             self.__check_path_existence(path=client_credential_path)
             # Check if credentils file is existend at provided location
@@ -88,7 +208,216 @@ class StravaClient():
         else:
             print(self.get_authorization_url())
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(
+            self
+            ):
+        """Close the session and all its pooled connections, the response cache
+           and the activity store."""
+        self.session.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+        if self.activity_store is not None:
+            self.activity_store.close()
+
+    def __create_session(
+            self,
+            pool_maxsize: int,
+            max_retries: int
+            ) -> requests.Session:
+        """Internal helper method - set up the pooled session shared by all
+           requests of the client, including the proxies and verify settings.
+
+        Args:
+            pool_maxsize (int): Number of kept alive connections per host.
+            max_retries (int): Retries with backoff of failed connections,
+                               responses with a 429 or 5xx status code are
+                               retried by __resilient_request.
+
+        Returns:
+            requests.Session: configured session
+        """
+        session = requests.Session()
+        # connection errors only, status codes (also 429/503 with a Retry-After header) are
+        # returned to __resilient_request so every attempt passes the rate limiter
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=0,
+            backoff_factor=0.5,
+            allowed_methods=["GET"],
+            respect_retry_after_header=False,
+            raise_on_status=False
+            )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+            )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if self.proxies is not None:
+            session.proxies.update(self.proxies)
+        if self.verify is not None:
+            session.verify = self.verify
+        return session
+
+    def __authorize_session(
+            self
+            ):
+        """Internal helper method - check if the credentials are still valid
+           and set the access token as authorization header of the session.
+        """
+        credentials = self.__get_valid_credentials()
+        self.session.headers["Authorization"] = f"Bearer {credentials['access_token']}"
+
+    def __credentials_expire(
+            self,
+            credentials: Dict[str, str]
+            ) -> bool:
+        """Internal helper method - check if the access token expires within
+           the refresh margin.
+
+        Args:
+            credentials (Dict[str, str]): JSON structured credentials
+
+        Returns:
+            bool: True if the access token needs to be refreshed
+        """
+        return time.time() + self.credentials_refresh_margin >= credentials["expires_at"]
+
+    def __get_valid_credentials(
+            self
+            ) -> Dict[str, str]:
+        """Internal helper method - in memory token manager. The credentials of
+           the instance are returned as long as they are valid, shortly before
+           they expire the first calling thread refreshes them once and all
+           other threads reuse the refreshed credentials.
+
+        Returns:
+            Dict[str, str]: valid JSON structured credentials
+        """
+        if self.__credentials_expire(credentials=self.credentials):
+            with self.credentials_lock:
+                # another thread may have refreshed them while waiting for the lock
+                if self.__credentials_expire(credentials=self.credentials):
+                    self.credentials = self.refresh_credentials(credentials=self.credentials)
+        return self.credentials
+
+    def __save_credentials(
+            self,
+            strava_tokens: Dict[str, str],
+            credentials_full_save_path: str
+            ):
+        """Internal helper method - save the credentials atomically, they are
+           written to a temporary file first that then replaces the credentials
+           file, so an interrupted write never leaves a broken file behind.
+
+        Args:
+            strava_tokens (Dict[str, str]): JSON structured credentials
+            credentials_full_save_path (str): full path of the credentials file
+        """
+        credentials_temp_save_path = f"{credentials_full_save_path}.tmp"
+        with open(credentials_temp_save_path, 'w') as outfile:
+            json.dump(strava_tokens, outfile)
+        os.replace(credentials_temp_save_path, credentials_full_save_path)
+        print(f"Strava credentials saved at: {credentials_full_save_path}")
+
     def __resilient_request(
+            self,
+            method: str,
+            url: str,
+            **kwargs
+            ) -> requests.models.Response:
+        """Internal helper method - sends every request of the client via
+           the session. Each request first takes a token of the shared rate
+           limiter, whose buckets are synchronised with the rate limit headers
+           of every response. Responses with a 429 or 5xx status code are
+           retried with exponential backoff and jitter, a 429 that used up a
+           window additionally waits for the next window in the rate limiter.
+           GET requests of cached endpoints are answered from the response cache
+           if the cached response is within its ttl, otherwise they are sent as
+           conditional requests. The body of a streamed response is stored once
+           it has been read completely.
+
+        Args:
+            method (str): HTTP method of the request
+            url (str): URL of the request
+            **kwargs: passed on to requests.Session.request, use_cache=False
+                      bypasses the response cache
+
+        Returns:
+            requests.models.Response: response of the last attempt
+        """
+        use_cache = kwargs.pop("use_cache", True)
+        cache_key, cached_response = None, None
+        if self.response_cache is not None and use_cache and method == "GET":
+            cache_key, endpoint, activity_id = self.response_cache.get_key(url=url, params=kwargs.get("params"))
+        if cache_key is not None:
+            cached_response = self.response_cache.get(key=cache_key)
+            if cached_response is not None:
+                if cached_response["fresh"]:
+                    return self.__create_cached_response(url=url, cached_response=cached_response)
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **self.response_cache.get_validators(cached_response=cached_response)}
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            response = self.session.request(method=method, url=url, **kwargs)
+            rate_limit_usage = response.headers.get("X-RateLimit-Usage")
+            rate_limit_limit = response.headers.get("X-RateLimit-Limit")
+            if rate_limit_usage and rate_limit_limit:
+                self.rate_limiter.update(
+                    rate_limit_usage=rate_limit_usage,
+                    rate_limit_limit=rate_limit_limit
+                    )
+            if (response.status_code != 429 and response.status_code < 500) or attempt == self.max_retries:
+                break
+            # release the connection of a streamed response that is not read
+            response.close()
+            backoff_seconds = self.rate_limiter.get_backoff_seconds(attempt=attempt)
+            print(f"Status code: {response.status_code} for URL: {response.url}, retry {attempt + 1}/{self.max_retries} in {backoff_seconds:.1f}s")
+            time.sleep(backoff_seconds)
+        # not modified since the cached response
+        if response.status_code == 304 and cached_response is not None:
+            response.close()
+            self.response_cache.refresh(key=cache_key)
+            return self.__create_cached_response(url=url, cached_response=cached_response)
+        self.__check_status_code(response=response)
+        if cache_key is not None and response.status_code == 200:
+            cache_kwargs = {"key": cache_key, "endpoint": endpoint, "activity_id": activity_id, "url": url, "headers": response.headers}
+            if kwargs.get("stream"):
+                # a streamed body is stored while it is read instead of being buffered here,
+                # the compressed body is kept in memory until the last chunk
+                iter_content = response.iter_content
+                response.iter_content = lambda chunk_size=1, decode_unicode=False: self.response_cache.tee(
+                    chunks=iter_content(chunk_size=chunk_size, decode_unicode=decode_unicode),
+                    **cache_kwargs
+                    )
+            else:
+                self.response_cache.set(body=response.content, **cache_kwargs)
+        return response
+
+
+    def __create_cached_response(
+            self,
+            url: str,
+            cached_response: Dict
+            ) -> requests.models.Response:
+        """Internal helper method - response object of a cached response."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers.update(cached_response["headers"])
+        response.raw = io.BytesIO(cached_response["body"])
+        return response
+
+
+    def __check_status_code(
             self,
             response: requests.models.Response,
             ):
@@ -114,7 +443,7 @@ class StravaClient():
             print(f"Status code: {status_code} not defined")
         else: # if status code is definded in the dicts
             # get the defined message for the status code
-            status_code_message = f"{"".join(status_code_message)} for URL: {response_url}"
+            status_code_message = f"{''.join(status_code_message)} for URL: {response_url}"
             # get the defined return (type) for the status code
             status_code_return = [
                 dict_.get(status_code).get("return_")
@@ -150,6 +479,15 @@ class StravaClient():
             os.mkdir(folder_path)
             print(f"Folder: {folder_name} created in path: {path}")
 
+    def __check_activity_store(
+        self
+        ):
+        """Internal helper method - methods of the activity store require
+           the activity_store_path of the client.
+        """
+        if self.activity_store is None:
+            raise ValueError("No activity store set, initialise the client with an activity_store_path")
+
     ########### credential and authorization related methods ###########
     def get_authorization_url(
             self,
@@ -243,19 +581,17 @@ class StravaClient():
         """
         self.client_credential_file_name = client_credential_file_name
         # Make Strava auth API call with your client_code, client_secret and code
-        response = requests.post(
-                            url = url,
+        response = self.__resilient_request(
+                            method="POST",
+                            url=url,
                             data = {
                                     'client_id': self.client_id,
                                     'client_secret': self.client_secret,
                                     'code': code, # from refreshed URL after clicking Authorize
                                     'grant_type': 'authorization_code'
                                     },
-                                    timeout=request_timeout,
-                            proxies=self.proxies,
-                            verify=self.verify
+                            timeout=request_timeout
                         )
-        self.__resilient_request(response=response)
         strava_tokens = None
         if response.status_code == 200:
             # Save json response as a variable
@@ -274,9 +610,10 @@ class StravaClient():
                 else:
                     credentials_full_save_path = rf'{client_credential_file_name}'
                 if strava_tokens is not None:
-                    with open(credentials_full_save_path, 'w') as outfile:
-                        json.dump(strava_tokens, outfile)
-                    print(f"Strava credentials saved at: {credentials_full_save_path}")
+                    self.__save_credentials(
+                        strava_tokens=strava_tokens,
+                        credentials_full_save_path=credentials_full_save_path
+                        )
         else:
             raise Exception(f"Failed to load new credentials, strava_tokens: {strava_tokens}")
         return strava_tokens
@@ -289,10 +626,27 @@ class StravaClient():
                   save_credentials: bool=True,
                   request_timeout: int=REQUEST_TIMEOUT
                   ) -> Dict[str, str]:
-        if dt.datetime.now() > dt.datetime.fromtimestamp(credentials["expires_at"]):
+        """Refresh the access token with the refresh token if it expires within
+           the refresh margin, otherwise the given credentials are returned.
+
+        Args:
+            credentials (Dict[str, str]): JSON structured credentials
+            url (str, optional): OAUTH URL from Strava.
+                                 Defaults to 'https://www.strava.com/oauth/token'.
+            save_credentials (bool, optional): Save the refreshed credentials.
+                                               Defaults to True.
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+
+        Returns:
+            Dict[str, str]: valid JSON structured credentials
+        """
+        if self.__credentials_expire(credentials=credentials):
             # a new access token must be retrived using the old ones refresh token
             print("Refreshing access token")
-            response = requests.post(
+            response = self.__resilient_request(
+                method="POST",
                 url=url,
                 data={
                     'client_id': self.client_id,
@@ -300,15 +654,14 @@ class StravaClient():
                     'grant_type': 'refresh_token',
                     'refresh_token': credentials['refresh_token']
                 },
-                timeout=request_timeout,
-                proxies=self.proxies,
-                verify=self.verify
+                timeout=request_timeout
             )
-            self.__resilient_request(response=response)
             strava_tokens = None
             if response.status_code == 200:
                 # Save json response as a variable
                 strava_tokens = response.json()
+            else:
+                raise Exception(f"Failed to refresh credentials, status code: {response.status_code}")
             if save_credentials:
                 # Save credentials to file
                 client_credential_path = ""
@@ -319,9 +672,10 @@ class StravaClient():
                 else:
                     credentials_full_save_path = rf'{self.client_credential_file_name}'
                 if strava_tokens is not None:
-                    with open(credentials_full_save_path, 'w') as outfile:
-                        json.dump(strava_tokens, outfile)
-                    print(f"Strava credentials saved at: {credentials_full_save_path}")
+                    self.__save_credentials(
+                        strava_tokens=strava_tokens,
+                        credentials_full_save_path=credentials_full_save_path
+                        )
             return strava_tokens
         else:
             return credentials
@@ -347,6 +701,125 @@ class StravaClient():
             return None
 
     ########### activity and Strava API model related methods ###########
+    def __get_activities_page(
+            self,
+            page: int,
+            items_per_page: int,
+            request_timeout: int=REQUEST_TIMEOUT,
+            after: int=None
+            ) -> List[Dict]:
+        """Internal helper method - request a single page of the
+           /athlete/activities endpoint.
+
+        Args:
+            page (int): number of the requested page, starting at 1
+            items_per_page (int): number of activities per page
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            after (int, optional): Only activities that started after this
+                                   epoch timestamp are returned.
+                                   Defaults to None.
+
+        Returns:
+            List[Dict]: records of the page, an empty list after the last page
+
+        Raises:
+            Exception: if the page is not answered with a 200 (after the retries),
+                       a failed page must not be taken as the end of the activities
+        """
+        print(f"Requesting data from page: {page}")
+        params = {
+             "per_page": f"{items_per_page}",
+             "page": f"{page}"
+            }
+        if after is not None:
+            params["after"] = f"{after}"
+        url = f"{self.base_url}activities"
+        response = self.__resilient_request(
+            method="GET",
+            url=url,
+            params=params,
+            timeout=request_timeout
+            )
+        if response.status_code != 200:
+            raise Exception(f"Activities request failed for page: {page}, status code: {response.status_code}")
+        return response.json()
+
+
+    def __get_activities_records(
+            self,
+            page: int,
+            items_per_page: int,
+            request_timeout: int=REQUEST_TIMEOUT,
+            max_workers: int=None,
+            after: int=None
+            ) -> List[Dict]:
+        """Internal helper method - request the /athlete/activities endpoint
+           page by page until the first empty page and collect all records.
+           A failed page raises instead of ending the activities early.
+
+        Args:
+            page (int): First page to request.
+            items_per_page (int): Number of activities per page.
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            max_workers (int, optional): Number of pages that are requested concurrently.
+                                         Defaults to None (one page at a time).
+            after (int, optional): Only activities that started after this
+                                   epoch timestamp are returned.
+                                   Defaults to None.
+
+        Returns:
+            List[Dict]: records of all pages in page order
+        """
+        # check if the credentials are still valid and set the access token on the session
+        self.__authorize_session()
+
+        activities_records = []
+        if max_workers is None:
+            while True:
+                # get page of activities from Strava
+                r = self.__get_activities_page(
+                    page=page,
+                    items_per_page=items_per_page,
+                    request_timeout=request_timeout,
+                    after=after
+                    )
+                # if no results then exit loop
+                if not r:
+                    break
+                activities_records.extend(r)
+                # increment page
+                page += 1
+        else:
+            # request max_workers pages at once, the futures are read in page
+            # order so that the row order matches the sequential requests
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                last_page_reached = False
+                while not last_page_reached:
+                    pages_futures = [
+                        executor.submit(
+                            self.__get_activities_page,
+                            page=page_,
+                            items_per_page=items_per_page,
+                            request_timeout=request_timeout,
+                            after=after
+                            )
+                        for page_ in range(page, page + max_workers)
+                        ]
+                    for page_future in pages_futures:
+                        r = page_future.result()
+                        # stop at the first empty page, later pages are discarded
+                        if not r:
+                            last_page_reached = True
+                            break
+                        activities_records.extend(r)
+                    page += max_workers
+        return activities_records
+
+
     def get_strava_activities(
             self,
             page:int=1,
@@ -354,65 +827,38 @@ class StravaClient():
             save_activities: bool=False,
             activities_file_name: str=None,
             activities_path: str=None,
-            request_timeout: int=REQUEST_TIMEOUT
+            request_timeout: int=REQUEST_TIMEOUT,
+            max_workers: int=None
             ) -> pd.DataFrame:
-        # get the access token from the credentials and check if they are still valid
-        credentials = self.refresh_credentials(credentials=self.credentials)
-        access_token = credentials["access_token"]
+        """Retrieve the overview of all activities of the athlete, page by page
+           until the first empty page is returned.
 
-        activities_df = pd.DataFrame(
-            columns = [
-                "id",
-                "name",
-                "start_date_local",
-                "type",
-                "distance",
-                "moving_time",
-                "elapsed_time",
-                "total_elevation_gain",
-                "end_latlng",
-                "external_id"
-                ]
-                )
-        while True:
-            # get page of activities from Strava
-            print(f"Requesting data from page: {page}")
-            params = {
-                 "per_page": f"{items_per_page}",
-                 "page": f"{page}"
-                }
-            headers = {"Authorization": f"Bearer {access_token}"}
-            url = f"{BASE_URL}activities"
-            response = requests.get(
-                url=url,
-                params=params,
-                headers=headers,
-                timeout=request_timeout,
-                proxies=self.proxies,
-                verify=self.verify
-                )
-            self.__resilient_request(response=response)
-            if response.status_code != 200:
-                break
-            r = response.json()
-            # if no results then exit loop
-            if not r:
-                break
+        Args:
+            page (int, optional): First page to request. Defaults to 1.
+            items_per_page (int, optional): Number of activities per page. Defaults to 200.
+            save_activities (bool, optional): Save the activities as .csv file. Defaults to False.
+            activities_file_name (str, optional): File name of the .csv file. Defaults to None.
+            activities_path (str, optional): Place where to save the .csv file. Defaults to None.
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            max_workers (int, optional): Number of pages that are requested concurrently.
+                                         Pages are still collected in order and paging
+                                         stops at the first empty page.
+                                         Defaults to None (one page at a time).
 
-            # otherwise add new data to dataframe
-            for x in range(len(r)):
-                activities_df.loc[x + (page-1)*items_per_page,'id'] = r[x]['id']
-                activities_df.loc[x + (page-1)*items_per_page,'name'] = r[x]['name']
-                activities_df.loc[x + (page-1)*items_per_page,'start_date_local'] = r[x]['start_date_local']
-                activities_df.loc[x + (page-1)*items_per_page,'type'] = r[x]['type']
-                activities_df.loc[x + (page-1)*items_per_page,'distance'] = r[x]['distance']
-                activities_df.loc[x + (page-1)*items_per_page,'moving_time'] = r[x]['moving_time']
-                activities_df.loc[x + (page-1)*items_per_page,'elapsed_time'] = r[x]['elapsed_time']
-                activities_df.loc[x + (page-1)*items_per_page,'total_elevation_gain'] = r[x]['total_elevation_gain']
-                activities_df.loc[x + (page-1)*items_per_page,'end_latlng'] = r[x]['end_latlng']
-                activities_df.loc[x + (page-1)*items_per_page,'external_id'] = r[x]['external_id']
-            # increment page
-            page += 1
+        Returns:
+            pd.DataFrame: activities overview with one row per activity
+        """
+        # the records of all pages are collected first, the DataFrame
+        # is built only once after all pages have been requested
+        activities_records = self.__get_activities_records(
+            page=page,
+            items_per_page=items_per_page,
+            request_timeout=request_timeout,
+            max_workers=max_workers
+            )
+        activities_df = self.create_activities_df(activities_records=activities_records)
         if save_activities:
             if (activities_file_name and activities_path) is not None:
                 self.__check_path_existence(path=activities_path)
@@ -422,10 +868,202 @@ class StravaClient():
         return activities_df
 
 
+    def sync_strava_activities(
+            self,
+            activities_file_name: str,
+            activities_path: str,
+            full_reconciliation: bool=False,
+            items_per_page: int=200,
+            request_timeout: int=REQUEST_TIMEOUT,
+            max_workers: int=None
+            ) -> pd.DataFrame:
+        """Incrementally update the saved activities overview. The start date of
+           the newest activity seen is saved next to the activities file and only
+           activities that started afterwards are requested via the after parameter
+           and merged into the saved activities.
+
+        Args:
+            activities_file_name (str): File name of the activities .csv file.
+            activities_path (str): Place where the activities .csv file is saved.
+            full_reconciliation (bool, optional): Request all activities and replace the
+                                                  saved ones, this also removes deleted activities.
+                                                  Defaults to False.
+            items_per_page (int, optional): Number of activities per page. Defaults to 200.
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            max_workers (int, optional): Number of pages that are requested concurrently.
+                                         Defaults to None (one page at a time).
+
+        Returns:
+            pd.DataFrame: updated activities overview with one row per activity
+
+        Raises:
+            Exception: if a page of the activities fails, the saved activities and
+                       the sync state are then left unchanged
+        """
+        self.__check_path_existence(path=activities_path)
+        activities_full_save_path = f"{activities_path}/{activities_file_name}"
+        sync_state_full_save_path = f"{activities_path}/{os.path.splitext(activities_file_name)[0]}_sync_state.json"
+        # the saved activities and the sync state are only used for an incremental sync
+        after, activities_df = None, None
+        if not full_reconciliation and activities_file_name in os.listdir(activities_path) \
+            and os.path.isfile(sync_state_full_save_path):
+            activities_df = self.load_activities(
+                activities_file_name=activities_file_name,
+                activities_path=activities_path
+                )
+            with open(sync_state_full_save_path) as json_file:
+                after = json.load(json_file).get("after")
+        activities_records = self.__get_activities_records(
+            page=1,
+            items_per_page=items_per_page,
+            request_timeout=request_timeout,
+            max_workers=max_workers,
+            after=after
+            )
+        print(f"Number of new activities: {len(activities_records)}")
+        new_activities_df = self.create_activities_df(activities_records=activities_records)
+        if activities_df is not None:
+            # new records replace saved ones with the same id, newest activities first
+            activities_df = (
+                pd.concat([activities_df, new_activities_df])
+                .drop_duplicates(subset=["id"], keep="last")
+                .sort_values(by="start_date_local", ascending=False, kind="stable")
+                .reset_index(drop=True)
+                )
+        else:
+            activities_df = new_activities_df
+        activities_df.to_csv(activities_full_save_path, index=False)
+        print(f"Activities successfully saved: {activities_full_save_path}")
+        # the high-water mark is the start (UTC) of the newest activity seen
+        if activities_records:
+            start_dates = pd.to_datetime([record["start_date"] for record in activities_records], format="ISO8601")
+            newest_start_date = start_dates.max()
+            if after is None or newest_start_date.timestamp() > after:
+                after = int(newest_start_date.timestamp())
+                with open(sync_state_full_save_path, 'w') as outfile:
+                    json.dump({"after": after, "start_date": newest_start_date.isoformat()}, outfile)
+                print(f"Sync state saved at: {sync_state_full_save_path}")
+        return activities_df
+
+
+    def sync_activity_store(
+            self,
+            full_reconciliation: bool=False,
+            items_per_page: int=200,
+            request_timeout: int=REQUEST_TIMEOUT,
+            max_workers: int=None
+            ) -> pd.DataFrame:
+        """Incrementally update the activities of the activity store, the counterpart
+           of sync_strava_activities. Only activities that started after the newest
+           activity seen are requested and upserted into the store, the high-water
+           mark is kept in the store.
+
+        Args:
+            full_reconciliation (bool, optional): Request all activities and delete the stored ones
+                                                  that are not returned anymore, together with their
+                                                  coordinates and splits. Defaults to False.
+            items_per_page (int, optional): Number of activities per page. Defaults to 200.
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            max_workers (int, optional): Number of pages that are requested concurrently.
+                                         Defaults to None (one page at a time).
+
+        Returns:
+            pd.DataFrame: all activities of the store with one row per activity
+
+        Raises:
+            Exception: if a page of the activities fails, nothing is deleted or upserted
+                       then, activities are only reconciled against a complete listing
+        """
+        self.__check_activity_store()
+        after = None
+        if not full_reconciliation and self.activity_store.get_sync_state(name="after") is not None:
+            after = int(self.activity_store.get_sync_state(name="after"))
+        activities_records = self.__get_activities_records(
+            page=1,
+            items_per_page=items_per_page,
+            request_timeout=request_timeout,
+            max_workers=max_workers,
+            after=after
+            )
+        print(f"Number of new activities: {len(activities_records)}")
+        new_activities_df = self.create_activities_df(activities_records=activities_records)
+        # the listing is complete here, a failed page raised in __get_activities_records
+        if full_reconciliation:
+            deleted_activity_ids = set(self.activity_store.get_activity_ids(table="activities")) - set(new_activities_df["id"])
+            self.activity_store.delete_activities(activity_ids=list(deleted_activity_ids))
+            print(f"Number of deleted activities: {len(deleted_activity_ids)}")
+        self.activity_store.upsert_activities(activities_df=new_activities_df)
+        # the high-water mark is the start (UTC) of the newest activity seen
+        if activities_records:
+            start_dates = pd.to_datetime([record["start_date"] for record in activities_records], format="ISO8601")
+            newest_start_date = start_dates.max()
+            if after is None or newest_start_date.timestamp() > after:
+                self.activity_store.set_sync_state(name="after", value=str(int(newest_start_date.timestamp())))
+        return self.activity_store.load_activities()
+
+
+    def load_activities(
+            self,
+            activities_file_name: str,
+            activities_path: str,
+            activities_dtypes: Dict[str, str]=ACTIVITIES_DTYPES
+            ) -> pd.DataFrame:
+        """Load the saved activities overview and restore the column dtypes
+           of get_strava_activities.
+
+        Args:
+            activities_file_name (str): File name of the activities .csv file.
+            activities_path (str): Place where the activities .csv file is saved.
+            activities_dtypes (Dict[str, str], optional): Column dtypes of the DataFrame.
+                                                          Defaults to ACTIVITIES_DTYPES.
+
+        Returns:
+            pd.DataFrame: activities overview with one row per activity
+        """
+        activities_full_save_path = f"{activities_path}/{activities_file_name}"
+        activities_df = pd.read_csv(activities_full_save_path, dtype=activities_dtypes, float_precision="round_trip")
+        activities_df["start_date_local"] = pd.to_datetime(activities_df["start_date_local"], format="ISO8601", utc=True)
+        activities_df["end_latlng"] = activities_df["end_latlng"].map(json.loads, na_action="ignore")
+        return activities_df
+
+
+    def create_activities_df(
+            self,
+            activities_records: List[Dict],
+            activities_colnames: List[str]=ACTIVITIES_COLNAMES,
+            activities_dtypes: Dict[str, str]=ACTIVITIES_DTYPES
+            ) -> pd.DataFrame:
+        """Build the activities overview DataFrame in one go from the
+           raw records returned by the /athlete/activities endpoint.
+
+        Args:
+            activities_records (List[Dict]): JSON records of all requested pages
+            activities_colnames (List[str], optional): Columns to keep from the records.
+                                                       Defaults to ACTIVITIES_COLNAMES.
+            activities_dtypes (Dict[str, str], optional): Column dtypes of the DataFrame.
+                                                          Defaults to ACTIVITIES_DTYPES.
+
+        Returns:
+            pd.DataFrame: activities overview with one row per activity
+        """
+        activities_df = pd.DataFrame(
+            data=activities_records,
+            columns=activities_colnames
+            )
+        activities_df = activities_df.astype(activities_dtypes)
+        activities_df["start_date_local"] = pd.to_datetime(activities_df["start_date_local"], format="ISO8601", utc=True)
+        return activities_df
+
+
     def get_strava_activity(
             self,
             activity_id: str,
-            request_timeout: int=REQUEST_TIMEOUT
+            request_timeout: int=REQUEST_TIMEOUT,
+            use_cache: bool=True
             ) -> Dict:
         """Retrieve details for a certain activity id
 
@@ -434,66 +1072,87 @@ class StravaClient():
             request_timeout (int, optional): Default timeout parameter for
                                              requests.
                                              Defaults to REQUEST_TIMEOUT.
+            use_cache (bool, optional): Use the response cache of the client, False requests
+                                        the API and refreshes the cache. Defaults to True.
 
         Returns:
             Dict: _description_
         """
-        # get the access token from the credentials and check if they are still valid
-        credentials = self.refresh_credentials(credentials=self.credentials)
-        access_token = credentials["access_token"]
+        # check if the credentials are still valid and set the access token on the session
+        self.__authorize_session()
 
         url = f"{self.base_url}activities/{activity_id}"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        response = requests.get(
+        response = self.__resilient_request(
+            method="GET",
             url=url,
-            headers=headers,
             timeout=request_timeout,
-            proxies=self.proxies,
-            verify=self.verify            
+            use_cache=use_cache
             )
-        self.__resilient_request(response=response)
         return response.json()
 
 
     def get_activity_stream(
             self,
             activity_id: str,
-            request_timeout: int=REQUEST_TIMEOUT
+            request_timeout: int=REQUEST_TIMEOUT,
+            keys: List[str]=None,
+            use_cache: bool=True
             ) -> Dict[str, Dict[str, List[List[float]]]]:
-        """Retrieve the latitude and longitude data from an activity to be
-           used in the activity heatmap.
+        """Retrieve the latitude and longitude data (and further stream types)
+           from an activity to be used in the activity heatmap.
 
         Args:
             activity_id (str): ID of the activity
             request_timeout (int, optional): Default timeout parameter for
                                              requests.
                                              Defaults to REQUEST_TIMEOUT.
+            keys (List[str], optional): Stream types requested in the one request, e.g.
+                                        ["latlng", "time", "altitude", "heartrate"],
+                                        see STREAM_KEYS. Defaults to None (["latlng"]).
+            use_cache (bool, optional): Use the response cache of the client, False requests
+                                        the API and refreshes the cache. Defaults to True.
 
         Returns:
             Dict[str, Dict[str, List[List[float]]]]: activity stream dict
         """
-        # get the access token from the credentials and check if they are still valid
-        credentials = self.refresh_credentials(credentials=self.credentials)
-        access_token = credentials["access_token"]
+        response = self.__request_activity_stream(
+            activity_id=activity_id,
+            request_timeout=request_timeout,
+            keys=keys,
+            use_cache=use_cache
+            )
+        return response.json()
+
+
+    def __request_activity_stream(
+            self,
+            activity_id: str,
+            request_timeout: int,
+            keys: List[str]=None,
+            stream: bool=False,
+            use_cache: bool=True
+            ) -> requests.models.Response:
+        """Internal helper method - request the streams of an activity, with stream
+           the body is downloaded while it is read from the response."""
+        # check if the credentials are still valid and set the access token on the session
+        self.__authorize_session()
 
         url = f"{self.base_url}activities/{activity_id}/streams"
         params = {
-            "keys": "latlng",
+            "keys": ",".join(keys or ["latlng"]),
             "key_by_type": True
         }
-        headers = {"Authorization": f"Bearer {access_token}"}
-        response = requests.get(
+        response = self.__resilient_request(
+            method="GET",
             url=url,
             params=params,
-            headers=headers,
             timeout=request_timeout,
-            proxies=self.proxies,
-            verify=self.verify
+            stream=stream,
+            use_cache=use_cache
             )
-        self.__resilient_request(response=response)
         if response.status_code == 200:
             print(f"Data Request successfull for stream for id: {activity_id}")
-        return response.json()
+        return response
 
 
     def unpack_activity_stream(
@@ -512,6 +1171,65 @@ class StravaClient():
         stream_distance_latlon_dict = {key: stream_response.get(key).get("data") for key in stream_response.keys()}
         return stream_distance_latlon_dict
 
+
+    def get_activity_stream_arrays(
+            self,
+            activity_id: int,
+            keys: List[str]=STREAM_KEYS,
+            request_timeout: int=REQUEST_TIMEOUT,
+            json_decoder: str="incremental",
+            chunk_size: int=65536,
+            use_cache: bool=True
+            ) -> ActivityStream:
+        """Retrieve several stream types of an activity in one request and decode
+           them straight into contiguous typed NumPy arrays (float32/int32, the
+           coordinates as (n, 2) float64 array) instead of nested lists.
+
+           The default incremental decoder parses the response body chunk by chunk
+           while it is downloaded and never builds the Python object graph of the
+           JSON, which keeps the peak memory of long activities low.
+
+        Args:
+            activity_id (int): ID of the activity
+            keys (List[str], optional): Stream types to request. Defaults to STREAM_KEYS (all).
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            json_decoder (str, optional): "incremental" (chunk wise into arrays), "orjson"
+                                          (fast JSON backend, requires orjson) or "json"
+                                          (response.json()). Defaults to "incremental".
+            chunk_size (int, optional): Bytes per chunk of the incremental decoder. Defaults to 65536.
+            use_cache (bool, optional): Use the response cache of the client, False requests
+                                        the API and refreshes the cache. Defaults to True.
+
+        Returns:
+            ActivityStream: typed streams of the activity, usable like the unpacked stream dict
+        """
+        if json_decoder not in ["incremental", "orjson", "json"]:
+            raise ValueError('json_decoder is expected to be one of: ["incremental", "orjson", "json"]')
+        if json_decoder == "orjson" and orjson is None:
+            raise ImportError("The orjson decoder requires orjson, install it via: pip install strava_client[fast]")
+        response = self.__request_activity_stream(
+            activity_id=activity_id,
+            request_timeout=request_timeout,
+            keys=keys,
+            stream=json_decoder == "incremental",
+            use_cache=use_cache
+            )
+        if json_decoder == "incremental":
+            with response:
+                streams, activity_stream = decode_stream_response(chunks=response.iter_content(chunk_size=chunk_size))
+        elif json_decoder == "orjson":
+            activity_stream = orjson.loads(response.content)
+        else:
+            activity_stream = response.json()
+        # error responses of the API hold a message and a list of errors
+        if "errors" in activity_stream:
+            raise Exception(f"Stream request failed for activity id: {activity_id}: {activity_stream.get('message')}")
+        if json_decoder == "incremental":
+            return ActivityStream(streams=streams, activity_id=activity_id)
+        return ActivityStream.from_response(stream_response=activity_stream, activity_id=activity_id)
+
     ########### activity and file saving related methods ###########
     def save_activity_gpx(
             self,
@@ -524,7 +1242,7 @@ class StravaClient():
            for later use and plotting in the activity heatmap.
 
         Args:
-            stream (Dict[str, List[float]]): activity stream dict
+            stream (Dict[str, List[float]]): activity stream dict or ActivityStream
             activitiy_gpx_file_name (str, optional): File name of the gpx file.
                                                      Expected to be just the activity id
                                                      and the .gpx ending.
@@ -541,7 +1259,11 @@ class StravaClient():
         gpx_segment = gpxpy.gpx.GPXTrackSegment()
         gpx_track.segments.append(gpx_segment)
         if location_item_identifier in stream.keys():
-            for point in stream.get(location_item_identifier):
+            points = stream.get(location_item_identifier)
+            # typed streams hold the coordinates as (n, 2) array
+            if isinstance(points, np.ndarray):
+                points = points.tolist()
+            for point in points:
                 gpx_segment.points.append(gpxpy.gpx.GPXTrackPoint(point[0], point[1]))
 
             if (activitiy_gpx_file_name and activitiy_gpx_path) is not None:
@@ -563,7 +1285,7 @@ class StravaClient():
            for later use and plotting in the activity heatmap.
 
         Args:
-            stream (Dict[str, List[float]]): activity stream dict
+            stream (Dict[str, List[float]]): activity stream dict or ActivityStream
             activitiy_csv_file_name (str, optional): File name of the csv file.
                                                      Expected to be just the activity id
                                                      and the .csv ending.
@@ -587,6 +1309,74 @@ class StravaClient():
                 print(f"Activity csv file saved: {activity_csv_full_save_path}")
 
 
+    def __download_activity_stream(
+            self,
+            activity_id: int
+            ) -> ActivityStream:
+        """Internal helper method - request and decode the coordinate stream
+           of one activity.
+
+        Args:
+            activity_id (int): ID of the activity
+
+        Returns:
+            ActivityStream: typed streams of the activity
+        """
+        return self.get_activity_stream_arrays(
+            activity_id=activity_id,
+            keys=["latlng"]
+            )
+
+
+    def __save_activity_stream(
+            self,
+            activity_id: int,
+            activity_type: str,
+            stream: Dict[str, List[float]],
+            save_gpx_files: bool,
+            save_csv_files: bool,
+            save_coordinate_store: bool,
+            activitiy_gpx_path: str,
+            activitiy_csv_path: str,
+            location_item_identifier: str="latlng",
+            save_activity_store: bool=False
+            ) -> pd.DataFrame:
+        """Internal helper method - save the .gpx and/or the .csv file of
+           one downloaded activity stream, the points are saved to the activity
+           store right away so an interrupted download keeps its progress.
+
+        Returns:
+            pd.DataFrame: coordinates of the activity in the format of the coordinate
+                          store if save_coordinate_store is set, otherwise None
+        """
+        # save the latitude and longitude parameters as gpx file
+        if save_gpx_files:
+            self.save_activity_gpx(
+                stream=stream,
+                activitiy_gpx_file_name=f"{activity_id}.gpx",
+                activitiy_gpx_path=activitiy_gpx_path,
+                )
+        if save_csv_files:
+            self.save_activity_csv(
+                stream=stream,
+                activitiy_csv_file_name=f"{activity_id}.csv",
+                activitiy_csv_path=activitiy_csv_path
+                )
+        if save_coordinate_store or save_activity_store:
+            activity_coordinates_df = pd.DataFrame(
+                data=stream.get(location_item_identifier, []),
+                columns=["lat", "lon"]
+                )
+            activity_coordinates_df["activity_id"] = activity_id
+            activity_coordinates_df["activity_type"] = activity_type
+        if save_activity_store:
+            self.activity_store.save_points(activities_coordinates_df=activity_coordinates_df)
+        # the coordinates are collected and saved as one partition of the store
+        if save_coordinate_store:
+            return activity_coordinates_df
+        return None
+
+
     def save_not_existing_data(
         self,
         activities_df: pd.DataFrame,
@@ -595,41 +1385,106 @@ class StravaClient():
         save_csv_files: bool=True,
         activitiy_gpx_path: str=f"{CLIENT_CREDENTIAL_PATH}/activitiy_gpx",
         activitiy_csv_path: str=f"{CLIENT_CREDENTIAL_PATH}/activitiy_csv",
-        ):
+        max_workers: int=1,
+        save_coordinate_store: bool=False,
+        coordinate_store_path: str=f"{CLIENT_CREDENTIAL_PATH}/activity_coordinates",
+        save_activity_store: bool=False
+        ) -> Dict[int, str]:
         """First checking which activity ids are already present as files
            and which are still missing. Then loading and saving the .gpx 
            and/or the .csv files for the coordinates.
 
+           The streams are requested by a pool of max_workers threads while
+           a separate thread saves the files, so requests and file writes
+           overlap. All requests share the rate limiter of the client, so the
+           downloads wait for the next window instead of running into a 429.
+           A failing activity is reported and skipped without stopping the
+           other downloads. With save_coordinate_store the coordinates of all
+           downloaded activities are additionally appended as one partition
+           to the columnar coordinate store. With save_activity_store the
+           activities and their points are upserted into the activity store.
+
         Args:
-            activities_df (pd.DataFrame): _description_
-            ids_not_existing (List[int]): _description_
-            save_gpx_files (bool, optional): _description_. Defaults to True.
-            save_csv_files (bool, optional): _description_. Defaults to True.
-            activitiy_gpx_path (str, optional): _description_. Defaults to f"{CLIENT_CREDENTIAL_PATH}/activitiy_gpx".
-            activitiy_csv_path (str, optional): _description_. Defaults to f"{CLIENT_CREDENTIAL_PATH}/activitiy_csv".
+            activities_df (pd.DataFrame): activities overview
+            ids_not_existing (List[int]): activity ids that should be downloaded
+            save_gpx_files (bool, optional): Save the .gpx files. Defaults to True.
+            save_csv_files (bool, optional): Save the .csv files. Defaults to True.
+            activitiy_gpx_path (str, optional): Place where to save the .gpx files.
+                                                Defaults to f"{CLIENT_CREDENTIAL_PATH}/activitiy_gpx".
+            activitiy_csv_path (str, optional): Place where to save the .csv files.
+                                                Defaults to f"{CLIENT_CREDENTIAL_PATH}/activitiy_csv".
+            max_workers (int, optional): Number of concurrent stream requests. Defaults to 1.
+            save_coordinate_store (bool, optional): Append the coordinates to the coordinate store,
+                                                    requires pyarrow. Defaults to False.
+            coordinate_store_path (str, optional): Place of the coordinate store.
+                                                   Defaults to f"{CLIENT_CREDENTIAL_PATH}/activity_coordinates".
+            save_activity_store (bool, optional): Save the activities and their points in the activity store
+                                                  of the client. Defaults to False.
+
+        Returns:
+            Dict[int, str]: failed activity ids and their error messages
         """
         for path in [activitiy_gpx_path, activitiy_csv_path]:
             self.__check_path_existence(path=path)
 
         activities_df_to_load = activities_df.query("id.isin(@ids_not_existing)").reset_index(drop=True).copy()
-        for activity_id in activities_df_to_load["id"]:
-            activity_stream = strava_client.get_activity_stream(
-                activity_id=activity_id,
-            )
-            stream = self.unpack_activity_stream(stream_response=activity_stream)
-            # save the latitude and longitude parameters as gpx file
-            if save_gpx_files:
-                self.save_activity_gpx(
+        if save_activity_store:
+            self.__check_activity_store()
+            self.activity_store.upsert_activities(activities_df=activities_df_to_load)
+        activity_ids = activities_df_to_load["id"].tolist()
+        activity_types = dict(zip(activities_df_to_load["id"], activities_df_to_load["type"]))
+        failed_activity_ids = {}
+        activities_coordinates_dfs = []
+        with ThreadPoolExecutor(max_workers=max_workers) as download_executor, \
+            ThreadPoolExecutor(max_workers=1) as save_executor:
+            download_futures = {
+                download_executor.submit(
+                    self.__download_activity_stream,
+                    activity_id=activity_id
+                    ): activity_id
+                for activity_id in activity_ids
+                }
+            # hand every downloaded stream over to the saving thread
+            save_futures = {}
+            for number_downloaded, download_future in enumerate(as_completed(download_futures), start=1):
+                activity_id = download_futures[download_future]
+                print(f"Downloaded activities: {number_downloaded}/{len(activity_ids)}")
+                try:
+                    stream = download_future.result()
+                except Exception as e:
+                    failed_activity_ids[activity_id] = repr(e)
+                    print(f"Download failed for activity id: {activity_id}: {e!r}")
+                    continue
+                save_future = save_executor.submit(
+                    self.__save_activity_stream,
+                    activity_id=activity_id,
+                    activity_type=activity_types[activity_id],
                     stream=stream,
-                    activitiy_gpx_file_name=f"{activity_id}.gpx",
+                    save_gpx_files=save_gpx_files,
+                    save_csv_files=save_csv_files,
+                    save_coordinate_store=save_coordinate_store,
                     activitiy_gpx_path=activitiy_gpx_path,
+                    activitiy_csv_path=activitiy_csv_path,
+                    save_activity_store=save_activity_store
                     )
-            if save_csv_files:
-                self.save_activity_csv(
-                    stream=stream,
-                    activitiy_csv_file_name=f"{activity_id}.csv",
-                    activitiy_csv_path=activitiy_csv_path
-                    )
+                save_futures[save_future] = activity_id
+            for save_future in as_completed(save_futures):
+                activity_id = save_futures[save_future]
+                try:
+                    activity_coordinates_df = save_future.result()
+                except Exception as e:
+                    failed_activity_ids[activity_id] = repr(e)
+                    print(f"Saving failed for activity id: {activity_id}: {e!r}")
+                    continue
+                if activity_coordinates_df is not None:
+                    activities_coordinates_dfs.append(activity_coordinates_df)
+        if activities_coordinates_dfs:
+            self.save_coordinate_store(
+                activities_coordinates_df=pd.concat(activities_coordinates_dfs, ignore_index=True),
+                coordinate_store_path=coordinate_store_path
+                )
+        print(f"Saved activities: {len(activity_ids) - len(failed_activity_ids)}, failed activities: {len(failed_activity_ids)}")
+        return failed_activity_ids
 
 
     def get_long_format_stream_data(
@@ -655,7 +1510,38 @@ class StravaClient():
             self,
             existing_activity_ids: List[int],
             activitiy_gpx_path: str=f"{CLIENT_CREDENTIAL_PATH}/activitiy_gpx",
+            coordinate_store_path: str=None,
+            use_activity_store: bool=None
             ) -> List[int]:
+        """Activity ids whose coordinates are not saved yet, looked up in the activity
+           store, the coordinate store or the folder of the .gpx files.
+
+        Args:
+            existing_activity_ids (List[int]): activity ids of the activities overview
+            activitiy_gpx_path (str, optional): Place where the .gpx files are saved.
+                                                Defaults to f"{CLIENT_CREDENTIAL_PATH}/activitiy_gpx".
+            coordinate_store_path (str, optional): Place of the coordinate store. Defaults to None.
+            use_activity_store (bool, optional): Look up the points of the activity store.
+                                                 Defaults to None (if the client has an activity store
+                                                 and no coordinate_store_path is set).
+
+        Returns:
+            List[int]: activity ids without saved coordinates
+        """
+        if use_activity_store is None:
+            use_activity_store = self.activity_store is not None and coordinate_store_path is None
+        if use_activity_store:
+            self.__check_activity_store()
+            # only the index of the points is read, no file listing
+            existing_ids = set(self.activity_store.get_activity_ids(table="points"))
+            return [id for id in existing_activity_ids if id not in existing_ids]
+        if coordinate_store_path is not None:
+            # only the activity_id column of the store is read
+            existing_ids = set(self.load_data_from_coordinate_store(
+                coordinate_store_path=coordinate_store_path,
+                columns=["activity_id"]
+                )["activity_id"])
+            return [id for id in existing_activity_ids if id not in existing_ids]
         self.__check_path_existence(path=activitiy_gpx_path)
         existing_files = os.listdir(activitiy_gpx_path)
         existing_files = [file for file in existing_files if ".gpx" in file]
@@ -671,75 +1557,299 @@ class StravaClient():
         type_column_name: str="type",
         activitiy_gpx_path: str=f"{CLIENT_CREDENTIAL_PATH}/activitiy_gpx",
         ) -> pd.DataFrame:
+        """Load the coordinates of all saved .gpx files in the long format.
+           The points of all files are collected first and the DataFrame is
+           built once, the activity type and color are attached by a single
+           map over the activity ids.
+
+        Args:
+            activities_df (pd.DataFrame): activities overview
+            color_map (Dict[str, str], optional): Colors of the activity types.
+                                                  Defaults to COLOR_MAP.
+            type_column_name (str, optional): Column of the activity type in activities_df.
+                                              Defaults to "type".
+            activitiy_gpx_path (str, optional): Place where the .gpx files are saved.
+                                                Defaults to f"{CLIENT_CREDENTIAL_PATH}/activitiy_gpx".
+
+        Returns:
+            pd.DataFrame: coordinates in the long format
+        """
         self.__check_path_existence(path=activitiy_gpx_path)
         gpx_files = os.listdir(activitiy_gpx_path)
         gpx_files = [gpx_file for gpx_file in gpx_files if ".gpx" in gpx_file]
-        gpx_files_full_path = [f"{activitiy_gpx_path}/{gpx_file}" for gpx_file in gpx_files]
-        stream_data_long_format_df_ = pd.DataFrame()
 
-        for gpx_file_path in gpx_files_full_path:
-            activity_id = gpx_file_path.split("/")[-1].split(".")[0]
-            activity_id = int(activity_id)
-            with open(gpx_file_path, 'r', encoding="utf-8") as gpx_file:
+        activities_data, activity_ids, activity_lengths = [], [], []
+        for gpx_file_name in gpx_files:
+            with open(f"{activitiy_gpx_path}/{gpx_file_name}", 'r', encoding="utf-8") as gpx_file:
                 gpx = gpxpy.parse(gpx_file)
-
             activity_data = [(point.latitude, point.longitude)
                     for track in gpx.tracks
                     for segment in track.segments
                     for point in segment.points]
-            activity_df = pd.DataFrame(
-                activity_data,
-                columns=["lat", "lon"]
-                )
-            activity_df["activity_id"] = activity_id
-            activity_df["activity_type"] = activities_df.query("id == @activity_id")[type_column_name].values[0]
-            activity_df['color'] = activity_df['activity_type'].map(color_map)
-            stream_data_long_format_df_ = pd.concat([
-                stream_data_long_format_df_,
-                activity_df
-            ])
+            activities_data.extend(activity_data)
+            activity_ids.append(int(gpx_file_name.split(".")[0]))
+            activity_lengths.append(len(activity_data))
+
+        stream_data_long_format_df_ = pd.DataFrame(
+            activities_data,
+            columns=["lat", "lon"]
+            )
+        stream_data_long_format_df_["activity_id"] = np.repeat(np.array(activity_ids, dtype="int64"), activity_lengths)
+        activity_types = activities_df.drop_duplicates(subset=["id"]).set_index("id")[type_column_name]
+        stream_data_long_format_df_["activity_type"] = stream_data_long_format_df_["activity_id"].map(activity_types)
+        stream_data_long_format_df_['color'] = stream_data_long_format_df_['activity_type'].map(color_map)
         return stream_data_long_format_df_
 
 
+    def save_coordinate_store(
+        self,
+        activities_coordinates_df: pd.DataFrame,
+        coordinate_store_path: str=f"{CLIENT_CREDENTIAL_PATH}/activity_coordinates",
+        coordinate_store_dtypes: Dict[str, str]=COORDINATE_STORE_DTYPES
+        ):
+        """Append coordinates in the long format as a new partition (Parquet file)
+           to the columnar coordinate store, with float32 lat/lon, an int64
+           activity_id and a categorical activity_type. Also used to convert the
+           output of load_data_from_gpx_files once into the store.
+
+        Args:
+            activities_coordinates_df (pd.DataFrame): coordinates in the long format
+            coordinate_store_path (str, optional): Place of the coordinate store.
+                                                   Defaults to f"{CLIENT_CREDENTIAL_PATH}/activity_coordinates".
+            coordinate_store_dtypes (Dict[str, str], optional): Columns and dtypes of the store.
+                                                                Defaults to COORDINATE_STORE_DTYPES.
+        """
+        if pa is None:
+            raise ImportError("The coordinate store requires pyarrow, install it via: pip install strava_client[parquet]")
+        self.__check_path_existence(path=coordinate_store_path)
+        activities_coordinates_df = (
+            activities_coordinates_df
+            .filter(items=list(coordinate_store_dtypes.keys()))
+            .astype(coordinate_store_dtypes)
+            )
+        partition_full_save_path = f"{coordinate_store_path}/part-{dt.datetime.now().strftime('%Y%m%d%H%M%S%f')}.parquet"
+        pa.parquet.write_table(
+            pa.Table.from_pandas(activities_coordinates_df, preserve_index=False),
+            partition_full_save_path
+            )
+        print(f"Coordinates of {activities_coordinates_df['activity_id'].nunique()} activities saved at: {partition_full_save_path}")
+
+
+    def load_data_from_coordinate_store(
+        self,
+        color_map: Dict[str, str]=COLOR_MAP,
+        coordinate_store_path: str=f"{CLIENT_CREDENTIAL_PATH}/activity_coordinates",
+        columns: List[str]=None
+        ) -> pd.DataFrame:
+        """Load the coordinates of all partitions of the coordinate store in the
+           long format of load_data_from_gpx_files. The columns are read by Arrow
+           and handed over to pandas without a copy per partition.
+
+        Args:
+            color_map (Dict[str, str], optional): Colors of the activity types.
+                                                  Defaults to COLOR_MAP.
+            coordinate_store_path (str, optional): Place of the coordinate store.
+                                                   Defaults to f"{CLIENT_CREDENTIAL_PATH}/activity_coordinates".
+            columns (List[str], optional): Columns to read, the color is only added
+                                           together with the activity_type.
+                                           Defaults to None (all columns).
+
+        Returns:
+            pd.DataFrame: coordinates in the long format
+        """
+        if pa is None:
+            raise ImportError("The coordinate store requires pyarrow, install it via: pip install strava_client[parquet]")
+        self.__check_path_existence(path=coordinate_store_path)
+        if not any(file.endswith(".parquet") for file in os.listdir(coordinate_store_path)):
+            return pd.DataFrame(columns=columns or list(COORDINATE_STORE_DTYPES.keys()) + ["color"])
+        activities_coordinates_table = pa.dataset.dataset(coordinate_store_path, format="parquet").to_table(columns=columns)
+        activities_coordinates_df = activities_coordinates_table.to_pandas(split_blocks=True, self_destruct=True)
+        del activities_coordinates_table
+        if "activity_type" in activities_coordinates_df.columns:
+            activities_coordinates_df["color"] = activities_coordinates_df["activity_type"].map(color_map).astype(object)
+        return activities_coordinates_df
+
+
+    def load_data_from_activity_store(
+        self,
+        color_map: Dict[str, str]=COLOR_MAP,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None
+        ) -> pd.DataFrame:
+        """Load the coordinates of the activity store in the long format of
+           load_data_from_gpx_files, filtered by type and year via the indexes
+           of the store.
+
+        Args:
+            color_map (Dict[str, str], optional): Colors of the activity types.
+                                                  Defaults to COLOR_MAP.
+            activity_type (List[str], optional): Types of the loaded activities. Defaults to None.
+            activity_year (List[int], optional): Years of the loaded activities. Defaults to None.
+
+        Returns:
+            pd.DataFrame: coordinates in the long format
+        """
+        self.__check_activity_store()
+        return self.activity_store.load_points(
+            activity_type=activity_type,
+            activity_year=activity_year,
+            color_map=color_map
+            )
+
+
     def get_activity_splits(
             self,
         activity_type: str,
         activities_df: pd.DataFrame,
         base_url: str=BASE_URL,
         split_colnames_dict: Dict[str, List[str]]=SPLIT_COLNAMES_DICT,
-        request_timeout: int=REQUEST_TIMEOUT
+        request_timeout: int=REQUEST_TIMEOUT,
+        split_item: str="splits_metric",
+        max_workers: int=None,
+        use_cache: bool=True,
+        save_activity_store: bool=False,
+        return_failed_activity_ids: bool=False
         ) -> pd.DataFrame:
-        # get the access token from the credentials and check if they are still valid
-        credentials = self.refresh_credentials(credentials=self.credentials)
-        access_token = credentials["access_token"]
+        """Retrieve the splits (or laps, best efforts) of all activities of a type.
+           The details of the activities are requested concurrently by a pool of
+           max_workers threads that share the session and the rate limiter, the
+           records of all activities are collected and the DataFrame is built once.
+           A failing activity is reported and skipped without stopping the
+           requests of the other activities.
+
+        Args:
+            activity_type (str): Type of the activities, e.g. "Run" or "Ride"
+            activities_df (pd.DataFrame): activities overview
+            base_url (str, optional): Base endpoint of the Strava API. Defaults to BASE_URL.
+            split_colnames_dict (Dict[str, List[str]], optional): Columns of the splits_metric per activity type,
+                                                                  placed first, followed by all further items.
+                                                                  Defaults to SPLIT_COLNAMES_DICT.
+            request_timeout (int, optional): Default timeout parameter for
+                                             requests.
+                                             Defaults to REQUEST_TIMEOUT.
+            split_item (str, optional): Item of the detailed activity, one of SPLIT_ITEMS:
+                                        "splits_metric", "splits_standard", "laps" or "best_efforts".
+                                        Defaults to "splits_metric".
+            max_workers (int, optional): Number of concurrent requests.
+                                         Defaults to None (pool_maxsize of the client).
+            use_cache (bool, optional): Use the response cache of the client, False requests
+                                        the API and refreshes the cache. Defaults to True.
+            save_activity_store (bool, optional): Save the splits in the activity store of the client.
+                                                  Defaults to False.
+            return_failed_activity_ids (bool, optional): Additionally return the failed activity ids.
+                                                         Defaults to False.
+
+        Returns:
+            pd.DataFrame: one row per split of all activities of the type, with the activity
+                          id as id and its start date as date, with return_failed_activity_ids
+                          a tuple of it and the failed activity ids with their error messages
+        """
+        # check if the credentials are still valid and set the access token on the session
+        self.__authorize_session()
         # filter for the activity
         activity_type_df = activities_df[activities_df.type == activity_type]
+        col_names = self.__get_split_col_names(
+            activity_type=activity_type,
+            split_colnames_dict=split_colnames_dict,
+            split_item=split_item
+            )
+        activities_details = {}
+        failed_activity_ids = {}
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_maxsize) as executor:
+            details_futures = {
+                executor.submit(
+                    self.__request_activity_details,
+                    activity_id=activity_type_id,
+                    base_url=base_url,
+                    request_timeout=request_timeout,
+                    use_cache=use_cache
+                    ): activity_type_id
+                for activity_type_id in activity_type_df['id']
+                }
+            for details_future in as_completed(details_futures):
+                activity_id = details_futures[details_future]
+                try:
+                    activities_details[activity_id] = details_future.result()
+                except Exception as e:
+                    failed_activity_ids[activity_id] = repr(e)
+                    print(f"Request of the details failed for activity id: {activity_id}: {e!r}")
+        # the splits are kept in the order of the activities
+        activity_ids = [activity_id for activity_id in activity_type_df['id'] if activity_id in activities_details]
+        activity_type_splits_df = self.__create_splits_df(
+            activity_ids=activity_ids,
+            activities_details=[activities_details[activity_id] for activity_id in activity_ids],
+            col_names=col_names,
+            split_item=split_item
+            )
+        if failed_activity_ids:
+            print(f"Loaded splits of activities: {len(activity_ids)}, failed activities: {len(failed_activity_ids)}")
+        if save_activity_store:
+            self.__check_activity_store()
+            self.activity_store.save_splits(splits_df=activity_type_splits_df, split_item=split_item)
+        if return_failed_activity_ids:
+            return activity_type_splits_df, failed_activity_ids
+        return activity_type_splits_df
+
+
+    def __request_activity_details(
+            self,
+            activity_id: int,
+            base_url: str,
+            request_timeout: int,
+            use_cache: bool=True
+            ) -> Dict:
+        """Internal helper method - request the details of an activity, error
+           responses of the API raise an exception."""
+        activity_details = self.__resilient_request(
+            method="GET",
+            url=f"{base_url}activities/{activity_id}",
+            timeout=request_timeout,
+            use_cache=use_cache
+            ).json()
+        # error responses of the API hold a message and a list of errors
+        if "errors" in activity_details:
+            raise Exception(f"Details request failed for activity id: {activity_id}: {activity_details.get('message')}")
+        return activity_details
+
+
+    def __get_split_col_names(
+            self,
+            activity_type: str,
+            split_colnames_dict: Dict[str, List[str]],
+            split_item: str
+            ) -> List[str]:
+        """Internal helper method - configured columns of the split item, the
+           splits_metric of an activity type require a configuration."""
+        if split_item not in SPLIT_ITEMS:
+            raise ValueError(f"split_item is expected to be one of: {SPLIT_ITEMS}")
         col_names = split_colnames_dict.get(activity_type, None)
-        if col_names is not None:
-            activity_type_splits_df = pd.DataFrame(columns=col_names)
-        else:
-            raise KeyError(f"No defined split col names in config for activity type: {activity_type}")
-        # loop through each activity id and retrieve data
-        for activity_type_id in activity_type_df['id']:
-            # Load activity data
-            url = f"{base_url}activities/{activity_type_id}"
-            headers = {"Authorization": f"Bearer {access_token}"}
-            response = requests.get(
-                url=url,
-                headers=headers,
-                timeout=request_timeout,
-                proxies=self.proxies,
-                verify=self.verify
-                )
-            self.__resilient_request(response=response)
-            r = response.json()
-            # Extract Activity Splits
-            activity_splits = pd.DataFrame(r['splits_metric'])
-            activity_splits['id'] = activity_type_id
-            activity_splits['date'] = r['start_date']
-
-            # Add to total list of splits
-            activity_type_splits_df = pd.concat([activity_type_splits_df, activity_splits])
+        if col_names is None:
+            if split_item == "splits_metric":
+                raise KeyError(f"No defined split col names in config for activity type: {activity_type}")
+            col_names = []
+        return col_names
+
+
+    def __create_splits_df(
+            self,
+            activity_ids: List[int],
+            activities_details: List[Dict],
+            col_names: List[str],
+            split_item: str
+            ) -> pd.DataFrame:
+        """Internal helper method - collect the split item records of all activities
+           and build the DataFrame once. Laps and best efforts keep their own id as item_id."""
+        splits_records = []
+        for activity_id, activity_details in zip(activity_ids, activities_details):
+            for split in activity_details.get(split_item) or []:
+                if 'id' in split:
+                    split = {**split, 'item_id': split['id']}
+                splits_records.append({**split, 'id': activity_id, 'date': activity_details.get('start_date')})
+        # configured columns first, followed by all further split items
+        activity_type_splits_df = pd.DataFrame(splits_records)
+        activity_type_splits_df = activity_type_splits_df.reindex(
+            columns=col_names + [col for col in activity_type_splits_df.columns if col not in col_names]
+            )
         return activity_type_splits_df
 
 
@@ -750,61 +1860,57 @@ class StravaClient():
             activity_type: List[str]=None,
             activity_year: List[int]=None,
             activity_name: List[str]=None,
-            bounding_box: Dict[str, float]=None
+            bounding_box: Dict[str, float]=None,
+            activities_tracks: StravaActivitiesTracks=None,
+            bounding_box_mode: str="points"
             ) -> pd.DataFrame:
-        # Check whether the provided DataFrames are empty
-        if not activities_df.empty and not activities_coordinates_df.empty:
+        """Join the coordinates with the activities and filter them by type, year,
+           name and bounding box.
+
+        Args:
+            activities_df (pd.DataFrame): activities overview
+            activities_coordinates_df (pd.DataFrame): coordinates in the long format
+            activity_type (List[str], optional): Types of the kept activities. Defaults to None.
+            activity_year (List[int], optional): Years of the kept activities. Defaults to None.
+            activity_name (List[str], optional): Names of the kept activities. Defaults to None.
+            bounding_box (Dict[str, float], optional): Corners of the area of the kept coordinates. Defaults to None.
+            activities_tracks (StravaActivitiesTracks, optional): Coordinates already joined with the activities,
+                                                                  activities_df and activities_coordinates_df are then
+                                                                  not joined again. Defaults to None.
+            bounding_box_mode (str, optional): "points" keeps only the coordinates inside the bounding box,
+                                               "tracks" keeps all coordinates of the activities that pass
+                                               through the bounding box. Defaults to "points".
+
+        Returns:
+            pd.DataFrame: filtered coordinates joined with their activities, can be passed on
+                          to StravaActivitiesHeatmap.create_html as joined_coordinates_df
+        """
+        if activities_tracks is None:
+            # Check whether the provided DataFrames are empty
+            if activities_df.empty or activities_coordinates_df.empty:
+                return None
             expected_columns = [
                 'lat', 'lon', 'activity_id', 'activity_type', 'color', 'id', 'name',
                 'start_date_local', 'type', 'distance', 'moving_time', 'elapsed_time',
                 'total_elevation_gain', 'end_latlng', 'external_id'
             ]
-
             existing_columns = set(activities_df.columns) | set(activities_coordinates_df.columns)
-            all_needed_columns_present = set(expected_columns).issubset(existing_columns)
-            if all_needed_columns_present:
-                activities_coordinates_df = (
-                    activities_coordinates_df
-                    # Filter activities coordinates given the filtered activities
-                    .query(expr='activity_id.isin(@activities_df["id"])')
-                    # Select columns - select all present
-                    .filter(items=activities_coordinates_df.columns)
-                    # Left join 'activities_df'
-                    .merge(
-                        right=activities_df.filter(items=activities_df.columns),
-                        how='left',
-                        left_on=['activity_id'],
-                        right_on=["id"],
-                        indicator=False)
-                        )
-                # Filter activities by year(s)
-                activities_coordinates_df["start_date_local"] = pd.to_datetime(activities_coordinates_df["start_date_local"])
-                if activity_year is not None:
-                    activities_coordinates_df = activities_coordinates_df.query(expr='start_date_local.dt.year.isin(@activity_year)')
-                # Filter activities by name(s)
-                if activity_name is not None:
-                    activities_coordinates_df = activities_coordinates_df.query(expr='name.isin(@activity_name)')
-                # Filter activities by type(s)
-                if activity_type is not None:
-                    activities_coordinates_df = activities_coordinates_df.query(expr='type.isin(@activity_type)')
-
-                # Filter activities inside a bounding box
-                if all(value is not None for value in bounding_box.values()):
-                    activities_coordinates_df = activities_coordinates_df[
-                        activities_coordinates_df['lat'].between(
-                            min(bounding_box['latitude_bottom_left'], bounding_box['latitude_bottom_right']),
-                            max(bounding_box['latitude_top_left'], bounding_box['latitude_top_right']),
-                        )
-                    ]
-                    activities_coordinates_df = activities_coordinates_df[
-                        activities_coordinates_df['lon'].between(
-                            min(bounding_box['longitude_bottom_left'], bounding_box['longitude_top_left']),
-                            max(bounding_box['longitude_bottom_right'], bounding_box['longitude_top_right']),
-                        )
-                    ]
-
-                # Return objects
-                return activities_coordinates_df
+            if not set(expected_columns).issubset(existing_columns):
+                return None
+            activities_tracks = StravaActivitiesTracks(
+                activities_df=activities_df,
+                activities_coordinates_df=activities_coordinates_df
+            )
+        # Filter activities by year(s), name(s), type(s) and inside a bounding box
+        activities_coordinates_df = activities_tracks.filter(
+            activity_type=activity_type,
+            activity_year=activity_year,
+            activity_name=activity_name,
+            bounding_box=bounding_box,
+            bounding_box_mode=bounding_box_mode
+        )
+        # Return objects
+        return activities_coordinates_df
 
 
 # Test the class methods
@@ -0,0 +1,364 @@
+import os
+import sys
+import time
+import tempfile
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+import gpxpy
+import gpxpy.gpx
+import folium
+
+# Benchmark related variables
+RUN_BENCHMARK = False
+BENCHMARK_GET_STRAVA_ACTIVITIES = True
+BENCHMARK_LOAD_DATA_FROM_GPX_FILES = True
+BENCHMARK_CREATE_HTML = True
+BENCHMARK_ACTIVITIES_FILTER = True
+BENCHMARK_ACTIVITY_STORE = True
+N_ACTIVITIES = 10_000
+N_GPX_FILES = 5_000
+N_POINTS_PER_GPX_FILE = 200
+N_HEATMAP_ACTIVITIES = 2_000
+N_POINTS_PER_ACTIVITY = 200
+N_FILTER_ACTIVITIES = 10_000
+N_POINTS_PER_FILTER_ACTIVITY = 1_000
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(parent_dir)
+
+
+def create_activities_records(
+        n_activities: int,
+        seed: int=42
+        ) -> List[Dict]:
+    """Create synthetic records as returned by the /athlete/activities endpoint."""
+    rng = np.random.default_rng(seed)
+    activity_types = ["Run", "Ride", "Walk", "Swim"]
+    start_dates = pd.date_range(end="2025-03-01", periods=n_activities, freq="12h")
+    return [
+        {
+            "id": 10_000_000_000 + x,
+            "name": f"Activity {x}",
+            "start_date": start_dates[x].strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "start_date_local": start_dates[x].strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "type": activity_types[x % len(activity_types)],
+            "distance": float(rng.uniform(1_000, 50_000)),
+            "moving_time": int(rng.integers(600, 10_000)),
+            "elapsed_time": int(rng.integers(600, 12_000)),
+            "total_elevation_gain": float(rng.uniform(0, 500)),
+            "end_latlng": [54.3 + rng.uniform(-0.1, 0.1), 10.1 + rng.uniform(-0.1, 0.1)],
+            "external_id": f"{x}.fit",
+        }
+        for x in range(n_activities)
+    ]
+
+
+def create_activities_df_per_cell(
+        activities_records: List[Dict],
+        activities_colnames: List[str],
+        items_per_page: int=200
+        ) -> pd.DataFrame:
+    """Previous implementation of get_strava_activities: one .loc write per cell."""
+    activities_df = pd.DataFrame(columns=activities_colnames)
+    pages = [activities_records[x:x + items_per_page] for x in range(0, len(activities_records), items_per_page)]
+    for page, r in enumerate(pages, start=1):
+        for x in range(len(r)):
+            for col in activities_colnames:
+                activities_df.loc[x + (page-1)*items_per_page, col] = r[x][col]
+    return activities_df
+
+
+def create_gpx_files(
+        activities_records: List[Dict],
+        activitiy_gpx_path: str,
+        n_points: int,
+        seed: int=42
+        ):
+    """Save a synthetic .gpx file with n_points coordinates for every record."""
+    rng = np.random.default_rng(seed)
+    for record in activities_records:
+        gpx = gpxpy.gpx.GPX()
+        gpx_track = gpxpy.gpx.GPXTrack()
+        gpx.tracks.append(gpx_track)
+        gpx_segment = gpxpy.gpx.GPXTrackSegment()
+        gpx_track.segments.append(gpx_segment)
+        latlng = np.cumsum(rng.normal(0, 0.0001, size=(n_points, 2)), axis=0) + record["end_latlng"]
+        for lat, lon in latlng:
+            gpx_segment.points.append(gpxpy.gpx.GPXTrackPoint(lat, lon))
+        with open(f"{activitiy_gpx_path}/{record['id']}.gpx", "w") as f:
+            f.write(gpx.to_xml())
+
+
+def load_data_from_gpx_files_per_file(
+        activities_df: pd.DataFrame,
+        color_map: Dict[str, str],
+        activitiy_gpx_path: str,
+        type_column_name: str="type"
+        ) -> pd.DataFrame:
+    """Previous implementation of load_data_from_gpx_files: one query and one concat per file."""
+    gpx_files = [gpx_file for gpx_file in os.listdir(activitiy_gpx_path) if ".gpx" in gpx_file]
+    stream_data_long_format_df_ = pd.DataFrame()
+    for gpx_file in gpx_files:
+        activity_id = int(gpx_file.split(".")[0])
+        with open(f"{activitiy_gpx_path}/{gpx_file}", 'r', encoding="utf-8") as f:
+            gpx = gpxpy.parse(f)
+        activity_data = [(point.latitude, point.longitude)
+                for track in gpx.tracks
+                for segment in track.segments
+                for point in segment.points]
+        activity_df = pd.DataFrame(activity_data, columns=["lat", "lon"])
+        activity_df["activity_id"] = activity_id
+        activity_df["activity_type"] = activities_df.query("id == @activity_id")[type_column_name].values[0]
+        activity_df['color'] = activity_df['activity_type'].map(color_map)
+        stream_data_long_format_df_ = pd.concat([stream_data_long_format_df_, activity_df])
+    return stream_data_long_format_df_
+
+
+def create_activities_coordinates_df(
+        activities_records: List[Dict],
+        n_points: int,
+        seed: int=42
+        ) -> pd.DataFrame:
+    """Create synthetic coordinates in the long format with n_points per record."""
+    rng = np.random.default_rng(seed)
+    n_records = len(activities_records)
+    latlng = np.cumsum(rng.normal(0, 0.0001, size=(n_records, n_points, 2)), axis=1) \
+        + np.array([record["end_latlng"] for record in activities_records])[:, None, :]
+    return pd.DataFrame({
+        "lat": latlng[:, :, 0].ravel(),
+        "lon": latlng[:, :, 1].ravel(),
+        "activity_id": np.repeat([record["id"] for record in activities_records], n_points),
+        "activity_type": np.repeat([record["type"] for record in activities_records], n_points),
+        })
+
+
+def create_html_per_mask(
+        activities_df: pd.DataFrame,
+        activities_coordinates_df: pd.DataFrame,
+        activity_colors: Dict[str, str],
+        heatmap_center: List[float]
+        ) -> folium.Map:
+    """Previous create_html (save_html=False): merge of all coordinates, date parsing
+       and three boolean masks per activity."""
+    activities_df = activities_df[activities_df['end_latlng'].astype(str) != "[]"].reset_index(drop=True)
+    activities_df["start_date_local"] = pd.to_datetime(activities_df["start_date_local"])
+    activities_coordinates_df = (
+        activities_coordinates_df
+        .query(expr='activity_id.isin(@activities_df["id"])')
+        .merge(right=activities_df, how='left', left_on=['activity_id'], right_on=["id"])
+        )
+    activities_coordinates_df['coordinates'] = list(zip(activities_coordinates_df['lat'], activities_coordinates_df['lon']))
+    activities_folium_map_object = folium.Map(
+        tiles='https://a.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}@2x.png',
+        attr='tile',
+        location=heatmap_center,
+        zoom_start=13
+        )
+    folium.LayerControl().add_to(activities_folium_map_object)
+    for activity_type in activities_coordinates_df['activity_type'].unique():
+        df_activity_type = activities_coordinates_df[activities_coordinates_df['activity_type'] == activity_type]
+        for activity in df_activity_type['activity_id'].unique():
+            date = df_activity_type[df_activity_type['activity_id'] == activity]['start_date_local'].dt.date.iloc[0]
+            distance = round(df_activity_type[df_activity_type['activity_id'] == activity]['distance'].iloc[0] / 1000, 1)
+            coordinates = tuple(df_activity_type[df_activity_type['activity_id'] == activity]['coordinates'])
+            folium.PolyLine(
+                locations=coordinates,
+                color=activity_colors[activity_type],
+                weight=1.0,
+                opacity=0.6,
+                control=True,
+                name=activity_type,
+                popup=folium.Popup(
+                    html=f"Activity type: {activity_type}<br>Date: {date}<br>Distance: {distance} km<br><br>"
+                         f"<a href=https://www.strava.com/activities/{activity}>Open in Strava</a>",
+                    min_width=100,
+                    max_width=100,
+                    ),
+                tooltip=activity_type,
+                smooth_factor=1.0,
+                overlay=True,
+                ).add_to(activities_folium_map_object)
+    return activities_folium_map_object
+
+
+def activities_filter_per_call(
+        activities_df: pd.DataFrame,
+        activities_coordinates_df: pd.DataFrame,
+        activity_type: List[str],
+        activity_year: List[int]
+        ) -> pd.DataFrame:
+    """Previous activities_filter: join and date parsing of all coordinates per call."""
+    activities_coordinates_df = (
+        activities_coordinates_df
+        .query(expr='activity_id.isin(@activities_df["id"])')
+        .merge(right=activities_df, how='left', left_on=['activity_id'], right_on=["id"])
+        )
+    activities_coordinates_df["start_date_local"] = pd.to_datetime(activities_coordinates_df["start_date_local"])
+    activities_coordinates_df = activities_coordinates_df.query(expr='start_date_local.dt.year.isin(@activity_year)')
+    return activities_coordinates_df.query(expr='type.isin(@activity_type)')
+
+
+def time_function(
+        func,
+        **kwargs
+        ) -> float:
+    start_time = time.perf_counter()
+    func(**kwargs)
+    return time.perf_counter() - start_time
+
+
+if RUN_BENCHMARK:
+    from strava_client import StravaClient, ACTIVITIES_COLNAMES
+    strava_client_instance = StravaClient()
+
+    if BENCHMARK_GET_STRAVA_ACTIVITIES:
+        activities_records = create_activities_records(n_activities=N_ACTIVITIES)
+        bulk_seconds = time_function(
+            strava_client_instance.create_activities_df,
+            activities_records=activities_records
+            )
+        per_cell_seconds = time_function(
+            create_activities_df_per_cell,
+            activities_records=activities_records,
+            activities_colnames=ACTIVITIES_COLNAMES
+            )
+        print(f"get_strava_activities - {N_ACTIVITIES} activities")
+        print(f"per cell .loc writes: {per_cell_seconds:.3f}s")
+        print(f"bulk DataFrame build: {bulk_seconds:.3f}s")
+        print(f"speedup: {per_cell_seconds / bulk_seconds:.1f}x")
+
+    if BENCHMARK_LOAD_DATA_FROM_GPX_FILES:
+        from strava_client import COLOR_MAP
+        activities_records = create_activities_records(n_activities=N_GPX_FILES)
+        activities_df = strava_client_instance.create_activities_df(activities_records=activities_records)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            activitiy_gpx_path = f"{temp_dir}/activitiy_gpx"
+            os.mkdir(activitiy_gpx_path)
+            create_gpx_files(
+                activities_records=activities_records,
+                activitiy_gpx_path=activitiy_gpx_path,
+                n_points=N_POINTS_PER_GPX_FILE
+                )
+            single_pass_seconds = time_function(
+                strava_client_instance.load_data_from_gpx_files,
+                activities_df=activities_df,
+                activitiy_gpx_path=activitiy_gpx_path
+                )
+            per_file_seconds = time_function(
+                load_data_from_gpx_files_per_file,
+                activities_df=activities_df,
+                color_map=COLOR_MAP,
+                activitiy_gpx_path=activitiy_gpx_path
+                )
+        print(f"load_data_from_gpx_files - {N_GPX_FILES} files with {N_POINTS_PER_GPX_FILE} points")
+        print(f"per file query and concat: {per_file_seconds:.3f}s")
+        print(f"single pass concat and map: {single_pass_seconds:.3f}s")
+        print(f"speedup: {per_file_seconds / single_pass_seconds:.1f}x")
+
+    if BENCHMARK_CREATE_HTML:
+        from strava_client import COLOR_MAP
+        from util.ActivityHeatmap import StravaActivitiesHeatmap
+        activities_records = create_activities_records(n_activities=N_HEATMAP_ACTIVITIES)
+        activities_df = strava_client_instance.create_activities_df(activities_records=activities_records)
+        activities_coordinates_df = create_activities_coordinates_df(
+            activities_records=activities_records,
+            n_points=N_POINTS_PER_ACTIVITY
+            )
+        strava_activities_heatmap = StravaActivitiesHeatmap(
+            activities_df=activities_df,
+            activities_coordinates_df=activities_coordinates_df,
+            heatmap_filename="strava-activities-heatmap",
+            activity_colors=COLOR_MAP
+            )
+        # both timings run the full create_html including the join of the coordinates
+        # with the activities and the creation of the map, without saving the .html file
+        groupby_seconds = time_function(
+            strava_activities_heatmap.create_html,
+            heatmap_html_file_path=None,
+            heatmap_center=[54.3, 10.1],
+            save_html=False
+            )
+        per_mask_seconds = time_function(
+            create_html_per_mask,
+            activities_df=activities_df,
+            activities_coordinates_df=activities_coordinates_df,
+            activity_colors=COLOR_MAP,
+            heatmap_center=[54.3, 10.1]
+            )
+        print(f"create_html - {N_HEATMAP_ACTIVITIES} activities with {N_POINTS_PER_ACTIVITY} points")
+        print(f"merge and boolean masks per activity (full create_html): {per_mask_seconds:.3f}s")
+        print(f"track table and groupby (full create_html): {groupby_seconds:.3f}s")
+        print(f"speedup: {per_mask_seconds / groupby_seconds:.1f}x")
+
+    if BENCHMARK_ACTIVITIES_FILTER:
+        from util.ActivityTracks import StravaActivitiesTracks
+        activities_records = create_activities_records(n_activities=N_FILTER_ACTIVITIES)
+        activities_df = strava_client_instance.create_activities_df(activities_records=activities_records)
+        activities_coordinates_df = create_activities_coordinates_df(
+            activities_records=activities_records,
+            n_points=N_POINTS_PER_FILTER_ACTIVITY
+            )
+        filter_specs = [
+            {"activity_type": [activity_type], "activity_year": [activity_year]}
+            for activity_type in ["Run", "Ride"] for activity_year in [2022, 2023, 2024]
+            ]
+        per_call_seconds = sum(
+            time_function(
+                activities_filter_per_call,
+                activities_df=activities_df,
+                activities_coordinates_df=activities_coordinates_df,
+                **filter_spec
+                )
+            for filter_spec in filter_specs
+            )
+        start_time = time.perf_counter()
+        activities_tracks = StravaActivitiesTracks(
+            activities_df=activities_df,
+            activities_coordinates_df=activities_coordinates_df
+            )
+        for filter_spec in filter_specs:
+            activities_tracks.filter(**filter_spec)
+        shared_seconds = time.perf_counter() - start_time
+        print(f"activities_filter - {len(filter_specs)} filters of {N_FILTER_ACTIVITIES} activities with {N_POINTS_PER_FILTER_ACTIVITY} points")
+        print(f"join and date parsing per call: {per_call_seconds:.3f}s")
+        print(f"joined track table built once: {shared_seconds:.3f}s")
+        print(f"speedup: {per_call_seconds / shared_seconds:.1f}x")
+
+    if BENCHMARK_ACTIVITY_STORE:
+        activities_records = create_activities_records(n_activities=N_GPX_FILES)
+        activities_df = strava_client_instance.create_activities_df(activities_records=activities_records)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            activitiy_gpx_path = f"{temp_dir}/activitiy_gpx"
+            os.mkdir(activitiy_gpx_path)
+            create_gpx_files(
+                activities_records=activities_records,
+                activitiy_gpx_path=activitiy_gpx_path,
+                n_points=N_POINTS_PER_GPX_FILE
+                )
+            start_time = time.perf_counter()
+            strava_client_instance.get_nonexisting_activity_ids(
+                existing_activity_ids=activities_df["id"].tolist(),
+                activitiy_gpx_path=activitiy_gpx_path
+                )
+            strava_client_instance.load_data_from_gpx_files(
+                activities_df=activities_df,
+                activitiy_gpx_path=activitiy_gpx_path
+                )
+            files_seconds = time.perf_counter() - start_time
+            store_client_instance = StravaClient(activity_store_path=f"{temp_dir}/activity_store.sqlite")
+            store_client_instance.activity_store.upsert_activities(activities_df=activities_df)
+            store_client_instance.activity_store.save_points(
+                activities_coordinates_df=create_activities_coordinates_df(
+                    activities_records=activities_records,
+                    n_points=N_POINTS_PER_GPX_FILE
+                    )
+                )
+            start_time = time.perf_counter()
+            store_client_instance.get_nonexisting_activity_ids(existing_activity_ids=activities_df["id"].tolist())
+            store_client_instance.load_data_from_activity_store()
+            store_seconds = time.perf_counter() - start_time
+            store_client_instance.close()
+        print(f"activity store - {N_GPX_FILES} activities with {N_POINTS_PER_GPX_FILE} points")
+        print(f"listdir and .gpx files: {files_seconds:.3f}s")
+        print(f"indexed activity store: {store_seconds:.3f}s")
+        print(f"speedup: {files_seconds / store_seconds:.1f}x")
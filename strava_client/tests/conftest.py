@@ -0,0 +1,67 @@
+import sys
+import os
+import importlib
+import types
+import pytest
+# the modules import each other by their file names (strava_client, util, config)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# the module defaults (and the strava_client instance created on import) are read from the
+# config.py of the user, without one the shipped example_config.py provides them with no
+# credentials file, the clients of the tests get explicit settings anyway
+try:
+    import config
+except ImportError:
+    config = types.ModuleType("config")
+    config.__dict__.update(vars(importlib.import_module("example_config")))
+    config.CLIENT_CREDENTIAL_PATH = None
+    config.CLIENT_CREDENTIAL_FILE_NAME = None
+    sys.modules["config"] = config
+
+# settings of the clients under test instead of the config.py and credentials of the user
+STRAVA_CLIENT_KWARGS = {
+    "client_id": 123456,
+    "client_secret": "test-client-secret",
+    "base_url": "https://strava.test/api/v3/",
+    "error_codes_dict": {
+        400: {"message": "Error", "return_": None},
+        401: {"message": "Error", "return_": None}
+        },
+    "success_codes_dict": {
+        200: {"message": "URL succesfully retrived", "return_": "Success"}
+        },
+    "client_credential_path": None,
+    "client_credential_file_name": None,
+    "max_retries": 3,
+    "pool_maxsize": 10
+    }
+
+
+@pytest.fixture
+def strava_client_class():
+    """StravaClient class."""
+    from strava_client import StravaClient
+    return StravaClient
+
+
+@pytest.fixture
+def strava_client_factory(strava_client_class):
+    """Creates StravaClients with the test settings, keyword arguments override them."""
+    def create_strava_client(**kwargs):
+        return strava_client_class(**{**STRAVA_CLIENT_KWARGS, **kwargs})
+    return create_strava_client
+
+
+@pytest.fixture
+def async_strava_client_class():
+    """AsyncStravaClient class, requires the optional dependency httpx."""
+    pytest.importorskip("httpx")
+    from async_strava_client import AsyncStravaClient
+    return AsyncStravaClient
+
+
+@pytest.fixture
+def async_strava_client_factory(async_strava_client_class):
+    """Creates AsyncStravaClients with the test settings, keyword arguments override them."""
+    def create_async_strava_client(**kwargs):
+        return async_strava_client_class(**{**STRAVA_CLIENT_KWARGS, **kwargs})
+    return create_async_strava_client
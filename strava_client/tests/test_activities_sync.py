@@ -0,0 +1,125 @@
+import io
+import json
+import os
+import pytest
+import requests
+
+
+def get_activity_record(activity_id):
+    return {
+        "id": activity_id,
+        "name": f"Run {activity_id}",
+        "start_date": f"2024-06-{activity_id:02d}T06:00:00Z",
+        "start_date_local": f"2024-06-{activity_id:02d}T08:00:00Z",
+        "type": "Run",
+        "distance": 10_000.0,
+        "moving_time": 3_000,
+        "elapsed_time": 3_100,
+        "total_elevation_gain": 50.0,
+        "end_latlng": [48.1, 11.5],
+        "external_id": f"{activity_id}.fit"
+        }
+
+
+class ActivitiesSession(object):
+    """Session answering the pages of /athlete/activities, newest activities first,
+       with the status code of failed_pages for those pages."""
+    def __init__(self, activity_ids, items_per_page=2, failed_pages=None):
+        self.headers = {}
+        self.pages = [
+            [get_activity_record(activity_id=activity_id) for activity_id in activity_ids[x:x + items_per_page]]
+            for x in range(0, len(activity_ids), items_per_page)
+            ]
+        self.failed_pages = failed_pages or {}
+        self.requested_pages = []
+
+    def request(self, method, url, **kwargs):
+        page = int(kwargs["params"]["page"])
+        self.requested_pages.append(page)
+        response = requests.Response()
+        response.url = url
+        response.status_code = self.failed_pages.get(page, 200)
+        if response.status_code != 200:
+            response.raw = io.BytesIO(json.dumps({"message": "Error", "errors": []}).encode())
+        else:
+            response.raw = io.BytesIO(json.dumps(self.pages[page - 1] if page <= len(self.pages) else []).encode())
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def create_strava_client(strava_client_factory):
+    strava_clients = []
+
+    def create_strava_client(session, **kwargs):
+        strava_client = strava_client_factory(session=session, max_retries=0, **kwargs)
+        strava_client._StravaClient__authorize_session = lambda: None
+        strava_clients.append(strava_client)
+        return strava_client
+    yield create_strava_client
+    for strava_client in strava_clients:
+        strava_client.close()
+
+
+@pytest.mark.parametrize("status_code", [401, 500])
+@pytest.mark.parametrize("max_workers", [None, 2])
+def test_failed_page_does_not_overwrite_saved_activities(create_strava_client, tmp_path, status_code, max_workers):
+    activities_path = str(tmp_path)
+    strava_client = create_strava_client(session=ActivitiesSession(activity_ids=[6, 5, 4, 3, 2, 1]))
+    strava_client.sync_strava_activities(activities_file_name="activities.csv", activities_path=activities_path)
+    with open(os.path.join(activities_path, "activities.csv")) as csv_file:
+        saved_activities = csv_file.read()
+    with open(os.path.join(activities_path, "activities_sync_state.json")) as json_file:
+        sync_state = json.load(json_file)
+    failing_session = ActivitiesSession(activity_ids=[7, 6, 5, 4, 3, 2, 1], failed_pages={2: status_code})
+    strava_client = create_strava_client(session=failing_session)
+    with pytest.raises(Exception, match="page: 2"):
+        strava_client.sync_strava_activities(
+            activities_file_name="activities.csv",
+            activities_path=activities_path,
+            full_reconciliation=True,
+            max_workers=max_workers
+            )
+    # neither the saved activities nor the high-water mark are replaced by a partial listing
+    with open(os.path.join(activities_path, "activities.csv")) as csv_file:
+        assert csv_file.read() == saved_activities
+    with open(os.path.join(activities_path, "activities_sync_state.json")) as json_file:
+        assert json.load(json_file) == sync_state
+
+
+def test_failed_first_sync_saves_nothing(create_strava_client, tmp_path):
+    strava_client = create_strava_client(session=ActivitiesSession(activity_ids=[3, 2, 1], failed_pages={2: 500}))
+    with pytest.raises(Exception, match="page: 2"):
+        strava_client.sync_strava_activities(activities_file_name="activities.csv", activities_path=str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_get_strava_activities_reads_until_empty_page(create_strava_client):
+    session = ActivitiesSession(activity_ids=[5, 4, 3, 2, 1])
+    strava_client = create_strava_client(session=session)
+    activities_df = strava_client.get_strava_activities(items_per_page=2)
+    assert activities_df["id"].tolist() == [5, 4, 3, 2, 1]
+    assert session.requested_pages == [1, 2, 3, 4]
+    with pytest.raises(Exception, match="status code: 500"):
+        create_strava_client(session=ActivitiesSession(activity_ids=[5, 4, 3], failed_pages={2: 500})).get_strava_activities(items_per_page=2)
+
+
+@pytest.mark.parametrize("status_code", [401, 500])
+def test_failed_page_does_not_delete_stored_activities(create_strava_client, tmp_path, status_code):
+    activity_store_path = str(tmp_path / "activities.sqlite")
+    strava_client = create_strava_client(session=ActivitiesSession(activity_ids=[6, 5, 4, 3, 2, 1]), activity_store_path=activity_store_path)
+    strava_client.sync_activity_store()
+    strava_client.activity_store.set_sync_state(name="after", value="1717999200")
+    failing_session = ActivitiesSession(activity_ids=[7, 6, 5, 4, 3, 2, 1], failed_pages={2: status_code})
+    strava_client.session = failing_session
+    with pytest.raises(Exception, match="page: 2"):
+        strava_client.sync_activity_store(full_reconciliation=True)
+    # the activities missing from the partial listing are kept, nothing was upserted
+    assert sorted(strava_client.activity_store.get_activity_ids(table="activities")) == [1, 2, 3, 4, 5, 6]
+    assert strava_client.activity_store.get_sync_state(name="after") == "1717999200"
+    # a complete listing reconciles the store
+    strava_client.session = ActivitiesSession(activity_ids=[7, 6, 5, 4])
+    strava_client.sync_activity_store(full_reconciliation=True)
+    assert sorted(strava_client.activity_store.get_activity_ids(table="activities")) == [4, 5, 6, 7]
@@ -0,0 +1,233 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from util.ActivityHeatmap import StravaActivitiesHeatmap, EARTH_RADIUS_METERS
+
+
+def create_track(
+    rng: np.random.Generator,
+    n_points: int,
+    speed: float,
+    noise: float
+    ) -> pd.DataFrame:
+    """1 Hz track along straight roads joined by curves with GPS noise in meters."""
+    heading, direction = [], rng.uniform(0, 2 * np.pi)
+    while len(heading) < n_points:
+        heading += [direction] * int(rng.uniform(50, 400) / speed)
+        turn = rng.choice([-1, 1]) * rng.uniform(np.pi / 8, np.pi / 2)
+        steps = max(1, int(abs(turn) * rng.uniform(10, 60) / speed))
+        heading += list(direction + turn * np.arange(1, steps + 1) / steps)
+        direction += turn
+    heading = np.array(heading[:n_points])
+    x = np.cumsum(speed * np.cos(heading)) + rng.normal(0, noise, n_points)
+    y = np.cumsum(speed * np.sin(heading)) + rng.normal(0, noise, n_points)
+    return pd.DataFrame({
+        "lat": 48.1 + np.degrees(y / EARTH_RADIUS_METERS),
+        "lon": 11.5 + np.degrees(x / (EARTH_RADIUS_METERS * np.cos(np.radians(48.1))))
+        })
+
+
+@pytest.fixture
+def activities_coordinates_df():
+    rng = np.random.default_rng(0)
+    activities_coordinates_df = pd.concat([
+        create_track(rng=rng, n_points=1_500, speed=speed, noise=1.5).assign(activity_id=activity_id)
+        for activity_id, speed in enumerate([3.0, 7.0, 1.3, 7.0])
+        ], ignore_index=True)
+    # rows of the activities interleaved, the order inside an activity is kept
+    return activities_coordinates_df.iloc[rng.permutation(len(activities_coordinates_df))].sort_index(
+        key=lambda index: index % 1_500, kind="stable")
+
+
+@pytest.fixture
+def strava_activities_heatmap(activities_coordinates_df):
+    activities_df = pd.DataFrame({"id": range(4), "type": ["Run", "Ride", "Walk", "Ride"]})
+    return StravaActivitiesHeatmap(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df,
+        heatmap_filename="test"
+        )
+
+
+def get_segment_distance(
+    points: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray
+    ) -> np.ndarray:
+    """Distance of the points to the segments from start to end."""
+    segment, offset = end - start, points - start
+    length_squared = (segment ** 2).sum(axis=1)
+    t = np.divide((offset * segment).sum(axis=1), length_squared,
+                  out=np.zeros(len(points)), where=length_squared > 0).clip(0, 1)
+    return np.hypot(*(offset - t[:, None] * segment).T)
+
+
+@pytest.mark.parametrize("simplify_tolerance", [1.0, 5.0, 12.8])
+def test_simplification_stays_within_tolerance(strava_activities_heatmap, activities_coordinates_df, simplify_tolerance, capsys):
+    simplified_coordinates_df = strava_activities_heatmap.simplify_activities_coordinates(
+        activities_coordinates_df=activities_coordinates_df,
+        simplify_tolerance=simplify_tolerance
+        )
+    assert "Simplification" in capsys.readouterr().out
+    # the rows keep their order
+    assert simplified_coordinates_df.index.isin(activities_coordinates_df.index).all()
+    assert (activities_coordinates_df.index[activities_coordinates_df.index.isin(simplified_coordinates_df.index)]
+            == simplified_coordinates_df.index).all()
+    for activity_id, activity_df in activities_coordinates_df.groupby("activity_id", sort=False):
+        mean_lat = activity_df["lat"].mean()
+        points = np.column_stack([
+            np.radians(activity_df["lon"]) * EARTH_RADIUS_METERS * np.cos(np.radians(mean_lat)),
+            np.radians(activity_df["lat"]) * EARTH_RADIUS_METERS
+            ])
+        keep = activity_df.index.isin(simplified_coordinates_df.index)
+        # first and last point of every activity are kept
+        assert keep[0] and keep[-1]
+        # every removed point is within the tolerance of the segment between its kept neighbours
+        kept_index = np.flatnonzero(keep)
+        removed_index = np.flatnonzero(~keep)
+        segment = np.searchsorted(kept_index, removed_index) - 1
+        distance = get_segment_distance(
+            points=points[removed_index],
+            start=points[kept_index[segment]],
+            end=points[kept_index[segment + 1]]
+            )
+        assert (distance <= simplify_tolerance + 1e-6).all(), activity_id
+
+
+def test_simplification_reduction(strava_activities_heatmap, activities_coordinates_df):
+    simplified_coordinates_df = strava_activities_heatmap.simplify_activities_coordinates(
+        activities_coordinates_df=activities_coordinates_df,
+        simplify_tolerance=strava_activities_heatmap.get_zoom_tolerance(map_zoom=13, latitude=48.1)
+        )
+    # at the tolerance of one pixel at zoom 13 (~13 m) the noise of the tracks is removed as well
+    assert len(simplified_coordinates_df) * 10 < len(activities_coordinates_df)
+
+
+def test_simplification_short_activities(strava_activities_heatmap, activities_coordinates_df):
+    short_coordinates_df = activities_coordinates_df.groupby("activity_id").head(2)
+    simplified_coordinates_df = strava_activities_heatmap.simplify_activities_coordinates(
+        activities_coordinates_df=short_coordinates_df,
+        simplify_tolerance=5.0
+        )
+    pd.testing.assert_frame_equal(simplified_coordinates_df, short_coordinates_df)
+
+
+def test_render_png_blends_overlapping_lines():
+    # two activities on the same route and one on a parallel route
+    lat = np.linspace(48.10, 48.11, 50)
+    activities_coordinates_df = pd.DataFrame({
+        "lat": np.concatenate([lat, lat, lat]),
+        "lon": np.concatenate([np.full(50, 11.50), np.full(50, 11.50), np.full(50, 11.51)]),
+        "activity_id": np.repeat([1, 2, 3], 50),
+        "activity_type": "Run"
+        })
+    activities_df = pd.DataFrame({"id": [1, 2, 3], "type": "Run", "end_latlng": [[48.11, 11.5], [48.11, 11.5], [48.11, 11.51]]})
+    strava_activities_heatmap = StravaActivitiesHeatmap(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df,
+        heatmap_filename="test",
+        activity_colors={"Run": "#ff0000"}
+        )
+    activities_map_img = strava_activities_heatmap._StravaActivitiesHeatmap__render_png(
+        png_size=(200, 200),
+        line_width=1,
+        line_opacity=0.4,
+        background_color=(0, 0, 0),
+        basemap_tiles_path=None
+        )
+    red = np.asarray(activities_map_img)[:, :, 0]
+    double_route_red, single_route_red = red[100, :100].max(), red[100, 100:].max()
+    # one line at 40% opacity on black, two lines blended on top of each other
+    assert single_route_red == pytest.approx(0.4 * 255, abs=2)
+    assert double_route_red == pytest.approx((1 - 0.6 ** 2) * 255, abs=2)
+
+
+def test_create_png_rejects_unknown_render_engine(strava_activities_heatmap, tmp_path):
+    with pytest.raises(ValueError, match="pilow"):
+        strava_activities_heatmap.create_png(
+            heatmap_png_file_path=str(tmp_path),
+            png_size=(200, 200),
+            png_dpi=(300, 300),
+            font_path_statistics=None,
+            font_size_statistics=10,
+            text_color_statistics=(255, 255, 255),
+            render_engine="pilow"
+            )
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def statistics_heatmap():
+    activities_df = pd.DataFrame({
+        "id": [1, 2, 3],
+        "type": ["Run", "Ride", "Run"],
+        "distance": [10_000.0, 50_000.0, 5_000.0],
+        "moving_time": [3_600, 7_200, 1_800],
+        "total_elevation_gain": [100.0, 500.0, 50.0],
+        "start_date_local": ["2024-05-01T08:00:00Z", "2024-06-01T08:00:00Z", "2025-01-01T08:00:00Z"]
+        })
+    activities_coordinates_df = pd.DataFrame({"lat": [48.1], "lon": [11.5], "activity_id": [1]})
+    return StravaActivitiesHeatmap(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df,
+        heatmap_filename="test"
+        )
+
+
+def test_activities_statistics(statistics_heatmap):
+    activities_statistics = statistics_heatmap.get_activities_statistics()
+    # moving_time of the Strava API is in seconds
+    assert activities_statistics["total_moving_time"] == timedelta(hours=3, minutes=30)
+    assert activities_statistics["by_type"].loc["Run", "moving_time"] == 5_400
+    assert activities_statistics["by_year"].loc[2024, "moving_time"] == 10_800
+    assert activities_statistics["by_month"].loc[(2025, 1), "moving_time"] == 1_800
+    assert activities_statistics["total_activities"] == 3
+    assert activities_statistics["total_distance"] == 65.0
+    assert activities_statistics["longest_activity"] == 50.0
+    assert activities_statistics["longest_activity_date"] == "Jun 2024"
+
+
+def test_activities_statistics_keep_activities_without_type_or_date():
+    activities_df = pd.DataFrame({
+        "id": [1, 2, 2, 3],
+        "type": ["Run", None, None, "Run"],
+        "distance": [10_000.0, 5_000.0, 5_000.0, 1_000.0],
+        "moving_time": [3_600, 1_800, 1_800, 600],
+        "total_elevation_gain": [100.0, 50.0, 50.0, 10.0],
+        "start_date_local": ["2024-05-01T08:00:00Z", "2024-06-01T08:00:00Z", "2024-06-01T08:00:00Z", None]
+        })
+    activities_statistics = StravaActivitiesHeatmap(
+        activities_df=activities_df,
+        activities_coordinates_df=pd.DataFrame({"lat": [48.1], "lon": [11.5], "activity_id": [1]}),
+        heatmap_filename="test"
+        ).get_activities_statistics()
+    # the totals match the activities_df, a duplicated id is one activity
+    assert activities_statistics["total_activities"] == 3
+    assert activities_statistics["total_distance"] == 21.0
+    assert activities_statistics["total_moving_time"] == timedelta(hours=2, minutes=10)
+    assert activities_statistics["by_type"]["distance"].sum() == 21_000.0
+    assert activities_statistics["by_year"]["moving_time"].sum() == 7_800
+
+
+def test_activities_statistics_cache(statistics_heatmap):
+    activities_statistics = statistics_heatmap.get_activities_statistics()
+    assert statistics_heatmap.get_activities_statistics() is activities_statistics
+    # a new activities_df is picked up
+    statistics_heatmap.activities_df = statistics_heatmap.activities_df.iloc[:2]
+    assert statistics_heatmap.get_activities_statistics()["total_activities"] == 2
+    # an in place change needs use_cache=False
+    statistics_heatmap.activities_df.loc[0, "moving_time"] = 0
+    assert statistics_heatmap.get_activities_statistics()["total_moving_time"] == timedelta(hours=3)
+    assert statistics_heatmap.get_activities_statistics(use_cache=False)["total_moving_time"] == timedelta(hours=2)
+
+
+@pytest.mark.parametrize("variant_argument", ["heatmap_html_filename", "joined_coordinates_df"])
+def test_create_html_batch_rejects_variant_arguments(strava_activities_heatmap, tmp_path, variant_argument):
+    with pytest.raises(ValueError, match=variant_argument):
+        strava_activities_heatmap.create_html_batch(
+            heatmap_html_file_path=str(tmp_path),
+            filter_specs=[{"name": "runs", "activity_type": ["Run"]}],
+            **{variant_argument: None}
+            )
+    assert list(tmp_path.iterdir()) == []
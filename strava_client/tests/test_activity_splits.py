@@ -0,0 +1,131 @@
+import asyncio
+import io
+import json
+import pandas as pd
+import pytest
+import requests
+
+ACTIVITIES_DF = pd.DataFrame({"id": [1, 2, 3, 4], "type": ["Run", "Run", "Ride", "Run"]})
+SPLIT_COLNAMES_DICT = {"Run": ["split", "distance", "id"]}
+
+
+def get_activity_details(
+    activity_id: int
+    ) -> tuple:
+    """Status code and body of the detailed activity, activity 2 does not exist."""
+    if activity_id == 2:
+        return 404, {"message": "Record Not Found", "errors": [{"resource": "Activity", "field": "id", "code": "not found"}]}
+    return 200, {"id": activity_id, "start_date": "2024-05-01T08:00:00Z",
+                 "splits_metric": [{"split": 1, "distance": 1000.0}, {"split": 2, "distance": 500.0}]}
+
+
+class ActivityDetailsSession(object):
+    """Session answering the activity details requests, activity 4 fails with a connection error."""
+    def __init__(self):
+        self.headers = {}
+
+    def request(self, method, url, **kwargs):
+        activity_id = int(url.rsplit("/", 1)[-1])
+        if activity_id == 4:
+            raise requests.exceptions.ConnectionError("connection reset")
+        status_code, body = get_activity_details(activity_id=activity_id)
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = url
+        response.raw = io.BytesIO(json.dumps(body).encode())
+        return response
+
+    def close(self):
+        pass
+
+
+def test_get_activity_splits_skips_failed_activities(strava_client_factory):
+    strava_client = strava_client_factory(session=ActivityDetailsSession())
+    strava_client._StravaClient__authorize_session = lambda: None
+    activity_splits_df, failed_activity_ids = strava_client.get_activity_splits(
+        activity_type="Run",
+        activities_df=ACTIVITIES_DF,
+        base_url="https://strava.test/api/v3/",
+        split_colnames_dict=SPLIT_COLNAMES_DICT,
+        return_failed_activity_ids=True
+        )
+    assert activity_splits_df["id"].tolist() == [1, 1]
+    assert activity_splits_df["distance"].tolist() == [1000.0, 500.0]
+    assert sorted(failed_activity_ids) == [2, 4]
+    assert "Record Not Found" in failed_activity_ids[2]
+    assert "ConnectionError" in failed_activity_ids[4]
+    # without return_failed_activity_ids only the splits are returned
+    activity_splits_df = strava_client.get_activity_splits(
+        activity_type="Run",
+        activities_df=ACTIVITIES_DF,
+        base_url="https://strava.test/api/v3/",
+        split_colnames_dict=SPLIT_COLNAMES_DICT
+        )
+    assert isinstance(activity_splits_df, pd.DataFrame)
+
+
+def test_aget_activity_splits_skips_failed_activities(async_strava_client_factory):
+    httpx = pytest.importorskip("httpx")
+
+    def get_response(request):
+        activity_id = int(request.url.path.rsplit("/", 1)[-1])
+        if activity_id == 4:
+            raise httpx.ConnectError("connection reset", request=request)
+        status_code, body = get_activity_details(activity_id=activity_id)
+        return httpx.Response(status_code, json=body)
+
+    async def get_activity_splits():
+        async_strava_client = async_strava_client_factory()
+        async_strava_client.async_session = httpx.AsyncClient(transport=httpx.MockTransport(get_response))
+
+        async def authorize_session():
+            pass
+        async_strava_client._AsyncStravaClient__authorize_session = authorize_session
+        async with async_strava_client:
+            return await async_strava_client.aget_activity_splits(
+                activity_type="Run",
+                activities_df=ACTIVITIES_DF,
+                base_url="https://strava.test/api/v3/",
+                split_colnames_dict=SPLIT_COLNAMES_DICT,
+                return_failed_activity_ids=True
+                )
+
+    activity_splits_df, failed_activity_ids = asyncio.run(get_activity_splits())
+    assert activity_splits_df["id"].tolist() == [1, 1]
+    assert sorted(failed_activity_ids) == [2, 4]
+
+
+def test_aget_activity_splits_bounds_concurrent_requests(async_strava_client_factory):
+    httpx = pytest.importorskip("httpx")
+    activities_df = pd.DataFrame({"id": range(1, 21), "type": "Run"}).query("id != 2")
+    running_requests = []
+    max_running_requests = []
+
+    async def get_response(request):
+        running_requests.append(1)
+        max_running_requests.append(len(running_requests))
+        await asyncio.sleep(0.001)
+        running_requests.pop()
+        status_code, body = get_activity_details(activity_id=int(request.url.path.rsplit("/", 1)[-1]))
+        return httpx.Response(status_code, json=body)
+
+    async def get_activity_splits():
+        async_strava_client = async_strava_client_factory(pool_maxsize=10)
+        async_strava_client.async_session = httpx.AsyncClient(transport=httpx.MockTransport(get_response))
+
+        async def authorize_session():
+            pass
+        async_strava_client._AsyncStravaClient__authorize_session = authorize_session
+        async with async_strava_client:
+            return await async_strava_client.aget_activity_splits(
+                activity_type="Run",
+                activities_df=activities_df,
+                base_url="https://strava.test/api/v3/",
+                split_colnames_dict=SPLIT_COLNAMES_DICT,
+                max_workers=3
+                )
+
+    activity_splits_df = asyncio.run(get_activity_splits())
+    assert max(max_running_requests) == 3
+    # the splits keep the order of the activities
+    assert activity_splits_df["id"].drop_duplicates().tolist() == activities_df["id"].tolist()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+from util.ActivityStore import StravaActivityStore, ACTIVITY_STORE_COLUMNS, ACTIVITY_STORE_DTYPES
+
+
+@pytest.fixture
+def activity_store(tmp_path):
+    activity_store = StravaActivityStore(store_path=str(tmp_path / "store" / "activities.sqlite"))
+    yield activity_store
+    activity_store.close()
+
+
+@pytest.fixture
+def activities_df():
+    """Activities overview in the format of StravaClient.create_activities_df."""
+    return pd.DataFrame({
+        "id": np.array([10_000_000_001, 10_000_000_002, 10_000_000_003], dtype="int64"),
+        "name": ["Morning Run", "Evening Ride", "Treadmill"],
+        "start_date_local": pd.to_datetime(["2023-05-01T08:00:00Z", "2024-06-01T18:00:00Z", "2024-07-01T18:00:00Z"], utc=True),
+        "type": ["Run", "Ride", "Run"],
+        "distance": [10_000.5, 40_000.0, 5_000.0],
+        "moving_time": np.array([3_000, 5_000, 1_500], dtype="int64"),
+        "elapsed_time": np.array([3_100, 5_500, 1_600], dtype="int64"),
+        "total_elevation_gain": [50.0, 300.0, 0.0],
+        "end_latlng": [[48.11, 11.51], [48.2, 11.6], []],
+        "external_id": ["1.fit", "2.fit", None],
+        })
+
+
+def test_upsert_and_load_activities(activity_store, activities_df):
+    assert activity_store.upsert_activities(activities_df=activities_df) == 3
+    loaded_activities_df = activity_store.load_activities()
+    # newest activities first, the columns and dtypes of the activities overview
+    expected_activities_df = activities_df.iloc[::-1].reset_index(drop=True)
+    assert list(loaded_activities_df.columns) == list(ACTIVITY_STORE_COLUMNS)
+    for column, dtype in ACTIVITY_STORE_DTYPES.items():
+        assert loaded_activities_df[column].dtype == dtype, column
+    assert isinstance(loaded_activities_df["start_date_local"].dtype, pd.DatetimeTZDtype)
+    pd.testing.assert_frame_equal(loaded_activities_df, expected_activities_df, check_dtype=False)
+    # an activity with a stored id is updated instead of inserted again
+    activities_df.loc[0, "name"] = "Renamed Run"
+    activity_store.upsert_activities(activities_df=activities_df.iloc[[0]])
+    loaded_activities_df = activity_store.load_activities()
+    assert len(loaded_activities_df) == 3
+    assert loaded_activities_df.set_index("id").at[10_000_000_001, "name"] == "Renamed Run"
+
+
+def test_load_activities_filters(activity_store, activities_df):
+    activity_store.upsert_activities(activities_df=activities_df)
+    assert activity_store.load_activities(activity_type=["Run"])["id"].tolist() == [10_000_000_003, 10_000_000_001]
+    assert activity_store.load_activities(activity_year=[2024])["id"].tolist() == [10_000_000_003, 10_000_000_002]
+    assert activity_store.load_activities(activity_type=["Run"], activity_year=[2023, 2025])["id"].tolist() == [10_000_000_001]
+    assert activity_store.load_activities(activity_name=["Evening Ride"])["id"].tolist() == [10_000_000_002]
+    assert activity_store.load_activities(activity_ids=[10_000_000_002, 1])["id"].tolist() == [10_000_000_002]
+
+
+def test_points_round_trip(activity_store, activities_df):
+    activity_store.upsert_activities(activities_df=activities_df)
+    activities_coordinates_df = pd.DataFrame({
+        "lat": [48.100000001, 48.2, 48.3, 47.1, 47.2],
+        "lon": [11.5, -11.6, 11.7, 12.1, 12.2],
+        "activity_id": [10_000_000_002, 10_000_000_002, 10_000_000_002, 10_000_000_001, 10_000_000_001]
+        })
+    assert activity_store.save_points(activities_coordinates_df=activities_coordinates_df) == 2
+    loaded_coordinates_df = activity_store.load_points(color_map={"Run": "#ff0000", "Ride": "#0000ff"})
+    assert loaded_coordinates_df["lat"].dtype == "float64"
+    assert loaded_coordinates_df["lon"].dtype == "float64"
+    assert loaded_coordinates_df["activity_id"].dtype == "int64"
+    assert isinstance(loaded_coordinates_df["activity_type"].dtype, pd.CategoricalDtype)
+    # points of an activity in track order, the activities by their id, coordinates lossless
+    expected_coordinates_df = activities_coordinates_df.iloc[[3, 4, 0, 1, 2]].reset_index(drop=True)
+    pd.testing.assert_frame_equal(loaded_coordinates_df[["lat", "lon", "activity_id"]], expected_coordinates_df)
+    assert loaded_coordinates_df["activity_type"].tolist() == ["Run", "Run", "Ride", "Ride", "Ride"]
+    assert loaded_coordinates_df["color"].tolist() == ["#ff0000"] * 2 + ["#0000ff"] * 3
+    assert len(activity_store.load_points(activity_type=["Ride"])) == 3
+    # saving the points of an activity again replaces them
+    activity_store.save_points(activities_coordinates_df=activities_coordinates_df.iloc[[0]])
+    assert len(activity_store.load_points(activity_ids=[10_000_000_002])) == 1
+    assert sorted(activity_store.get_activity_ids(table="points")) == [10_000_000_001, 10_000_000_002]
+
+
+def test_delete_activities(activity_store, activities_df):
+    activity_store.upsert_activities(activities_df=activities_df)
+    activity_store.save_points(activities_coordinates_df=pd.DataFrame({
+        "lat": [48.1, 47.1], "lon": [11.5, 12.1], "activity_id": [10_000_000_001, 10_000_000_002]
+        }))
+    activity_store.save_splits(
+        splits_df=pd.DataFrame({"split": [1, 1], "distance": [1000.0, 1000.0], "id": [10_000_000_001, 10_000_000_002]}),
+        split_item="splits_metric"
+        )
+    activity_store.delete_activities(activity_ids=[10_000_000_001])
+    for table in ["activities", "points", "splits"]:
+        assert 10_000_000_001 not in activity_store.get_activity_ids(table=table), table
+    assert activity_store.load_splits()["id"].tolist() == [10_000_000_002]
+    with pytest.raises(ValueError):
+        activity_store.get_activity_ids(table="unknown")
+
+
+def test_sync_state(activity_store, tmp_path):
+    assert activity_store.get_sync_state(name="activities_after") is None
+    activity_store.set_sync_state(name="activities_after", value="1718427600")
+    activity_store.set_sync_state(name="activities_after", value="1718431200")
+    assert activity_store.get_sync_state(name="activities_after") == "1718431200"
+    # the state persists in the file
+    activity_store.close()
+    reopened_activity_store = StravaActivityStore(store_path=str(tmp_path / "store" / "activities.sqlite"))
+    assert reopened_activity_store.get_sync_state(name="activities_after") == "1718431200"
+    reopened_activity_store.close()
@@ -0,0 +1,71 @@
+import json
+import numpy as np
+import pytest
+from util.ActivityStream import ActivityStream, StreamResponseDecoder, decode_stream_response
+
+# stream responses requested with key_by_type
+STREAM_RESPONSES = {
+    "all_types": {
+        "latlng": {"data": [[48.137154, 11.576124], [48.1372, -11.5762], [-48.13725, 11.57629]], "series_type": "distance",
+                   "original_size": 3, "resolution": "high"},
+        "time": {"data": [0, 1, 2], "series_type": "distance", "original_size": 3, "resolution": "high"},
+        "distance": {"data": [0.0, 3.52, 1e3], "series_type": "distance", "original_size": 3, "resolution": "high"},
+        "moving": {"data": [False, True, True], "series_type": "distance", "original_size": 3, "resolution": "high"},
+        "grade_smooth": {"data": [-1.5, 0, 2.25], "series_type": "distance", "original_size": 3, "resolution": "high"},
+    },
+    # sensor dropouts in an integer and a float stream
+    "null_values": {
+        "heartrate": {"data": [120, None, 125], "series_type": "time", "original_size": 3, "resolution": "high"},
+        "altitude": {"data": [None, 512.5, 513.0], "series_type": "time", "original_size": 3, "resolution": "high"},
+    },
+    "empty_arrays": {
+        "latlng": {"data": [], "series_type": "distance", "original_size": 0, "resolution": "high"},
+        "distance": {"data": [], "series_type": "distance", "original_size": 0, "resolution": "high"},
+        "cadence": {"data": [80], "series_type": "distance", "original_size": 1, "resolution": "high"},
+    },
+    "error": {"message": "Record Not Found", "errors": [{"resource": "Activity", "field": "id", "code": "invalid"}]},
+}
+
+
+def assert_decoded(
+    stream_response: dict,
+    streams: dict,
+    metadata: dict
+    ):
+    """The decoded arrays equal ActivityStream.from_response, the metadata the response without the data."""
+    if "errors" in stream_response:
+        assert streams == {} and metadata == stream_response
+        return
+    expected_activity_stream = ActivityStream.from_response(stream_response=stream_response)
+    assert list(streams) == list(expected_activity_stream)
+    for key, values in expected_activity_stream.items():
+        assert streams[key].dtype == values.dtype, key
+        assert streams[key].shape == values.shape, key
+        np.testing.assert_array_equal(streams[key], values)
+    assert metadata == {key: {**value, "data": []} for key, value in stream_response.items()}
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")], ids=["compact", "spaced"])
+@pytest.mark.parametrize("response_name", list(STREAM_RESPONSES))
+def test_decoder_every_split_offset(response_name, separators):
+    stream_response = STREAM_RESPONSES[response_name]
+    body = json.dumps(stream_response, separators=separators).encode()
+    for offset in range(len(body) + 1):
+        streams, metadata = decode_stream_response(chunks=[body[:offset], body[offset:]])
+        assert_decoded(stream_response=stream_response, streams=streams, metadata=metadata)
+
+
+@pytest.mark.parametrize("response_name", list(STREAM_RESPONSES))
+def test_decoder_single_bytes(response_name):
+    stream_response = STREAM_RESPONSES[response_name]
+    body = json.dumps(stream_response, indent=2).encode()
+    streams, metadata = decode_stream_response(chunks=(body[x:x + 1] for x in range(len(body))))
+    assert_decoded(stream_response=stream_response, streams=streams, metadata=metadata)
+
+
+def test_decoder_truncated_body():
+    body = json.dumps(STREAM_RESPONSES["all_types"]).encode()
+    stream_response_decoder = StreamResponseDecoder()
+    stream_response_decoder.feed(chunk=body[:body.index(b"11.576124")])
+    with pytest.raises(ValueError):
+        stream_response_decoder.close()
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+from util.ActivityTracks import StravaActivitiesTracks
+from util.ActivityHeatmap import StravaActivitiesHeatmap
+
+# records as returned by the /athlete/activities endpoint, the manual activity has no coordinates
+ACTIVITIES_RECORDS = [
+    {"id": 1, "name": "Morning Run", "start_date": "2023-05-01T06:00:00Z", "start_date_local": "2023-05-01T08:00:00Z",
+     "type": "Run", "distance": 10_000.0, "moving_time": 3_000, "elapsed_time": 3_100, "total_elevation_gain": 50.0,
+     "end_latlng": [48.11, 11.51], "external_id": "1.fit"},
+    {"id": 2, "name": "Evening Ride", "start_date": "2024-06-01T16:00:00Z", "start_date_local": "2024-06-01T18:00:00Z",
+     "type": "Ride", "distance": 40_000.0, "moving_time": 5_000, "elapsed_time": 5_500, "total_elevation_gain": 300.0,
+     "end_latlng": [48.2, 11.6], "external_id": "2.fit"},
+    {"id": 3, "name": "Treadmill", "start_date": "2024-07-01T16:00:00Z", "start_date_local": "2024-07-01T18:00:00Z",
+     "type": "Run", "distance": 5_000.0, "moving_time": 1_500, "elapsed_time": 1_600, "total_elevation_gain": 0.0,
+     "end_latlng": [], "external_id": None},
+    ]
+
+
+@pytest.fixture
+def activities_coordinates_df():
+    return pd.DataFrame({
+        "lat": np.concatenate([np.linspace(48.10, 48.11, 20), np.linspace(48.10, 48.20, 30)]),
+        "lon": np.concatenate([np.linspace(11.50, 11.51, 20), np.linspace(11.50, 11.60, 30)]),
+        "activity_id": np.repeat([1, 2], [20, 30]),
+        "activity_type": np.repeat(["Run", "Ride"], [20, 30]),
+        "color": np.repeat(["#ff0000", "#0000ff"], [20, 30])
+        })
+
+
+@pytest.fixture
+def activities_df(strava_client_class):
+    strava_client = strava_client_class.__new__(strava_client_class)
+    return strava_client.create_activities_df(activities_records=ACTIVITIES_RECORDS)
+
+
+def test_tracks_from_create_activities_df(activities_df, activities_coordinates_df):
+    activities_tracks = StravaActivitiesTracks(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df
+        )
+    # the activity without coordinates is dropped, the list column is kept as is
+    assert activities_tracks.activities_df["id"].tolist() == [1, 2]
+    assert activities_tracks.activities_df["end_latlng"].tolist() == [[48.11, 11.51], [48.2, 11.6]]
+    assert isinstance(activities_tracks.activities_df["type"].dtype, pd.CategoricalDtype)
+    assert activities_tracks.filter(activity_type=["Run"])["activity_id"].unique().tolist() == [1]
+    assert activities_tracks.filter(activity_year=[2024])["activity_id"].unique().tolist() == [2]
+
+
+def test_activities_filter_and_create_html_from_create_activities_df(strava_client_class, activities_df, activities_coordinates_df):
+    strava_client = strava_client_class.__new__(strava_client_class)
+    joined_coordinates_df = strava_client.activities_filter(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df,
+        activity_type=["Ride"]
+        )
+    assert len(joined_coordinates_df) == 30
+    strava_activities_heatmap = StravaActivitiesHeatmap(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df,
+        heatmap_filename="test",
+        activity_colors={"Run": "#ff0000", "Ride": "#0000ff"}
+        )
+    activities_folium_map_object = strava_activities_heatmap.create_html(
+        heatmap_html_file_path=None,
+        heatmap_center=[48.1, 11.5],
+        save_html=False,
+        return_map_data=True
+        )
+    assert activities_folium_map_object is not None
+
+
+def test_tracks_from_csv_activities(activities_coordinates_df):
+    # end_latlng as strings as read from the saved .csv file
+    activities_df = pd.DataFrame(ACTIVITIES_RECORDS).assign(end_latlng=lambda df: df["end_latlng"].astype(str))
+    activities_tracks = StravaActivitiesTracks(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df
+        )
+    assert activities_tracks.activities_df["id"].tolist() == [1, 2]
+    assert len(activities_tracks.filter(activity_name=["Morning Run"])) == 20
+
+
+def test_filter_returns_copy(activities_coordinates_df):
+    activities_tracks = StravaActivitiesTracks(
+        activities_df=pd.DataFrame(ACTIVITIES_RECORDS),
+        activities_coordinates_df=activities_coordinates_df
+        )
+    joined_coordinates_df = activities_tracks.filter()
+    assert joined_coordinates_df is not activities_tracks.joined_coordinates_df
+    joined_coordinates_df.loc[:, "lat"] = 0.0
+    joined_coordinates_df["elevation"] = 1.0
+    assert activities_tracks.joined_coordinates_df["lat"].min() > 48
+    assert "elevation" not in activities_tracks.joined_coordinates_df.columns
+
+
+def test_renderers_use_track_table(activities_coordinates_df):
+    # coordinates of the activity without end_latlng and of an unknown activity are not rendered
+    activities_coordinates_df = pd.concat([
+        activities_coordinates_df,
+        pd.DataFrame({"lat": [47.0, 47.1], "lon": [11.0, 11.1], "activity_id": [3, 4], "activity_type": "Run", "color": "#ff0000"})
+        ], ignore_index=True)
+    activities_tracks = StravaActivitiesTracks(
+        activities_df=pd.DataFrame(ACTIVITIES_RECORDS),
+        activities_coordinates_df=activities_coordinates_df
+        )
+    strava_activities_heatmap = StravaActivitiesHeatmap(
+        activities_df=pd.DataFrame(ACTIVITIES_RECORDS),
+        activities_coordinates_df=activities_coordinates_df,
+        heatmap_filename="test",
+        activity_colors={"Run": "#ff0000", "Ride": "#0000ff"},
+        activities_tracks=activities_tracks
+        )
+    polylines, _ = strava_activities_heatmap._StravaActivitiesHeatmap__get_projected_polylines(image_size=(200, 200))
+    assert [len(line_xy) // 2 for _, line_xy in polylines] == [20, 30]
+    density_image, density_bounds = strava_activities_heatmap._StravaActivitiesHeatmap__create_density_image(
+        map_zoom=10,
+        max_image_size=4096
+        )
+    assert density_bounds[0][0] > 48
+    assert strava_activities_heatmap.activities_tracks is activities_tracks
+
+
+def test_create_html_batch(activities_df, activities_coordinates_df, tmp_path):
+    strava_activities_heatmap = StravaActivitiesHeatmap(
+        activities_df=activities_df,
+        activities_coordinates_df=activities_coordinates_df,
+        heatmap_filename="test",
+        activity_colors={"Run": "#ff0000", "Ride": "#0000ff"}
+        )
+    variants_report_df = strava_activities_heatmap.create_html_batch(
+        heatmap_html_file_path=str(tmp_path),
+        filter_specs=[{"name": "runs", "activity_type": ["Run"]}, {"name": "rides", "activity_type": ["Ride"]}],
+        heatmap_center=[48.1, 11.5],
+        max_workers=2
+        )
+    assert variants_report_df["name"].tolist() == ["runs", "rides"]
+    assert variants_report_df["points"].tolist() == [20, 30]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["rides.html", "runs.html"]
@@ -0,0 +1,121 @@
+import asyncio
+import inspect
+import io
+import json
+import pytest
+import numpy as np
+import requests
+from util.ActivityStream import ActivityStream, StreamResponseDecoder
+
+# stream response requested with key_by_type
+STREAM_RESPONSE = {
+    "latlng": {"data": [[48.1, 11.5], [48.2, 11.6]], "series_type": "distance", "original_size": 2, "resolution": "high"},
+    "distance": {"data": [0.0, 10.5], "series_type": "distance", "original_size": 2, "resolution": "high"}
+    }
+
+
+def test_coroutines_do_not_override_sync_methods(strava_client_class, async_strava_client_class):
+    for name, member in inspect.getmembers(async_strava_client_class):
+        if inspect.iscoroutinefunction(member) and not name.startswith("_"):
+            # an inherited sync method calling it would get an un-awaited coroutine
+            assert not hasattr(strava_client_class, name), name
+            assert name.startswith("aget_") or name == "aclose", name
+    for name, member in inspect.getmembers(strava_client_class, inspect.isfunction):
+        assert not inspect.iscoroutinefunction(getattr(async_strava_client_class, name)), name
+
+
+def test_inherited_download_stays_sync(async_strava_client_factory, monkeypatch):
+    async_strava_client = async_strava_client_factory()
+    requested_urls = []
+
+    def request_activity_stream(**kwargs):
+        requested_urls.append(kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(json.dumps(STREAM_RESPONSE).encode())
+        return response
+
+    monkeypatch.setattr(async_strava_client, "_StravaClient__request_activity_stream", request_activity_stream)
+    monkeypatch.setattr(async_strava_client, "_StravaClient__get_valid_credentials", lambda: None)
+    monkeypatch.setattr(async_strava_client, "_StravaClient__credentials_expire", lambda credentials: False)
+    activity_stream = async_strava_client._StravaClient__download_activity_stream(activity_id=1)
+    assert isinstance(activity_stream, ActivityStream)
+    assert len(requested_urls) == 1
+    np.testing.assert_allclose(activity_stream.streams["latlng"], [[48.1, 11.5], [48.2, 11.6]])
+    asyncio.run(async_strava_client.aclose())
+
+
+def test_stream_arrays_are_decoded_while_downloaded(async_strava_client_factory, monkeypatch):
+    import httpx
+    body = json.dumps(STREAM_RESPONSE).encode()
+    downloaded_chunks = []
+
+    async def iter_body():
+        for x in range(0, len(body), 16):
+            downloaded_chunks.append(x)
+            yield body[x:x + 16]
+
+    async def authorize_session():
+        pass
+
+    fed_chunks = []
+    feed = StreamResponseDecoder.feed
+
+    def record_feed(self, chunk):
+        # the body is not downloaded completely before the first chunk is parsed
+        fed_chunks.append(len(downloaded_chunks))
+        feed(self, chunk=chunk)
+
+    monkeypatch.setattr(StreamResponseDecoder, "feed", record_feed)
+    async_strava_client = async_strava_client_factory()
+    monkeypatch.setattr(async_strava_client, "_AsyncStravaClient__authorize_session", authorize_session)
+
+    async def get_activity_stream_arrays():
+        async_strava_client.async_session = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=iter_body()))
+            )
+        async with async_strava_client:
+            return await async_strava_client.aget_activity_stream_arrays(activity_id=1, chunk_size=16, use_cache=False)
+
+    activity_stream = asyncio.run(get_activity_stream_arrays())
+    np.testing.assert_allclose(activity_stream["latlng"], [[48.1, 11.5], [48.2, 11.6]])
+    np.testing.assert_allclose(activity_stream["distance"], [0.0, 10.5])
+    assert fed_chunks[0] < len(downloaded_chunks)
+
+
+def test_streamed_bodies_hold_the_request_semaphore(async_strava_client_factory):
+    import httpx
+    body = json.dumps(STREAM_RESPONSE).encode()
+    open_bodies = []
+    max_open_bodies = []
+
+    async def iter_body():
+        open_bodies.append(1)
+        max_open_bodies.append(len(open_bodies))
+        for x in range(0, len(body), 16):
+            await asyncio.sleep(0)
+            yield body[x:x + 16]
+        open_bodies.pop()
+
+    async def authorize_session():
+        pass
+
+    async def get_activity_streams():
+        async_strava_client = async_strava_client_factory(pool_maxsize=2)
+        async_strava_client._AsyncStravaClient__authorize_session = authorize_session
+        async_strava_client.async_session = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, content=iter_body()))
+            )
+        async with async_strava_client:
+            activity_streams = await asyncio.gather(*[
+                async_strava_client.aget_activity_stream_arrays(activity_id=activity_id, chunk_size=16, use_cache=False)
+                for activity_id in range(6)
+                ])
+            # every slot is released once the bodies are read
+            assert not async_strava_client.request_semaphore.locked()
+        return activity_streams
+
+    activity_streams = asyncio.run(get_activity_streams())
+    assert len(activity_streams) == 6
+    # no more bodies are downloaded at once than the pool allows
+    assert max(max_open_bodies) == 2
@@ -0,0 +1,110 @@
+import datetime as dt
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+
+from util.RateLimiter import StravaRateLimiter
+
+
+def test_try_acquire_until_limit():
+    rate_limiter = StravaRateLimiter(limit_15min=3, limit_daily=10)
+    assert [rate_limiter.try_acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert rate_limiter.usage == [3, 3]
+    wait_seconds = rate_limiter.try_acquire()
+    assert 0 < wait_seconds <= 15 * 60
+    # the denied request does not take a token
+    assert rate_limiter.usage == [3, 3]
+
+
+def test_threshold_leaves_headroom():
+    rate_limiter = StravaRateLimiter(limit_15min=10, limit_daily=100, rate_limit_threshold=0.5)
+    assert [rate_limiter.try_acquire() for _ in range(5)] == [0.0] * 5
+    assert rate_limiter.try_acquire() > 0
+
+
+def test_window_rollover_refills_bucket():
+    rate_limiter = StravaRateLimiter(limit_15min=1, limit_daily=10)
+    assert rate_limiter.try_acquire() == 0.0
+    assert rate_limiter.try_acquire() > 0
+    # the 15 minute window ended, the daily window is still running
+    rate_limiter.window_ends[0] -= dt.timedelta(minutes=15)
+    assert rate_limiter.try_acquire() == 0.0
+    assert rate_limiter.usage == [1, 2]
+
+
+def test_daily_window_rollover():
+    rate_limiter = StravaRateLimiter(limit_15min=10, limit_daily=1)
+    assert rate_limiter.try_acquire() == 0.0
+    wait_seconds = rate_limiter.try_acquire()
+    assert 0 < wait_seconds <= 24 * 3600
+    rate_limiter.window_ends[1] -= dt.timedelta(days=1)
+    assert rate_limiter.try_acquire() == 0.0
+
+
+def test_window_ends_on_boundaries():
+    rate_limiter = StravaRateLimiter()
+    window_end_15min, window_end_daily = rate_limiter.window_ends
+    assert window_end_15min.minute % 15 == 0 and window_end_15min.second == 0
+    assert (window_end_daily.hour, window_end_daily.minute) == (0, 0)
+    assert window_end_daily.tzinfo == dt.timezone.utc
+
+
+def test_update_syncs_headers():
+    rate_limiter = StravaRateLimiter(limit_15min=100, limit_daily=1000)
+    rate_limiter.update(rate_limit_usage="95,500", rate_limit_limit="200,2000")
+    assert rate_limiter.limits == [200, 2000]
+    assert rate_limiter.usage == [95, 500]
+    # tokens taken for running requests are kept if the headers report less
+    rate_limiter.try_acquire()
+    rate_limiter.update(rate_limit_usage="90,400", rate_limit_limit="200,2000")
+    assert rate_limiter.usage == [96, 501]
+
+
+def test_update_blocks_at_reported_usage():
+    rate_limiter = StravaRateLimiter(limit_15min=100, limit_daily=1000)
+    rate_limiter.update(rate_limit_usage="100,100", rate_limit_limit="100,1000")
+    assert rate_limiter.try_acquire() > 0
+
+
+@pytest.mark.parametrize("attempt", range(10))
+def test_backoff_bounds(attempt):
+    rate_limiter = StravaRateLimiter(backoff_base=0.5, backoff_cap=8.0)
+    upper_bound = min(8.0, 0.5 * 2 ** attempt)
+    backoff_seconds = [rate_limiter.get_backoff_seconds(attempt=attempt) for _ in range(200)]
+    assert all(0 <= seconds <= upper_bound for seconds in backoff_seconds)
+
+
+class RetryAfterHandler(BaseHTTPRequestHandler):
+    """Answers every request with a 429 and a Retry-After header."""
+    requests_count = 0
+
+    def do_GET(self):
+        type(self).requests_count += 1
+        self.send_response(429)
+        self.send_header("Retry-After", "0")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_status_retries_only_in_resilient_request(strava_client_factory):
+    server = HTTPServer(("127.0.0.1", 0), RetryAfterHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        strava_client = strava_client_factory(max_retries=2)
+        strava_client.rate_limiter.backoff_cap = 0
+        response = strava_client._StravaClient__resilient_request(
+            method="GET",
+            url=f"http://127.0.0.1:{server.server_port}/activities/1",
+            timeout=5
+            )
+        # one attempt per retry of the loop, urllib3 does not retry the status codes again
+        assert response.status_code == 429
+        assert RetryAfterHandler.requests_count == 3
+        assert strava_client.rate_limiter.usage[0] == 3
+        strava_client.close()
+    finally:
+        server.shutdown()
@@ -0,0 +1,259 @@
+import asyncio
+import io
+import json
+import numpy as np
+import pytest
+import requests
+import types
+from util.ActivityStream import StreamResponseDecoder
+from util.ResponseCache import StravaResponseCache
+
+# stream response requested with key_by_type
+STREAM_RESPONSE = {
+    "latlng": {"data": [[48.1 + x * 1e-4, 11.5 - x * 1e-4] for x in range(1_000)], "series_type": "distance",
+               "original_size": 1_000, "resolution": "high"},
+    }
+STREAM_BODY = json.dumps(STREAM_RESPONSE).encode()
+
+
+class StreamSession(object):
+    """Session answering every request with the stream response."""
+    def __init__(self):
+        self.headers = {}
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.headers.update({"Content-Type": "application/json", "ETag": '"stream"'})
+        self.raw = io.BytesIO(STREAM_BODY)
+        response.raw = self.raw
+        return response
+
+    def close(self):
+        pass
+
+
+class RevalidatingSession(object):
+    """Session answering conditional requests with the ETag of the activity with 304."""
+    def __init__(self):
+        self.headers = {}
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append(kwargs)
+        response = requests.Response()
+        response.url = url
+        if (kwargs.get("headers") or {}).get("If-None-Match") == '"activity"':
+            response.status_code = 304
+            response.raw = io.BytesIO(b"")
+            return response
+        response.status_code = 200
+        response.headers.update({"Content-Type": "application/json", "ETag": '"activity"'})
+        response.raw = io.BytesIO(json.dumps({"id": 1, "type": "Run"}).encode())
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time of the response cache."""
+    clock = types.SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr("util.ResponseCache.time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    response_cache = StravaResponseCache(cache_path=str(tmp_path / "cache" / "responses.sqlite"))
+    yield response_cache
+    response_cache.close()
+
+
+def test_tee_stores_completely_read_body(response_cache):
+    key, endpoint, activity_id = response_cache.get_key(url="https://strava.test/api/v3/activities/1/streams")
+    chunks = [STREAM_BODY[x:x + 100] for x in range(0, len(STREAM_BODY), 100)]
+    cache_kwargs = {"key": key, "endpoint": endpoint, "activity_id": activity_id, "url": "", "headers": {"ETag": '"stream"'}}
+    # a body that is not read to the end is not stored
+    tee_chunks = response_cache.tee(chunks=iter(chunks), **cache_kwargs)
+    next(tee_chunks)
+    tee_chunks.close()
+    assert response_cache.get(key=key) is None
+    assert b"".join(response_cache.tee(chunks=iter(chunks), **cache_kwargs)) == STREAM_BODY
+    cached_response = response_cache.get(key=key)
+    assert cached_response["body"] == STREAM_BODY
+    assert cached_response["headers"] == {"ETag": '"stream"'}
+
+
+def set_activity_response(response_cache, activity_id, body=b"{}"):
+    key, endpoint, activity_id = response_cache.get_key(url=f"https://strava.test/api/v3/activities/{activity_id}")
+    response_cache.set(key=key, endpoint=endpoint, activity_id=activity_id, url="", body=body, headers={"ETag": '"activity"'})
+    return key
+
+
+def test_get_key_of_cached_endpoints(response_cache):
+    assert response_cache.get_key(url="https://strava.test/api/v3/athlete/activities") == (None, None, None)
+    key, endpoint, activity_id = response_cache.get_key(url="https://strava.test/api/v3/activities/12")
+    assert (endpoint, activity_id) == ("activity", 12)
+    streams_key, endpoint, activity_id = response_cache.get_key(
+        url="https://strava.test/api/v3/activities/12/streams", params={"keys": "latlng"}
+        )
+    assert (endpoint, activity_id) == ("activity_streams", 12)
+    assert streams_key != response_cache.get_key(url="https://strava.test/api/v3/activities/12/streams")[0]
+    assert key != streams_key
+
+
+def test_get_key_normalizes_param_values(response_cache):
+    url = "https://strava.test/api/v3/activities/12/streams"
+    # the sync client sends key_by_type=True, the async client "true"
+    assert response_cache.get_key(url=url, params={"keys": "latlng,time", "key_by_type": True}) \
+        == response_cache.get_key(url=url, params={"key_by_type": "true", "keys": "latlng,time"})
+    assert response_cache.get_key(url=url, params={"key_by_type": True})[0] \
+        != response_cache.get_key(url=url, params={"key_by_type": False})[0]
+
+
+def test_total_size(response_cache, tmp_path):
+    def get_stored_size():
+        return response_cache.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    for activity_id in range(4):
+        set_activity_response(response_cache=response_cache, activity_id=activity_id, body=bytes(range(256)) * activity_id)
+    assert response_cache.total_size == get_stored_size() > 0
+    # a replaced response only counts once
+    set_activity_response(response_cache=response_cache, activity_id=3, body=b"{}")
+    assert response_cache.total_size == get_stored_size()
+    response_cache.invalidate(activity_ids=[2, 5])
+    assert response_cache.total_size == get_stored_size()
+    response_cache.max_size = response_cache.total_size - 1
+    set_activity_response(response_cache=response_cache, activity_id=6)
+    assert response_cache.total_size == get_stored_size() <= response_cache.max_size
+    # the total is read from the file on start-up
+    reopened_response_cache = StravaResponseCache(cache_path=response_cache.cache_path)
+    assert reopened_response_cache.total_size == get_stored_size()
+    reopened_response_cache.close()
+    response_cache.invalidate()
+    assert response_cache.total_size == 0
+
+
+def test_ttl(response_cache, clock):
+    key = set_activity_response(response_cache=response_cache, activity_id=1)
+    response_cache.ttl = 60
+    clock.now += 59
+    assert response_cache.get(key=key)["fresh"]
+    clock.now += 2
+    assert not response_cache.get(key=key)["fresh"]
+    # a revalidated response is fresh again
+    response_cache.refresh(key=key)
+    assert response_cache.get(key=key)["fresh"]
+    response_cache.ttl = None
+    clock.now += 10 ** 9
+    assert response_cache.get(key=key)["fresh"]
+    assert response_cache.get_validators(cached_response=response_cache.get(key=key)) == {"If-None-Match": '"activity"'}
+
+
+def test_lru_eviction(response_cache, clock):
+    keys = []
+    for activity_id in range(3):
+        keys.append(set_activity_response(response_cache=response_cache, activity_id=activity_id, body=bytes(100)))
+        clock.now += 1
+    size = response_cache.connection.execute("SELECT size FROM responses").fetchone()[0]
+    # reading the oldest response makes the second one the least recently used
+    response_cache.get(key=keys[0])
+    clock.now += 1
+    response_cache.max_size = 3 * size
+    set_activity_response(response_cache=response_cache, activity_id=3, body=bytes(100))
+    assert response_cache.get(key=keys[1]) is None
+    assert response_cache.get(key=keys[0]) is not None
+    assert response_cache.get(key=keys[2]) is not None
+
+
+def test_invalidate(response_cache):
+    keys = [set_activity_response(response_cache=response_cache, activity_id=activity_id) for activity_id in range(3)]
+    streams_key, endpoint, activity_id = response_cache.get_key(url="https://strava.test/api/v3/activities/1/streams")
+    response_cache.set(key=streams_key, endpoint=endpoint, activity_id=activity_id, url="", body=STREAM_BODY, headers={})
+    response_cache.invalidate(activity_ids=[1])
+    assert response_cache.get(key=keys[1]) is None
+    assert response_cache.get(key=streams_key) is None
+    assert response_cache.get(key=keys[0]) is not None
+    response_cache.invalidate()
+    assert all(response_cache.get(key=key) is None for key in keys)
+
+
+def test_not_modified_response_is_answered_from_cache(strava_client_factory, tmp_path, clock):
+    revalidating_session = RevalidatingSession()
+    strava_client = strava_client_factory(session=revalidating_session, response_cache_path=str(tmp_path / "responses.sqlite"))
+    strava_client._StravaClient__authorize_session = lambda: None
+    strava_client.response_cache.ttl = 60
+    activity = strava_client.get_strava_activity(activity_id=1)
+    # within the ttl the response is served without a request
+    assert strava_client.get_strava_activity(activity_id=1) == activity
+    assert len(revalidating_session.requests) == 1
+    # a stale response is revalidated, the 304 keeps the cached body and restarts the ttl
+    clock.now += 61
+    assert strava_client.get_strava_activity(activity_id=1) == activity
+    assert len(revalidating_session.requests) == 2
+    assert revalidating_session.requests[1]["headers"]["If-None-Match"] == '"activity"'
+    assert strava_client.get_strava_activity(activity_id=1) == activity
+    assert len(revalidating_session.requests) == 2
+    strava_client.close()
+
+
+def test_streamed_response_is_cached_while_decoded(strava_client_factory, tmp_path, monkeypatch):
+    stream_session = StreamSession()
+    read_positions = []
+    feed = StreamResponseDecoder.feed
+
+    def record_feed(self, chunk):
+        read_positions.append(stream_session.raw.tell())
+        feed(self, chunk=chunk)
+
+    monkeypatch.setattr(StreamResponseDecoder, "feed", record_feed)
+    strava_client = strava_client_factory(session=stream_session, response_cache_path=str(tmp_path / "responses.sqlite"))
+    strava_client._StravaClient__authorize_session = lambda: None
+    activity_streams = [
+        strava_client.get_activity_stream_arrays(activity_id=1, keys=["latlng"], chunk_size=256)
+        for _ in range(2)
+        ]
+    # the first request was streamed, the second one answered from the cache
+    assert len(stream_session.requests) == 1
+    assert stream_session.requests[0]["stream"] is True
+    # the body was not buffered for the cache before it was decoded
+    assert read_positions[0] < len(STREAM_BODY)
+    for activity_stream in activity_streams:
+        np.testing.assert_array_equal(activity_stream["latlng"], np.array(STREAM_RESPONSE["latlng"]["data"]))
+    strava_client.close()
+
+
+def test_async_streamed_response_is_cached_while_decoded(async_strava_client_factory, tmp_path):
+    httpx = pytest.importorskip("httpx")
+    requested_urls = []
+
+    async def iter_body():
+        for x in range(0, len(STREAM_BODY), 256):
+            yield STREAM_BODY[x:x + 256]
+
+    def get_response(request):
+        requested_urls.append(request.url)
+        return httpx.Response(200, headers={"ETag": '"stream"'}, content=iter_body())
+
+    async def get_activity_streams():
+        async_strava_client = async_strava_client_factory(response_cache_path=str(tmp_path / "responses.sqlite"))
+        async_strava_client.async_session = httpx.AsyncClient(transport=httpx.MockTransport(get_response))
+
+        async def authorize_session():
+            pass
+        async_strava_client._AsyncStravaClient__authorize_session = authorize_session
+        async with async_strava_client:
+            return [
+                await async_strava_client.aget_activity_stream_arrays(activity_id=1, keys=["latlng"], chunk_size=256)
+                for _ in range(2)
+                ]
+
+    activity_streams = asyncio.run(get_activity_streams())
+    assert len(requested_urls) == 1
+    for activity_stream in activity_streams:
+        np.testing.assert_array_equal(activity_stream["latlng"], np.array(STREAM_RESPONSE["latlng"]["data"]))
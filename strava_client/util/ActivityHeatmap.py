@@ -3,9 +3,132 @@ import os
 import webbrowser
 from datetime import timedelta
 import io
+import zlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 import folium
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+
+from util.ActivityTracks import StravaActivitiesTracks
+
+EARTH_RADIUS_METERS = 6_371_000
+# meters per pixel of a web mercator tile at zoom level 0 and the equator
+METERS_PER_PIXEL_ZOOM_0 = 156_543.03
+# latitude limit of the web mercator projection
+MAX_MERCATOR_LATITUDE = 85.05112878
+TILE_SIZE = 256
+
+
+def project_web_mercator(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    map_zoom: int,
+    tile_size: int=TILE_SIZE
+    ) -> tuple:
+    """Project coordinates to global web mercator pixel coordinates at a zoom level."""
+    lat = np.radians(np.clip(np.asarray(lat, dtype='float64'), -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+    scale = tile_size * 2 ** map_zoom
+    x = (np.asarray(lon, dtype='float64') + 180) / 360 * scale
+    y = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * scale
+    return x, y
+
+
+def unproject_web_mercator(
+    x: np.ndarray,
+    y: np.ndarray,
+    map_zoom: int,
+    tile_size: int=TILE_SIZE
+    ) -> tuple:
+    """Coordinates of global web mercator pixel coordinates at a zoom level."""
+    scale = tile_size * 2 ** map_zoom
+    lon = np.asarray(x, dtype='float64') / scale * 360 - 180
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * np.asarray(y, dtype='float64') / scale))))
+    return lat, lon
+
+
+def rasterize_density(
+    x: np.ndarray,
+    y: np.ndarray,
+    activity_types: np.ndarray,
+    activity_colors: Dict[str, str],
+    image_size: tuple,
+    max_count: int=None
+    ) -> np.ndarray:
+    """Count the points of every activity type per pixel and color the counts
+       with a logarithmic alpha ramp of the type color, the types are layered
+       over each other in the order of activity_colors.
+
+    Args:
+        x (np.ndarray): pixel column of the points, relative to the image
+        y (np.ndarray): pixel row of the points, relative to the image
+        activity_types (np.ndarray): activity type of the points
+        activity_colors (Dict[str, str]): colors of the activity types
+        image_size (tuple): width and height of the image
+        max_count (int, optional): count at which the color is fully opaque, a fixed
+                                   value keeps separately rendered images consistent.
+                                   Defaults to None (the maximum count of the type).
+
+    Returns:
+        np.ndarray: RGBA image as uint8 array of shape (height, width, 4)
+    """
+    width, height = image_size
+    x, y = np.floor(x).astype('int64'), np.floor(y).astype('int64')
+    inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+    pixel_index = y * width + x
+    image = np.zeros((height, width, 4), dtype='float32')
+    for activity_type, activity_color in activity_colors.items():
+        type_points = inside & (activity_types == activity_type)
+        if not type_points.any():
+            continue
+        counts = np.bincount(pixel_index[type_points], minlength=width * height).reshape(height, width)
+        type_max_count = counts.max() if max_count is None else max_count
+        alpha = np.minimum(np.log1p(counts) / np.log1p(type_max_count), 1).astype('float32')[:, :, None]
+        color = np.array(ImageColor.getrgb(activity_color)[:3], dtype='float32') / 255
+        # alpha compositing of the type layer over the layers below
+        image[:, :, :3] = color * alpha + image[:, :, :3] * (1 - alpha)
+        image[:, :, 3:] = alpha + image[:, :, 3:] * (1 - alpha)
+    # colors are stored with alpha applied, divide it out for the image
+    image[:, :, :3] = np.divide(image[:, :, :3], image[:, :, 3:], out=np.zeros_like(image[:, :, :3]), where=image[:, :, 3:] > 0)
+    return (image * 255).round().astype('uint8')
+
+def render_html_variant(
+    variant: Dict
+    ) -> Dict:
+    """Render one heatmap variant of StravaActivitiesHeatmap.create_html_batch,
+       runs in the worker processes.
+
+    Args:
+        variant (Dict): name, joined coordinates, activities, activity colors,
+                        heatmap center, output path and create_html arguments
+
+    Returns:
+        Dict: name, number of activities and points and seconds of the variant
+    """
+    start_time = time.perf_counter()
+    joined_coordinates_df = variant["joined_coordinates_df"]
+    if not joined_coordinates_df.empty:
+        heatmap = StravaActivitiesHeatmap(
+            activities_df=variant["activities_df"],
+            activities_coordinates_df=joined_coordinates_df,
+            heatmap_filename=variant["name"],
+            activity_colors=variant["activity_colors"]
+        )
+        heatmap.create_html(
+            heatmap_html_file_path=variant["heatmap_html_file_path"],
+            heatmap_center=variant["heatmap_center"],
+            joined_coordinates_df=joined_coordinates_df,
+            heatmap_html_filename=f"{variant['name']}.html",
+            **variant["create_html_kwargs"]
+        )
+    return {
+        "name": variant["name"],
+        "activities": joined_coordinates_df['activity_id'].nunique(),
+        "points": len(joined_coordinates_df),
+        "seconds": time.perf_counter() - start_time
+    }
+
 
 class StravaActivitiesHeatmap(object):
     def __init__(
@@ -13,11 +136,16 @@ class StravaActivitiesHeatmap(object):
         activities_df: pd.DataFrame,
         activities_coordinates_df: pd.DataFrame,
         heatmap_filename: str,
-        activity_colors: Dict[str, str]=None
+        activity_colors: Dict[str, str]=None,
+        activities_tracks: StravaActivitiesTracks=None
         ):
         self.activity_colors = activity_colors
         self.heatmap_filename = heatmap_filename
         self.activities_folium_map_object = None
+        # coordinates joined with the activities, built on first use if not provided
+        self.activities_tracks = activities_tracks
+        # activities_df and statistics of the last call of get_activities_statistics
+        self.activities_statistics_cache = (None, None)
         # Check if the daraframes are not empty
         if not activities_df.empty and not activities_coordinates_df.empty:
             self.activities_df = activities_df
@@ -38,69 +166,64 @@ class StravaActivitiesHeatmap(object):
         line_opacity: float=0.6,
         line_smooth_factor: float=1.0,
         return_map_data: bool=False,
+        simplify_tolerance: float=None,
+        joined_coordinates_df: pd.DataFrame=None,
         **kwargs
         ) -> folium.Map:
-        """Create Heatmap based on inputted activities DataFrame."""
-        # Remove all activities from the overview that dont hold values for the parameter
-        # end_latlng since they dont have any relevant coordinates
-        activities_df = self.activities_df.query(expr='end_latlng != "[]"').reset_index(drop=True)
-
-        if 'distance' not in activities_df.columns:
-            activities_df = activities_df.assign(distance=0)
-        # Transform the starting date and time
-        activities_df["start_date_local"] = pd.to_datetime(activities_df["start_date_local"])
-        if "start_date_local" not in activities_df.columns:
-            activities_df = activities_df.assign(start_date_local=pd.Timestamp.now(tz='UTC').replace(tzinfo=None))
-
-        activities_coordinates_df = (
-            self.activities_coordinates_df
-            # Filter activities coordinates given the filtered activities
-            .query(expr='activity_id.isin(@activities_df["id"])')
-            # Select columns - select all present
-            .filter(items=self.activities_coordinates_df.columns)
-            # Left join 'activities_df'
-            .merge(
-                right=activities_df.filter(items=activities_df.columns),
-                how='left',
-                left_on=['activity_id'],
-                right_on=["id"],
-                indicator=False)
-        )
+        """Create Heatmap based on inputted activities DataFrame.
 
-        # Transform columns
-        activities_coordinates_df['coordinates'] = list(zip(activities_coordinates_df['lat'], activities_coordinates_df['lon']))
+        Args:
+            joined_coordinates_df (pd.DataFrame, optional): Coordinates already joined with the activities
+                                                            via join_activities_coordinates or a filtered part of
+                                                            them (StravaClient.activities_filter), skips the join.
+                                                            Defaults to None.
+            simplify_tolerance (float, optional): Tolerance in meters of the polyline simplification,
+                                                  see get_zoom_tolerance for a tolerance per zoom level.
+                                                  Defaults to None (all points are rendered).
+        """
+        if joined_coordinates_df is None:
+            joined_coordinates_df = self.join_activities_coordinates()
+        activities_coordinates_df = joined_coordinates_df
 
-        # Define map tile
-        if map_tile in ['dark_all', 'dark_nolabels', 'light_all', 'light_nolabels']:
-            map_tile = 'https://a.basemaps.cartocdn.com/' + map_tile + '/{z}/{x}/{y}@2x.png'
+        # Remove the points that do not change the polylines by more than the tolerance
+        if simplify_tolerance is not None:
+            activities_coordinates_df = self.simplify_activities_coordinates(
+                activities_coordinates_df=activities_coordinates_df,
+                simplify_tolerance=simplify_tolerance
+            )
 
-        if map_tile == 'terrain_background':
-            map_tile = 'http://tile.stamen.com/terrain-background/{z}/{x}/{y}.png'
-
-        if map_tile == 'toner_lite':
-            map_tile = 'http://tile.stamen.com/toner-lite/{z}/{x}/{y}.png'
-
-        if map_tile == 'ocean_basemap':
-            map_tile = 'https://server.arcgisonline.com/ArcGIS/rest/services/Ocean_Basemap/MapServer/tile/{z}/{y}/{x}'
+        # Transform columns
+        activities_coordinates_df = activities_coordinates_df.assign(
+            coordinates=list(zip(activities_coordinates_df['lat'], activities_coordinates_df['lon']))
+        )
 
         # Create Folium map
         activities_folium_map_object = folium.Map(
-            tiles=map_tile,
+            tiles=self.__get_map_tile(map_tile=map_tile),
             attr='tile',
             location=heatmap_center,
             zoom_start=map_zoom_start,
         )
         folium.LayerControl().add_to(activities_folium_map_object)
 
+        # Popup metadata of every activity, taken once from its first coordinate
+        activities_metadata_df = (
+            activities_coordinates_df
+            .drop_duplicates(subset=['activity_id'])
+            .set_index('activity_id')
+        )
+        activities_dates = activities_metadata_df['start_date_local'].dt.date
+        activities_distances = activities_metadata_df['distance']
+
         # Plot activities into Folium map (adapted from: https://github.com/andyakrn/activities_heatmap)
-        for activity_type in activities_coordinates_df['activity_type'].unique():
-            df_activity_type = activities_coordinates_df[activities_coordinates_df['activity_type'] == activity_type]
+        # groupby without sorting keeps the order of first appearance of the types and activities
+        for activity_type, df_activity_type in activities_coordinates_df.groupby('activity_type', sort=False, observed=True):
 
-            for activity in df_activity_type['activity_id'].unique():
-                date = df_activity_type[df_activity_type['activity_id'] == activity]['start_date_local'].dt.date.iloc[0]
-                distance = round(df_activity_type[df_activity_type['activity_id'] == activity]['distance'].iloc[0] / 1000, 1)
+            for activity, activity_coordinates in df_activity_type.groupby('activity_id', sort=False)['coordinates']:
+                date = activities_dates.at[activity]
+                distance = round(activities_distances.at[activity] / 1000, 1)
 
-                coordinates = tuple(df_activity_type[df_activity_type['activity_id'] == activity]['coordinates'])
+                coordinates = tuple(activity_coordinates)
                 folium.PolyLine(
                     locations=coordinates,
                     color=self.activity_colors[activity_type],
@@ -156,35 +279,536 @@ class StravaActivitiesHeatmap(object):
             return activities_folium_map_object
 
 
+    def join_activities_coordinates(
+        self
+        ) -> pd.DataFrame:
+        """Join the coordinates with the activities that hold coordinates and parse
+           their start dates, the result can be passed on to create_html and
+           create_html_batch to skip the join. The join is done only once and
+           kept as StravaActivitiesTracks, the returned DataFrame is shared with
+           the renderers and is meant to be read only (filter returns copies)."""
+        if self.activities_tracks is None:
+            self.activities_tracks = StravaActivitiesTracks(
+                activities_df=self.activities_df,
+                activities_coordinates_df=self.activities_coordinates_df
+            )
+        return self.activities_tracks.joined_coordinates_df
+
+
+    def create_html_batch(
+        self,
+        heatmap_html_file_path: str,
+        filter_specs: List[Dict],
+        heatmap_center: List[float]=None,
+        max_workers: int=None,
+        **kwargs
+        ) -> pd.DataFrame:
+        """Render many filtered variants of the .html heatmap in a pool of processes.
+           The coordinates are joined with the activities and the dates are parsed
+           only once, every variant is a filtered part of the joined coordinates.
+
+        Args:
+            heatmap_html_file_path (str): Place where to save the .html files.
+            filter_specs (List[Dict]): One dict per variant with the "name" of the .html file and
+                                       the optional filters of activities_filter: "activity_type",
+                                       "activity_year", "activity_name", "bounding_box",
+                                       "bounding_box_mode" and an optional "heatmap_center".
+            heatmap_center (List[float], optional): Center of all variants without their own center.
+                                                    Defaults to None (center of the variant coordinates).
+            max_workers (int, optional): Number of processes. Defaults to None (number of CPUs).
+            **kwargs: further arguments of create_html for all variants, e.g. map_tile,
+                      except heatmap_html_filename and joined_coordinates_df which are
+                      set per variant
+
+        Returns:
+            pd.DataFrame: name, activities, points and seconds of every variant
+        """
+        # set per variant by render_html_variant, passing them again would fail in the workers
+        variant_arguments = [argument for argument in ["heatmap_html_filename", "joined_coordinates_df"] if argument in kwargs]
+        if variant_arguments:
+            raise ValueError(f"{variant_arguments} are set per variant from the filter_specs and can not be passed to create_html_batch")
+        self.join_activities_coordinates()
+        variants = []
+        for filter_spec in filter_specs:
+            variant_coordinates_df = self.activities_tracks.filter(
+                activity_type=filter_spec.get("activity_type"),
+                activity_year=filter_spec.get("activity_year"),
+                activity_name=filter_spec.get("activity_name"),
+                bounding_box=filter_spec.get("bounding_box"),
+                bounding_box_mode=filter_spec.get("bounding_box_mode", "points")
+            )
+            variant_center = filter_spec.get("heatmap_center", heatmap_center)
+            if variant_center is None and not variant_coordinates_df.empty:
+                variant_center = [variant_coordinates_df['lat'].mean(), variant_coordinates_df['lon'].mean()]
+            variants.append({
+                "name": filter_spec["name"],
+                "joined_coordinates_df": variant_coordinates_df,
+                "activities_df": self.activities_df[self.activities_df['id'].isin(variant_coordinates_df['activity_id'].unique())],
+                "activity_colors": self.activity_colors,
+                "heatmap_center": variant_center,
+                "heatmap_html_file_path": heatmap_html_file_path,
+                "create_html_kwargs": kwargs
+            })
+        variants_report = []
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for variant_report in executor.map(render_html_variant, variants):
+                print(f"Variant {variant_report['name']}: {variant_report['activities']} activities, "
+                      f"{variant_report['points']} points in {variant_report['seconds']:.2f}s")
+                variants_report.append(variant_report)
+        return pd.DataFrame(variants_report)
+
+
+    def __get_map_tile(
+        self,
+        map_tile: str
+        ) -> str:
+        """Tile URL of the named map tiles, other values are passed on to folium."""
+        if map_tile in ['dark_all', 'dark_nolabels', 'light_all', 'light_nolabels']:
+            map_tile = 'https://a.basemaps.cartocdn.com/' + map_tile + '/{z}/{x}/{y}@2x.png'
+
+        if map_tile == 'terrain_background':
+            map_tile = 'http://tile.stamen.com/terrain-background/{z}/{x}/{y}.png'
+
+        if map_tile == 'toner_lite':
+            map_tile = 'http://tile.stamen.com/toner-lite/{z}/{x}/{y}.png'
+
+        if map_tile == 'ocean_basemap':
+            map_tile = 'https://server.arcgisonline.com/ArcGIS/rest/services/Ocean_Basemap/MapServer/tile/{z}/{y}/{x}'
+        return map_tile
+
+
+    def __create_density_image(
+        self,
+        map_zoom: int,
+        max_image_size: int
+        ) -> tuple:
+        """Rasterize all coordinates of the activities into one density image.
+           The image covers the bounds of the coordinates in web mercator pixels
+           at map_zoom, the zoom is reduced while the image would be larger
+           than max_image_size.
+
+        Returns:
+            tuple: RGBA image as uint8 array and its bounds [[lat_min, lon_min], [lat_max, lon_max]]
+        """
+        activities_coordinates_df = self.join_activities_coordinates()
+        lat = activities_coordinates_df['lat'].to_numpy()
+        lon = activities_coordinates_df['lon'].to_numpy()
+        while True:
+            x, y = project_web_mercator(lat=lat, lon=lon, map_zoom=map_zoom)
+            x_min, y_min = np.floor(x.min()), np.floor(y.min())
+            image_size = (int(np.floor(x.max()) - x_min) + 1, int(np.floor(y.max()) - y_min) + 1)
+            if max(image_size) <= max_image_size or map_zoom == 0:
+                break
+            map_zoom -= 1
+            print(f"Density image larger than {max_image_size} pixels, zoom reduced to: {map_zoom}")
+        density_image = rasterize_density(
+            x=x - x_min,
+            y=y - y_min,
+            activity_types=activities_coordinates_df['activity_type'].to_numpy(),
+            activity_colors=self.activity_colors,
+            image_size=image_size
+        )
+        (lat_max, lat_min), (lon_min, lon_max) = unproject_web_mercator(
+            x=[x_min, x_min + image_size[0]],
+            y=[y_min, y_min + image_size[1]],
+            map_zoom=map_zoom
+        )
+        return density_image, [[lat_min, lon_min], [lat_max, lon_max]]
+
+
+    def create_density_png(
+        self,
+        heatmap_png_file_path: str,
+        map_zoom: int=13,
+        max_image_size: int=4096,
+        save_png: bool=True,
+        return_image: bool=False,
+        **kwargs
+        ) -> Image.Image:
+        """Create a density heatmap image that bins all points into a pixel grid
+           instead of drawing one line per activity, so the render time and the
+           file size barely grow with the number of activities."""
+        density_image, _ = self.__create_density_image(map_zoom=map_zoom, max_image_size=max_image_size)
+        density_img = Image.fromarray(density_image, mode='RGBA')
+        if save_png:
+            # check if there was provided a different file name in the **kwargs
+            heatmap_png_filename = kwargs.get("heatmap_png_filename", rf"{self.heatmap_filename}-density.png") # expected with .png ending
+            if not ".png" in heatmap_png_filename:
+                raise AttributeError("heatmap_png_filename is expected to include file ending: .png")
+            heatmap_png_full_save_path = rf"{heatmap_png_file_path}/{heatmap_png_filename}"
+            density_img.save(heatmap_png_full_save_path, format='PNG', optimize=True)
+            print(f"{heatmap_png_filename} succesfully saved at: {heatmap_png_full_save_path}")
+        if return_image:
+            return density_img
+
+
+    def create_density_html(
+        self,
+        heatmap_html_file_path: str,
+        heatmap_center: List[float],
+        open_in_webbrowser: bool=False,
+        save_html: bool=True,
+        map_tile: str='dark_all',
+        map_zoom_start: float=13,
+        map_zoom: int=13,
+        max_image_size: int=4096,
+        return_map_data: bool=False,
+        **kwargs
+        ) -> folium.Map:
+        """Create a heatmap with the density image as single image overlay instead
+           of one polyline per activity."""
+        density_image, density_bounds = self.__create_density_image(map_zoom=map_zoom, max_image_size=max_image_size)
+        activities_folium_map_object = folium.Map(
+            tiles=self.__get_map_tile(map_tile=map_tile),
+            attr='tile',
+            location=heatmap_center,
+            zoom_start=map_zoom_start,
+        )
+        # the image is already in web mercator pixels
+        folium.raster_layers.ImageOverlay(
+            image=density_image,
+            bounds=density_bounds,
+            mercator_project=False,
+            name='density',
+        ).add_to(activities_folium_map_object)
+        folium.LayerControl().add_to(activities_folium_map_object)
+
+        self.activities_folium_map_object = activities_folium_map_object
+        if save_html:
+            # check if there was provided a different file name in the **kwargs
+            heatmap_html_filename = kwargs.get("heatmap_html_filename", rf"{self.heatmap_filename}-density.html") # expected with .html ending
+            if not ".html" in heatmap_html_filename:
+                raise AttributeError("heatmap_html_filename is expected to include file ending: .html")
+            heatmap_html_full_save_path = rf"{heatmap_html_file_path}/{heatmap_html_filename}"
+            activities_folium_map_object.save(outfile=heatmap_html_full_save_path)
+            print(f"{heatmap_html_filename} succesfully saved at: {heatmap_html_full_save_path}")
+        if open_in_webbrowser:
+            activities_folium_map_object.show_in_browser()
+        if return_map_data:
+            return activities_folium_map_object
+
+
+    def get_zoom_tolerance(
+        self,
+        map_zoom: float,
+        latitude: float,
+        tolerance_pixels: float=1.0
+        ) -> float:
+        """Tolerance in meters that corresponds to tolerance_pixels on the map
+           at the given zoom level and latitude, simplifying with it gives no
+           visible difference at this zoom level."""
+        return tolerance_pixels * METERS_PER_PIXEL_ZOOM_0 * np.cos(np.radians(latitude)) / 2 ** map_zoom
+
+
+    def __douglas_peucker(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        activity_codes: np.ndarray,
+        simplify_tolerance: float
+        ) -> np.ndarray:
+        """Douglas-Peucker simplification of all activities at once. The points
+           are expected to be grouped by activity, in every iteration the point
+           farthest from its current segment is kept for all open segments at
+           once, a segment is closed when no point deviates more than the
+           tolerance."""
+        n_points = len(x)
+        if n_points < 3:
+            return np.ones(n_points, dtype=bool)
+        keep = np.zeros(n_points, dtype=bool)
+        # the first and last point of every activity are always kept
+        activity_boundaries = np.flatnonzero(np.diff(activity_codes))
+        keep[[0, -1]] = True
+        keep[activity_boundaries] = True
+        keep[activity_boundaries + 1] = True
+        # points of the open segments, only these are checked again
+        open_points = ~keep
+        while open_points.any():
+            point_index = np.flatnonzero(open_points)
+            kept_index = np.flatnonzero(keep)
+            segment = np.searchsorted(kept_index, point_index, side='right') - 1
+            start, end = kept_index[segment], kept_index[segment + 1]
+            dx, dy = x[end] - x[start], y[end] - y[start]
+            px, py = x[point_index] - x[start], y[point_index] - y[start]
+            length_squared = dx * dx + dy * dy
+            # distance to the segment, start and end can be the same point for round trips
+            t = np.divide(px * dx + py * dy, length_squared,
+                          out=np.zeros(len(point_index)), where=length_squared > 0).clip(0, 1)
+            distance = np.hypot(px - t * dx, py - t * dy)
+            candidates = np.flatnonzero(distance > simplify_tolerance)
+            # farthest candidate of every segment
+            candidates = candidates[np.lexsort((-distance[candidates], segment[candidates]))]
+            _, first_candidates = np.unique(segment[candidates], return_index=True)
+            segment_open = np.zeros(len(kept_index), dtype=bool)
+            segment_open[segment[candidates]] = True
+            open_points[point_index] = segment_open[segment]
+            keep[point_index[candidates[first_candidates]]] = True
+            open_points[keep] = False
+        return keep
+
+
+    def simplify_activities_coordinates(
+        self,
+        activities_coordinates_df: pd.DataFrame,
+        simplify_tolerance: float
+        ) -> pd.DataFrame:
+        """Reduce the coordinates of every activity with the Douglas-Peucker
+           algorithm. The first and last point of every activity are kept and
+           every removed point lies within simplify_tolerance of the simplified
+           polyline of its activity. The order of the remaining rows is kept and
+           the saved points and bytes are reported.
+
+        Args:
+            activities_coordinates_df (pd.DataFrame): coordinates (lat, lon) of the activities
+                                                      with their activity_id
+            simplify_tolerance (float): Maximum distance in meters of a removed point to the
+                                        simplified polyline, measured in a local equirectangular
+                                        projection around the mean latitude of the activity
+
+        Returns:
+            pd.DataFrame: the kept rows of activities_coordinates_df
+        """
+        activity_codes = pd.factorize(activities_coordinates_df['activity_id'])[0]
+        # group the points by activity, keeping the order of the points inside an activity
+        activity_order = np.argsort(activity_codes, kind='stable')
+        activity_codes = activity_codes[activity_order]
+        lat = activities_coordinates_df['lat'].to_numpy(dtype='float64')[activity_order]
+        lon = activities_coordinates_df['lon'].to_numpy(dtype='float64')[activity_order]
+        # local equirectangular projection in meters around the mean latitude of each activity
+        mean_lat = np.bincount(activity_codes, weights=lat) / np.bincount(activity_codes)
+        x = np.radians(lon) * EARTH_RADIUS_METERS * np.cos(np.radians(mean_lat[activity_codes]))
+        y = np.radians(lat) * EARTH_RADIUS_METERS
+        keep = np.empty(len(activity_order), dtype=bool)
+        keep[activity_order] = self.__douglas_peucker(
+            x=x,
+            y=y,
+            activity_codes=activity_codes,
+            simplify_tolerance=simplify_tolerance
+        )
+        simplified_coordinates_df = activities_coordinates_df[keep]
+
+        # approximate size of a point in the html file: [lat, lon], estimated from the first points
+        sample_coordinates_df = activities_coordinates_df.head(10_000)
+        point_bytes = (
+            sample_coordinates_df['lat'].astype(str).str.len()
+            + sample_coordinates_df['lon'].astype(str).str.len()
+        ).mean() + 6
+        saved_points = len(keep) - keep.sum()
+        print(f"Simplification ({simplify_tolerance:.1f} m): kept {keep.sum()} of {len(keep)} points, "
+              f"saved {saved_points} points and about {saved_points * point_bytes / 1e6:.1f} MB")
+        return simplified_coordinates_df
+
+
+    def get_activities_statistics(
+        self,
+        use_cache: bool=True
+        ) -> Dict[str, object]:
+        """Summary statistics of the activities, computed from a single groupby
+           by type, year and month that is rolled up to the per type, per year
+           and per month breakdowns, activities without a type or start date are
+           kept in their own group. The totals count every activity id once.
+
+           The result is cached for the activities_df object (by identity, not by
+           its contents), so repeated renders reuse it without touching the rows.
+           Assigning a new activities_df is picked up automatically, but an in
+           place change of activities_df (e.g. activities_df.loc[...] = ...) is
+           not: the cached statistics are returned until use_cache=False
+           recomputes them.
+
+        Args:
+            use_cache (bool, optional): Reuse the statistics of the same activities_df object,
+                                        pass False after changing activities_df in place.
+                                        Defaults to True.
+
+        Returns:
+            Dict[str, object]: totals ("total_activities", "total_distance" and
+                               "total_elevation_gain" in km, "total_moving_time"
+                               as timedelta, the breakdowns keep it in seconds,
+                               "longest_activity" in km, "longest_activity_date")
+                               and the DataFrames "by_type", "by_year", "by_month"
+        """
+        # the cache holds a reference to the activities_df, so its id can not be reused
+        if use_cache and self.activities_statistics_cache[0] is self.activities_df:
+            return self.activities_statistics_cache[1]
+        statistics_columns = ['id', 'type', 'distance', 'moving_time', 'total_elevation_gain', 'start_date_local']
+        activities_df = self.activities_df.filter(items=statistics_columns)
+
+        start_date_local = pd.to_datetime(activities_df['start_date_local'], utc=True)
+        activities_statistics_df = (
+            activities_df
+            .assign(
+                year=start_date_local.dt.year,
+                month=start_date_local.dt.month
+            )
+            .groupby(['type', 'year', 'month'], dropna=False)
+            .agg(
+                activities=('id', 'nunique'),
+                distance=('distance', 'sum'),
+                moving_time=('moving_time', 'sum'),
+                total_elevation_gain=('total_elevation_gain', 'sum')
+            )
+        )
+        longest_activity_index = activities_df['distance'].idxmax()
+        activities_statistics = {
+            "total_activities": int(activities_df['id'].nunique()),
+            "total_distance": round(activities_statistics_df['distance'].sum() / 1000, 1),
+            "total_moving_time": timedelta(seconds=int(activities_statistics_df['moving_time'].sum())),
+            "total_elevation_gain": round(activities_statistics_df['total_elevation_gain'].sum() / 1000, 1),
+            "longest_activity": round(activities_df.at[longest_activity_index, 'distance'] / 1000, 1),
+            "longest_activity_date": start_date_local.at[longest_activity_index].strftime('%b %Y'),
+            "by_type": activities_statistics_df.groupby(level='type', dropna=False).sum(),
+            "by_year": activities_statistics_df.groupby(level='year', dropna=False).sum(),
+            "by_month": activities_statistics_df.groupby(level=['year', 'month'], dropna=False).sum()
+        }
+        self.activities_statistics_cache = (self.activities_df, activities_statistics)
+        return activities_statistics
+
+
     def __create_activities_statistics(
         self
         ) -> str:
         # Summary statistics
-        activities_df = self.activities_df
-
-        total_activities = activities_df['id'].nunique()
-        total_distance = round(activities_df['distance'].sum() / 1000, 1)
-        total_moving_time = timedelta(seconds=int((activities_df.assign(moving_time=activities_df['moving_time'] * 60)['moving_time']).sum()))
-        total_elevation_gain = round(activities_df['total_elevation_gain'].sum() / 1000, 1)
-        longest_activity = round(activities_df[activities_df['distance'] == activities_df['distance'].max()].filter(items=['distance']) / 1000, 1).to_string(index=False, header=False)
-        longest_activity_date = activities_df[activities_df['distance'] == activities_df['distance'].max()] \
-            .filter(items=['start_date_local']) \
-            .assign(activity_date=lambda row: row['start_date_local'].dt.strftime(date_format='%b %Y')) \
-            .to_string(index=False, header=False)
+        activities_statistics = self.get_activities_statistics()
         # max_speed = round(activities_df['max_speed'].max(), 1)
         # avg_speed = round(activities_df['average_speed'].mean(), 1)
 
         # Add the summary statistics to the saved activities_map.png file
         full_text_str = f"\n\
-        Total activities: {total_activities}\n\
-        Total distance (in km): {total_distance}\n\
-        Total moving time (in days, hours, minutes, seconds): {total_moving_time}\n\
-        Total elevation gain (in km): {total_elevation_gain}\n\
-        Longest activity (in km): {longest_activity} ({longest_activity_date})\n\
+        Total activities: {activities_statistics['total_activities']}\n\
+        Total distance (in km): {activities_statistics['total_distance']}\n\
+        Total moving time (in days, hours, minutes, seconds): {activities_statistics['total_moving_time']}\n\
+        Total elevation gain (in km): {activities_statistics['total_elevation_gain']}\n\
+        Longest activity (in km): {activities_statistics['longest_activity']} ({activities_statistics['longest_activity_date']})\n\
         "
         return full_text_str
 
 
+    def __get_projected_polylines(
+        self,
+        image_size: tuple,
+        margin: int=50,
+        simplify_tolerance: float=None
+        ) -> tuple:
+        """Project the coordinates of the activities to web mercator and fit them
+           into the image, the polylines are grouped by activity and optionally
+           simplified with a tolerance in image units.
+
+        Returns:
+            tuple: list of (color, flat [x0, y0, x1, y1, ...] list) per activity and the
+                   projection (x and y of the image origin in zoom 0 pixels, image pixels
+                   per zoom 0 pixel)
+        """
+        activities_coordinates_df = self.join_activities_coordinates()
+        activities_coordinates_df = activities_coordinates_df[activities_coordinates_df['activity_type'].isin(list(self.activity_colors))]
+        x, y = project_web_mercator(
+            lat=activities_coordinates_df['lat'].to_numpy(),
+            lon=activities_coordinates_df['lon'].to_numpy(),
+            map_zoom=0
+        )
+        # fit the bounds of the coordinates into the image, keeping the aspect ratio
+        width, height = image_size
+        x_min, x_max, y_min, y_max = x.min(), x.max(), y.min(), y.max()
+        scale = min((width - 2 * margin) / max(x_max - x_min, 1e-9), (height - 2 * margin) / max(y_max - y_min, 1e-9))
+        origin_x = x_min - (width / scale - (x_max - x_min)) / 2
+        origin_y = y_min - (height / scale - (y_max - y_min)) / 2
+        xy = np.column_stack(((x - origin_x) * scale, (y - origin_y) * scale))
+
+        # one slice of points per activity, keeping the order of the points
+        activity_codes = pd.factorize(activities_coordinates_df['activity_id'])[0]
+        activity_order = np.argsort(activity_codes, kind='stable')
+        activity_codes = activity_codes[activity_order]
+        xy = xy[activity_order]
+        activity_types = activities_coordinates_df['activity_type'].to_numpy()[activity_order]
+        if simplify_tolerance is not None:
+            keep = self.__douglas_peucker(
+                x=xy[:, 0],
+                y=xy[:, 1],
+                activity_codes=activity_codes,
+                simplify_tolerance=simplify_tolerance
+            )
+            xy, activity_codes, activity_types = xy[keep], activity_codes[keep], activity_types[keep]
+        activity_starts = np.flatnonzero(np.diff(activity_codes)) + 1
+        polylines = [
+            (self.activity_colors[activity_types[activity_start]], activity_xy.ravel().tolist())
+            for activity_start, activity_xy in zip(
+                np.append(0, activity_starts),
+                np.split(xy, activity_starts)
+            )
+        ]
+        return polylines, (origin_x, origin_y, scale)
+
+
+    def __render_basemap(
+        self,
+        image_size: tuple,
+        projection: tuple,
+        basemap_tiles_path: str,
+        background_color: tuple
+        ) -> Image.Image:
+        """Stitch the basemap of the image from locally cached z/x/y .png tiles,
+           at the lowest zoom level that is at least as detailed as the image.
+           Missing tiles are left in the background color."""
+        width, height = image_size
+        origin_x, origin_y, scale = projection
+        map_zoom = int(np.clip(np.ceil(np.log2(scale)), 0, 19))
+        tiles_per_axis = 2 ** map_zoom
+        # image bounds in pixels of the basemap zoom level
+        x_min, y_min = origin_x * tiles_per_axis, origin_y * tiles_per_axis
+        x_max, y_max = x_min + width / scale * tiles_per_axis, y_min + height / scale * tiles_per_axis
+        tile_x_min, tile_y_min = int(x_min // TILE_SIZE), int(y_min // TILE_SIZE)
+        tile_x_max, tile_y_max = int(x_max // TILE_SIZE), int(y_max // TILE_SIZE)
+        basemap_img = Image.new(
+            'RGB',
+            ((tile_x_max - tile_x_min + 1) * TILE_SIZE, (tile_y_max - tile_y_min + 1) * TILE_SIZE),
+            background_color
+        )
+        for tile_x in range(tile_x_min, tile_x_max + 1):
+            for tile_y in range(max(tile_y_min, 0), min(tile_y_max, tiles_per_axis - 1) + 1):
+                tile_full_path = f"{basemap_tiles_path}/{map_zoom}/{tile_x % tiles_per_axis}/{tile_y}.png"
+                if os.path.isfile(tile_full_path):
+                    with Image.open(tile_full_path) as tile_img:
+                        basemap_img.paste(
+                            tile_img.convert('RGB').resize((TILE_SIZE, TILE_SIZE)),
+                            ((tile_x - tile_x_min) * TILE_SIZE, (tile_y - tile_y_min) * TILE_SIZE)
+                        )
+        crop_x, crop_y = x_min - tile_x_min * TILE_SIZE, y_min - tile_y_min * TILE_SIZE
+        return basemap_img.resize(
+            image_size,
+            Image.LANCZOS,
+            box=(crop_x, crop_y, crop_x + x_max - x_min, crop_y + y_max - y_min)
+        )
+
+
+    def __render_png(
+        self,
+        png_size: tuple,
+        line_width: int,
+        line_opacity: float,
+        background_color: tuple,
+        basemap_tiles_path: str
+        ) -> Image.Image:
+        """Draw the activities as semi transparent lines on the optional basemap
+           without a browser, the lines are alpha blended so frequently used
+           routes get brighter."""
+        polylines, projection = self.__get_projected_polylines(image_size=png_size)
+        if basemap_tiles_path is not None:
+            activities_map_img = self.__render_basemap(
+                image_size=png_size,
+                projection=projection,
+                basemap_tiles_path=basemap_tiles_path,
+                background_color=background_color
+            )
+        else:
+            activities_map_img = Image.new('RGB', png_size, background_color)
+        # blend every line onto the image, overlapping activities build up the density
+        lines_draw_object = ImageDraw.Draw(activities_map_img, 'RGBA')
+        line_alpha = int(round(line_opacity * 255))
+        for line_color, line_xy in polylines:
+            if len(line_xy) >= 4:
+                lines_draw_object.line(line_xy, fill=ImageColor.getrgb(line_color)[:3] + (line_alpha,), width=line_width)
+        return activities_map_img
+
+
     def create_png(
         self,
         heatmap_png_file_path: str,
@@ -194,15 +818,48 @@ class StravaActivitiesHeatmap(object):
         font_size_statistics: int,
         text_color_statistics: tuple,
         display_statistics: bool=True,
+        render_engine: str="browser",
+        line_width: int=1,
+        line_opacity: float=0.6,
+        background_color: tuple=(0, 0, 0),
+        basemap_tiles_path: str=None,
         **kwargs
         ):
-        if self.activities_folium_map_object is not None:
-            activities_map = self.activities_folium_map_object
-            # Transfer to png file format
-            activities_map_data = activities_map._to_png(5)
-            activities_map_img = Image.open(io.BytesIO(activities_map_data))
-            # resize the given data to the set size
-            activities_map_img_resized = activities_map_img.resize(png_size, Image.LANCZOS)
+        """Create the .png heatmap with the activity statistics in the lower right corner.
+
+        Args:
+            render_engine (str, optional): "browser" takes a screenshot of the .html heatmap of
+                                           create_html, "pillow" draws the activities directly from
+                                           their projected coordinates without a browser.
+                                           Defaults to "browser".
+            line_width (int, optional): Line width in pixels of the pillow engine. Defaults to 1.
+            line_opacity (float, optional): Line opacity of the pillow engine. Defaults to 0.6.
+            background_color (tuple, optional): Background of the pillow engine where there is
+                                                no basemap. Defaults to (0, 0, 0).
+            basemap_tiles_path (str, optional): Place of locally cached z/x/y .png map tiles used as
+                                                basemap by the pillow engine.
+                                                Defaults to None (no basemap).
+        """
+        if render_engine not in ["browser", "pillow"]:
+            raise ValueError(f"render_engine is expected to be browser or pillow, got: {render_engine}")
+        if render_engine == "browser" and self.activities_folium_map_object is None:
+            print("Create the .html heatmap first")
+        else:
+            if render_engine == "browser":
+                activities_map = self.activities_folium_map_object
+                # Transfer to png file format
+                activities_map_data = activities_map._to_png(5)
+                activities_map_img = Image.open(io.BytesIO(activities_map_data))
+                # resize the given data to the set size
+                activities_map_img_resized = activities_map_img.resize(png_size, Image.LANCZOS)
+            else:
+                activities_map_img_resized = self.__render_png(
+                    png_size=png_size,
+                    line_width=line_width,
+                    line_opacity=line_opacity,
+                    background_color=background_color,
+                    basemap_tiles_path=basemap_tiles_path
+                )
             # Create a drawing object
             activities_map_draw_object = ImageDraw.Draw(activities_map_img_resized)
             # Load a font (you may need to specify the path to a .ttf font file)
@@ -237,8 +894,194 @@ class StravaActivitiesHeatmap(object):
                         dpi=png_dpi
                             )
                     print(f"{heatmap_png_filename} succesfully saved at: {heatmap_png_full_save_path}")
+
+
+    def __create_pdf_content(
+        self,
+        page_size: tuple,
+        polylines: List[tuple],
+        line_width: float,
+        background_color: tuple,
+        statistics_lines: List[str],
+        font_size_statistics: int,
+        text_color_statistics: tuple
+        ) -> bytes:
+        """PDF content stream of the page, the y axis of PDF points upwards."""
+        width, height = page_size
+        content = [
+            "{:.3f} {:.3f} {:.3f} rg 0 0 {} {} re f".format(*[value / 255 for value in background_color], width, height),
+            f"/GS1 gs {line_width} w 1 J 1 j"
+        ]
+        for line_color, line_xy in polylines:
+            if len(line_xy) < 4:
+                continue
+            content.append("{:.3f} {:.3f} {:.3f} RG".format(*[value / 255 for value in ImageColor.getrgb(line_color)[:3]]))
+            content.append(f"{line_xy[0]:.2f} {height - line_xy[1]:.2f} m")
+            content.extend(f"{x:.2f} {height - y:.2f} l" for x, y in zip(line_xy[2::2], line_xy[3::2]))
+            content.append("S")
+        if statistics_lines:
+            # Helvetica is about 0.55 em wide per character, used to right align the text
+            margin = 50
+            text_x = width - margin - 0.55 * font_size_statistics * max(len(line) for line in statistics_lines)
+            text_y = margin + 1.2 * font_size_statistics * (len(statistics_lines) - 1)
+            content.append("/GS2 gs BT {:.3f} {:.3f} {:.3f} rg".format(*[value / 255 for value in text_color_statistics[:3]]))
+            content.append(f"/F1 {font_size_statistics} Tf {1.2 * font_size_statistics:.1f} TL {text_x:.2f} {text_y:.2f} Td")
+            for line in statistics_lines:
+                line = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+                content.append(f"({line}) Tj T*")
+            content.append("ET")
+        return "\n".join(content).encode("latin-1", errors="replace")
+
+
+    def __create_svg(
+        self,
+        page_size: tuple,
+        polylines: List[tuple],
+        line_width: float,
+        line_opacity: float,
+        background_color: tuple,
+        statistics_lines: List[str],
+        font_size_statistics: int,
+        text_color_statistics: tuple
+        ) -> str:
+        """SVG document of the heatmap, the polylines are grouped by color."""
+        width, height = page_size
+        color_polylines = {}
+        for line_color, line_xy in polylines:
+            if len(line_xy) >= 4:
+                points = " ".join(f"{x:.2f},{y:.2f}" for x, y in zip(line_xy[0::2], line_xy[1::2]))
+                color_polylines.setdefault(line_color, []).append(f'<polyline points="{points}"/>')
+        svg = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}pt" height="{height}pt" viewBox="0 0 {width} {height}">',
+            '<rect width="100%" height="100%" fill="rgb{}"/>'.format(tuple(background_color[:3]))
+        ]
+        for line_color, color_polyline in color_polylines.items():
+            svg.append(f'<g fill="none" stroke="{line_color}" stroke-width="{line_width}" stroke-opacity="{line_opacity}" stroke-linecap="round" stroke-linejoin="round">')
+            svg.extend(color_polyline)
+            svg.append('</g>')
+        if statistics_lines:
+            margin = 50
+            text_y = height - margin - 1.2 * font_size_statistics * (len(statistics_lines) - 1)
+            svg.append('<text x="{}" y="{:.2f}" font-family="Helvetica, Arial, sans-serif" font-size="{}" fill="rgb{}" text-anchor="end">'.format(
+                width - margin, text_y, font_size_statistics, tuple(text_color_statistics[:3])))
+            for line_number, line in enumerate(statistics_lines):
+                line = line.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+                svg.append(f'<tspan x="{width - margin}" dy="{0 if line_number == 0 else 1.2 * font_size_statistics:.1f}">{line}</tspan>')
+            svg.append('</text>')
+        svg.append('</svg>')
+        return "\n".join(svg)
+
+
+    def __write_pdf(
+        self,
+        pdf_full_save_path: str,
+        page_size: tuple,
+        content: bytes,
+        line_opacity: float
+        ):
+        """Write a single page PDF with the compressed content stream, the built
+           in Helvetica font and the graphics states of the line opacity (GS1)
+           and the opaque text (GS2)."""
+        content = zlib.compress(content)
+        pdf_objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+            (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_size[0]} {page_size[1]}] /Contents 4 0 R "
+             f"/Resources << /Font << /F1 5 0 R >> /ExtGState << /GS1 6 0 R /GS2 7 0 R >> >> >>").encode(),
+            f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode() + content + b"\nendstream",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            f"<< /Type /ExtGState /CA {line_opacity} >>".encode(),
+            b"<< /Type /ExtGState /CA 1 /ca 1 >>"
+        ]
+        pdf = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for object_number, pdf_object in enumerate(pdf_objects, start=1):
+            offsets.append(len(pdf))
+            pdf += f"{object_number} 0 obj\n".encode() + pdf_object + b"\nendobj\n"
+        xref_offset = len(pdf)
+        pdf += f"xref\n0 {len(pdf_objects) + 1}\n0000000000 65535 f \n".encode()
+        pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+        pdf += f"trailer\n<< /Size {len(pdf_objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+        with open(pdf_full_save_path, "wb") as f:
+            f.write(pdf)
+
+
+    def create_vector(
+        self,
+        heatmap_vector_file_path: str,
+        vector_format: str="pdf",
+        page_size: tuple=(2384, 1684),
+        line_width: float=0.5,
+        line_opacity: float=0.6,
+        background_color: tuple=(0, 0, 0),
+        simplify_tolerance: float=0.25,
+        display_statistics: bool=True,
+        font_size_statistics: int=20,
+        text_color_statistics: tuple=(255, 255, 255),
+        **kwargs
+        ):
+        """Create the heatmap as vector .pdf or .svg file, the activities are written
+           as vector paths straight from their projected coordinates instead of
+           embedding the .png, so the file stays small and prints at any size.
+
+        Args:
+            heatmap_vector_file_path (str): Place where to save the file.
+            vector_format (str, optional): "pdf" or "svg". Defaults to "pdf".
+            page_size (tuple, optional): Width and height in points (1/72 inch).
+                                         Defaults to (2384, 1684) (A1 landscape).
+            line_width (float, optional): Line width in points. Defaults to 0.5.
+            line_opacity (float, optional): Line opacity. Defaults to 0.6.
+            background_color (tuple, optional): Background color. Defaults to (0, 0, 0).
+            simplify_tolerance (float, optional): Tolerance in points of the polyline simplification,
+                                                  0.25 points are not visible in print.
+                                                  Defaults to 0.25 (None keeps all points).
+            display_statistics (bool, optional): Add the activity statistics in the lower right corner.
+                                                 Defaults to True.
+            font_size_statistics (int, optional): Font size in points of the statistics. Defaults to 20.
+            text_color_statistics (tuple, optional): Color of the statistics. Defaults to (255, 255, 255).
+        """
+        if vector_format not in ["pdf", "svg"]:
+            raise AttributeError(f"vector_format is expected to be pdf or svg, got: {vector_format}")
+        polylines, _ = self.__get_projected_polylines(
+            image_size=page_size,
+            simplify_tolerance=simplify_tolerance
+        )
+        statistics_lines = []
+        if display_statistics:
+            statistics_lines = [line.strip() for line in self.__create_activities_statistics().splitlines() if line.strip()]
+        # check if there was provided a different file name in the **kwargs
+        heatmap_vector_filename = kwargs.get("heatmap_vector_filename", rf"{self.heatmap_filename}.{vector_format}")
+        if not f".{vector_format}" in heatmap_vector_filename:
+            raise AttributeError(f"heatmap_vector_filename is expected to include file ending: .{vector_format}")
+        heatmap_vector_full_save_path = rf"{heatmap_vector_file_path}/{heatmap_vector_filename}"
+        if vector_format == "pdf":
+            self.__write_pdf(
+                pdf_full_save_path=heatmap_vector_full_save_path,
+                page_size=page_size,
+                content=self.__create_pdf_content(
+                    page_size=page_size,
+                    polylines=polylines,
+                    line_width=line_width,
+                    background_color=background_color,
+                    statistics_lines=statistics_lines,
+                    font_size_statistics=font_size_statistics,
+                    text_color_statistics=text_color_statistics
+                ),
+                line_opacity=line_opacity
+            )
         else:
-            print("Create the .html heatmap first")
+            with open(heatmap_vector_full_save_path, "w", encoding="utf-8") as f:
+                f.write(self.__create_svg(
+                    page_size=page_size,
+                    polylines=polylines,
+                    line_width=line_width,
+                    line_opacity=line_opacity,
+                    background_color=background_color,
+                    statistics_lines=statistics_lines,
+                    font_size_statistics=font_size_statistics,
+                    text_color_statistics=text_color_statistics
+                ))
+        print(f"{heatmap_vector_filename} succesfully saved at: {heatmap_vector_full_save_path}")
 
 
     def create_pdf(
@@ -0,0 +1,419 @@
+from typing import Dict, List
+import json
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+from util.ActivityTracks import StravaActivitiesTracks
+
+# Columns of the activities table in the order of the activities overview
+ACTIVITY_STORE_COLUMNS = {
+    "id": "INTEGER PRIMARY KEY",
+    "name": "TEXT",
+    "start_date_local": "TEXT",
+    "type": "TEXT",
+    "distance": "REAL",
+    "moving_time": "INTEGER",
+    "elapsed_time": "INTEGER",
+    "total_elevation_gain": "REAL",
+    "end_latlng": "TEXT",
+    "external_id": "TEXT"
+    }
+ACTIVITY_STORE_DTYPES = {
+    "id": "int64",
+    "distance": "float64",
+    "moving_time": "int64",
+    "elapsed_time": "int64",
+    "total_elevation_gain": "float64"
+    }
+ACTIVITY_STORE_TABLES = ["activities", "points", "splits"]
+POINTS_DTYPE = np.dtype([("lat", "float64"), ("lon", "float64"), ("activity_id", "int64")])
+
+
+class StravaActivityStore(object):
+    """Local store of the activities overview, the coordinates and the splits in
+       one SQLite file instead of an activities .csv file and a .gpx/.csv file
+       per activity.
+
+       The activities are indexed by their id, type and start date, so the
+       filters by type and year are answered by the indexes. The points are
+       clustered by activity id (primary key of activity id and point index),
+       reading or replacing the track of an activity only touches its rows.
+       All writes are upserts, activities and tracks that are saved again
+       replace the stored ones.
+    """
+    def __init__(
+        self,
+        store_path: str
+        ):
+        """Initialisation of the activity store
+
+        Args:
+            store_path (str): Path of the SQLite file, created if not existing.
+        """
+        self.store_path = store_path
+        store_folder_path = os.path.dirname(store_path)
+        if store_folder_path:
+            os.makedirs(store_folder_path, exist_ok=True)
+        # one connection shared by the threads of the client
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(store_path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            activities_columns = ", ".join(f"{column} {column_type}" for column, column_type in ACTIVITY_STORE_COLUMNS.items())
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS activities ({activities_columns})")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS activities_type ON activities (type, start_date_local)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS activities_start_date_local ON activities (start_date_local)")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS points (
+                    activity_id INTEGER,
+                    point_index INTEGER,
+                    lat REAL,
+                    lon REAL,
+                    PRIMARY KEY (activity_id, point_index)
+                ) WITHOUT ROWID"""
+            )
+            # the items of the splits differ per activity type and split item, they are kept as JSON
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS splits (
+                    activity_id INTEGER,
+                    split_item TEXT,
+                    split_index INTEGER,
+                    data TEXT,
+                    PRIMARY KEY (activity_id, split_item, split_index)
+                ) WITHOUT ROWID"""
+            )
+            self.connection.execute("CREATE TABLE IF NOT EXISTS sync_state (name TEXT PRIMARY KEY, value TEXT)")
+
+    def __get_activities_condition(
+        self,
+        activity_ids: List[int]=None,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None,
+        activity_name: List[str]=None
+        ) -> tuple:
+        """Internal helper method - WHERE clause on the activities table and its
+           parameters, the lists are passed as one JSON parameter each."""
+        conditions, params = [], []
+        if activity_ids is not None:
+            conditions.append("id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps([int(activity_id) for activity_id in activity_ids]))
+        if activity_type is not None:
+            conditions.append("type IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(activity_type)))
+        if activity_name is not None:
+            conditions.append("name IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(activity_name)))
+        if activity_year is not None:
+            # ranges of the ISO dates, answered by the start date index
+            conditions.append("(" + " OR ".join(["(start_date_local >= ? AND start_date_local < ?)"] * len(activity_year)) + ")")
+            for year in activity_year:
+                params.extend([f"{int(year):04d}", f"{int(year) + 1:04d}"])
+        return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+    def upsert_activities(
+        self,
+        activities_df: pd.DataFrame
+        ) -> int:
+        """Insert the activities of the overview, activities with a stored id are updated.
+
+        Args:
+            activities_df (pd.DataFrame): activities overview
+
+        Returns:
+            int: number of upserted activities
+        """
+        activities_df = activities_df.reindex(columns=list(ACTIVITY_STORE_COLUMNS.keys())).drop_duplicates(subset=["id"], keep="last")
+        start_dates = pd.to_datetime(activities_df["start_date_local"], format="ISO8601", utc=True)
+        columns = {
+            "id": activities_df["id"].astype("int64").tolist(),
+            "start_date_local": start_dates.dt.strftime("%Y-%m-%dT%H:%M:%SZ").astype(object).where(start_dates.notna(), None).tolist(),
+            "end_latlng": [
+                end_latlng if isinstance(end_latlng, str) or end_latlng is None else json.dumps(list(end_latlng))
+                for end_latlng in activities_df["end_latlng"].astype(object).where(activities_df["end_latlng"].notna(), None)
+                ],
+            }
+        for column in ACTIVITY_STORE_COLUMNS:
+            if column not in columns:
+                columns[column] = activities_df[column].astype(object).where(activities_df[column].notna(), None).tolist()
+        column_names = list(ACTIVITY_STORE_COLUMNS.keys())
+        update_columns = ", ".join(f"{column} = excluded.{column}" for column in column_names if column != "id")
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT INTO activities ({', '.join(column_names)}) VALUES ({', '.join(['?'] * len(column_names))}) "
+                f"ON CONFLICT (id) DO UPDATE SET {update_columns}",
+                zip(*[columns[column] for column in column_names])
+            )
+        return len(activities_df)
+
+    def load_activities(
+        self,
+        activity_ids: List[int]=None,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None,
+        activity_name: List[str]=None
+        ) -> pd.DataFrame:
+        """Load the stored activities with the column dtypes of StravaClient.get_strava_activities,
+           newest activities first.
+
+        Args:
+            activity_ids (List[int], optional): IDs of the loaded activities. Defaults to None.
+            activity_type (List[str], optional): Types of the loaded activities. Defaults to None.
+            activity_year (List[int], optional): Years of the loaded activities. Defaults to None.
+            activity_name (List[str], optional): Names of the loaded activities. Defaults to None.
+
+        Returns:
+            pd.DataFrame: activities overview with one row per activity
+        """
+        condition, params = self.__get_activities_condition(
+            activity_ids=activity_ids,
+            activity_type=activity_type,
+            activity_year=activity_year,
+            activity_name=activity_name
+        )
+        with self.lock:
+            activities_df = pd.read_sql_query(
+                f"SELECT * FROM activities{condition} ORDER BY start_date_local DESC",
+                self.connection,
+                params=params
+            )
+        activities_df = activities_df.astype(ACTIVITY_STORE_DTYPES)
+        activities_df["start_date_local"] = pd.to_datetime(activities_df["start_date_local"], format="ISO8601", utc=True)
+        activities_df["end_latlng"] = activities_df["end_latlng"].map(json.loads, na_action="ignore")
+        return activities_df
+
+    def delete_activities(
+        self,
+        activity_ids: List[int]
+        ):
+        """Delete the activities together with their points and splits."""
+        activity_ids = json.dumps([int(activity_id) for activity_id in activity_ids])
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM activities WHERE id IN (SELECT value FROM json_each(?))", (activity_ids,))
+            for table in ["points", "splits"]:
+                self.connection.execute(f"DELETE FROM {table} WHERE activity_id IN (SELECT value FROM json_each(?))", (activity_ids,))
+
+    def get_activity_ids(
+        self,
+        table: str="points"
+        ) -> List[int]:
+        """IDs of the activities stored in a table of ACTIVITY_STORE_TABLES, e.g. the
+           activities whose points are already saved."""
+        if table not in ACTIVITY_STORE_TABLES:
+            raise ValueError(f"table is expected to be one of: {ACTIVITY_STORE_TABLES}")
+        if table == "activities":
+            query = "SELECT id FROM activities"
+        else:
+            # jump from one activity id to the next one in the primary key instead of
+            # scanning all points (or splits)
+            query = f"""WITH RECURSIVE activity_ids (id) AS (
+                    SELECT MIN(activity_id) FROM {table}
+                    UNION ALL
+                    SELECT (SELECT MIN(activity_id) FROM {table} WHERE activity_id > activity_ids.id)
+                    FROM activity_ids WHERE activity_ids.id IS NOT NULL
+                )
+                SELECT id FROM activity_ids WHERE id IS NOT NULL"""
+        with self.lock:
+            return [row[0] for row in self.connection.execute(query)]
+
+    def save_points(
+        self,
+        activities_coordinates_df: pd.DataFrame
+        ) -> int:
+        """Save the coordinates of the activities, stored points of the same activities
+           are replaced. Also used to convert the output of StravaClient.load_data_from_gpx_files
+           or load_data_from_coordinate_store once into the store.
+
+        Args:
+            activities_coordinates_df (pd.DataFrame): coordinates in the long format
+                                                      (lat, lon, activity_id) in track order
+
+        Returns:
+            int: number of saved activities
+        """
+        activity_ids = activities_coordinates_df["activity_id"].astype("int64")
+        point_indexes = activity_ids.groupby(activity_ids, sort=False).cumcount()
+        unique_activity_ids = activity_ids.unique().tolist()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM points WHERE activity_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(unique_activity_ids),)
+            )
+            self.connection.executemany(
+                "INSERT INTO points VALUES (?, ?, ?, ?)",
+                zip(
+                    activity_ids.tolist(),
+                    point_indexes.tolist(),
+                    activities_coordinates_df["lat"].astype("float64").tolist(),
+                    activities_coordinates_df["lon"].astype("float64").tolist()
+                )
+            )
+        return len(unique_activity_ids)
+
+    def load_points(
+        self,
+        activity_ids: List[int]=None,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None,
+        activity_name: List[str]=None,
+        color_map: Dict[str, str]=None
+        ) -> pd.DataFrame:
+        """Load the coordinates in the long format of StravaClient.load_data_from_gpx_files,
+           the activities are filtered by the indexes of the activities table before
+           their points are read in primary key order.
+
+        Args:
+            activity_ids (List[int], optional): IDs of the loaded activities. Defaults to None.
+            activity_type (List[str], optional): Types of the loaded activities. Defaults to None.
+            activity_year (List[int], optional): Years of the loaded activities. Defaults to None.
+            activity_name (List[str], optional): Names of the loaded activities. Defaults to None.
+            color_map (Dict[str, str], optional): Colors of the activity types, adds the color
+                                                  column if set. Defaults to None.
+
+        Returns:
+            pd.DataFrame: coordinates in the long format
+        """
+        condition, params = self.__get_activities_condition(
+            activity_ids=activity_ids,
+            activity_type=activity_type,
+            activity_year=activity_year,
+            activity_name=activity_name
+        )
+        points_condition = f" WHERE activity_id IN (SELECT id FROM activities{condition})" if condition else ""
+        with self.lock:
+            points_cursor = self.connection.execute(
+                f"SELECT lat, lon, activity_id FROM points{points_condition} ORDER BY activity_id, point_index",
+                params
+            )
+            # the rows are streamed into typed columns without holding a list of tuples
+            points = np.fromiter(points_cursor, dtype=POINTS_DTYPE)
+            activity_types = pd.Series(dict(self.connection.execute("SELECT id, type FROM activities")), dtype=object)
+        activities_coordinates_df = pd.DataFrame({column: points[column] for column in POINTS_DTYPE.names})
+        # the type is looked up once per activity instead of joined to every point
+        activities_coordinates_df["activity_type"] = activities_coordinates_df["activity_id"].map(activity_types).astype("category")
+        if color_map is not None:
+            activities_coordinates_df["color"] = activities_coordinates_df["activity_type"].map(color_map).astype(object)
+        return activities_coordinates_df
+
+    def get_activities_tracks(
+        self,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None,
+        activity_name: List[str]=None,
+        color_map: Dict[str, str]=None,
+        grid_cell_size: float=0.01
+        ) -> StravaActivitiesTracks:
+        """Joined track table of the stored activities and their points for
+           StravaClient.activities_filter and the heatmap renderers, the type, year
+           and name filters are already applied by the store.
+
+        Args:
+            activity_type (List[str], optional): Types of the loaded activities. Defaults to None.
+            activity_year (List[int], optional): Years of the loaded activities. Defaults to None.
+            activity_name (List[str], optional): Names of the loaded activities. Defaults to None.
+            color_map (Dict[str, str], optional): Colors of the activity types. Defaults to None.
+            grid_cell_size (float, optional): Size of the cells of the spatial index in degrees.
+                                              Defaults to 0.01.
+
+        Returns:
+            StravaActivitiesTracks: coordinates joined with the activities
+        """
+        filters = {"activity_type": activity_type, "activity_year": activity_year, "activity_name": activity_name}
+        return StravaActivitiesTracks(
+            activities_df=self.load_activities(**filters),
+            activities_coordinates_df=self.load_points(**filters, color_map=color_map),
+            grid_cell_size=grid_cell_size
+        )
+
+    def save_splits(
+        self,
+        splits_df: pd.DataFrame,
+        split_item: str
+        ) -> int:
+        """Save the output of StravaClient.get_activity_splits, stored splits of the
+           same activities and split item are replaced.
+
+        Args:
+            splits_df (pd.DataFrame): splits with the activity id as id
+            split_item (str): Item of the detailed activity, e.g. "splits_metric" or "laps"
+
+        Returns:
+            int: number of saved activities
+        """
+        if splits_df.empty:
+            return 0
+        activity_ids = splits_df["id"].astype("int64")
+        split_indexes = activity_ids.groupby(activity_ids, sort=False).cumcount()
+        unique_activity_ids = activity_ids.unique().tolist()
+        # one JSON object per split, missing items are null
+        splits_data = splits_df.to_json(orient="records", lines=True).splitlines()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM splits WHERE split_item = ? AND activity_id IN (SELECT value FROM json_each(?))",
+                (split_item, json.dumps(unique_activity_ids))
+            )
+            self.connection.executemany(
+                "INSERT INTO splits VALUES (?, ?, ?, ?)",
+                zip(activity_ids.tolist(), [split_item] * len(splits_df), split_indexes.tolist(), splits_data)
+            )
+        return len(unique_activity_ids)
+
+    def load_splits(
+        self,
+        split_item: str="splits_metric",
+        activity_ids: List[int]=None,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None
+        ) -> pd.DataFrame:
+        """Load the stored splits in the format of StravaClient.get_activity_splits.
+
+        Args:
+            split_item (str, optional): Item of the detailed activity. Defaults to "splits_metric".
+            activity_ids (List[int], optional): IDs of the loaded activities. Defaults to None.
+            activity_type (List[str], optional): Types of the loaded activities. Defaults to None.
+            activity_year (List[int], optional): Years of the loaded activities. Defaults to None.
+
+        Returns:
+            pd.DataFrame: one row per split of the activities
+        """
+        condition, params = self.__get_activities_condition(
+            activity_ids=activity_ids,
+            activity_type=activity_type,
+            activity_year=activity_year
+        )
+        splits_condition = f" AND activity_id IN (SELECT id FROM activities{condition})" if condition else ""
+        with self.lock:
+            splits_data = self.connection.execute(
+                f"SELECT data FROM splits WHERE split_item = ?{splits_condition} ORDER BY activity_id, split_index",
+                [split_item] + params
+            ).fetchall()
+        return pd.DataFrame([json.loads(data) for data, in splits_data])
+
+    def get_sync_state(
+        self,
+        name: str
+        ) -> str:
+        """Stored value of the sync state, None if not set."""
+        with self.lock:
+            row = self.connection.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_sync_state(
+        self,
+        name: str,
+        value: str
+        ):
+        """Store a value of the sync state, e.g. the high-water mark of the activities sync."""
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO sync_state VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                (name, value)
+            )
+
+    def close(
+        self
+        ):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,283 @@
+from typing import Dict, List, Iterator, Iterable
+from collections.abc import Mapping
+import itertools
+import json
+import re
+import numpy as np
+import pandas as pd
+
+# dtypes of the Strava stream types, the coordinates keep float64 for lossless .gpx and .csv files
+STREAM_DTYPES = {
+    "latlng": "float64",
+    "time": "int32",
+    "distance": "float32",
+    "altitude": "float32",
+    "velocity_smooth": "float32",
+    "heartrate": "int32",
+    "cadence": "int32",
+    "watts": "int32",
+    "temp": "int32",
+    "moving": "bool",
+    "grade_smooth": "float32",
+}
+STREAM_KEYS = list(STREAM_DTYPES.keys())
+# stream type of the following "data" array and start of a "data" array in the stream response
+STREAM_KEY_PATTERN = re.compile(rb'"(\w+)"\s*:\s*\{')
+STREAM_DATA_PATTERN = re.compile(rb'"data"\s*:\s*\[')
+NESTED_DATA_END_PATTERN = re.compile(rb'\]\s*\]')
+
+
+def decode_stream_data(
+    key: str,
+    data: List
+    ) -> np.ndarray:
+    """Decode the data list of one stream type into a contiguous typed array,
+       latlng into a (n, 2) array. Integer streams with missing values are
+       decoded as float32 with NaN.
+
+    Args:
+        key (str): stream type, e.g. "latlng" or "heartrate"
+        data (List): data of the stream type in the stream response
+
+    Returns:
+        np.ndarray: typed array of the stream type
+    """
+    dtype = STREAM_DTYPES.get(key, "float32")
+    if key == "latlng":
+        return np.fromiter(itertools.chain.from_iterable(data), dtype=dtype, count=2 * len(data)).reshape(-1, 2)
+    try:
+        return np.fromiter(data, dtype=dtype, count=len(data))
+    except TypeError:
+        # None values of sensor dropouts
+        return np.array([np.nan if value is None else value for value in data], dtype="float32")
+
+
+class StreamResponseDecoder(object):
+    """Incremental decoder of a stream response (requested with key_by_type) that
+       is fed with the chunks of the response body while it is downloaded. The
+       numbers of the "data" arrays are parsed chunk by chunk into arrays by
+       NumPy without creating a Python object per value, only the small
+       remaining metadata (series_type, original_size, ...) is parsed as JSON.
+    """
+    def __init__(
+        self
+        ):
+        # metadata of the response, the data arrays are replaced by empty lists
+        self.metadata_buffer = bytearray()
+        # the search for the next data array starts behind the last one
+        self.search_start = 0
+        self.search_position = 0
+        self.streams = {}
+        # state of the data array that is currently parsed
+        self.stream_key = None
+        self.data_buffer = b""
+        self.data_nested = None
+        self.data_chunks = []
+
+    def feed(
+        self,
+        chunk: bytes
+        ):
+        """Parse the next chunk of the response body."""
+        while chunk:
+            if self.stream_key is None:
+                chunk = self.__feed_metadata(chunk=chunk)
+            else:
+                chunk = self.__feed_data(chunk=chunk)
+
+    def __feed_metadata(
+        self,
+        chunk: bytes
+        ) -> bytes:
+        """Internal helper method - collect the metadata until the next data array
+           starts, returns the part of the chunk behind the opening bracket."""
+        self.metadata_buffer += chunk
+        data_match = STREAM_DATA_PATTERN.search(self.metadata_buffer, self.search_position)
+        if data_match is None:
+            # the opening of a data array can be split over two chunks
+            self.search_position = max(len(self.metadata_buffer) - 16, self.search_start)
+            return b""
+        key_matches = STREAM_KEY_PATTERN.findall(self.metadata_buffer, self.search_start, data_match.start())
+        self.stream_key = key_matches[-1].decode() if key_matches else f"stream_{len(self.streams)}"
+        remaining_chunk = bytes(self.metadata_buffer[data_match.end():])
+        del self.metadata_buffer[data_match.end():]
+        self.metadata_buffer += b"]"
+        self.search_start = self.search_position = len(self.metadata_buffer)
+        return remaining_chunk
+
+    def __feed_data(
+        self,
+        chunk: bytes
+        ) -> bytes:
+        """Internal helper method - parse the numbers of the current data array,
+           returns the part of the chunk behind its closing bracket."""
+        data = self.data_buffer + chunk
+        if self.data_nested is None:
+            stripped_data = data.lstrip()
+            if not stripped_data:
+                self.data_buffer = b""
+                return b""
+            # latlng holds [lat, lon] pairs, an empty array closes at once
+            if stripped_data.startswith(b"]"):
+                self.data_buffer = b""
+                self.__finish_data()
+                return stripped_data[1:]
+            self.data_nested = stripped_data.startswith(b"[")
+        if self.data_nested:
+            end_match = NESTED_DATA_END_PATTERN.search(data)
+            end, end_after = (end_match.start(), end_match.end()) if end_match else (-1, -1)
+        else:
+            end = data.find(b"]")
+            end_after = end + 1
+        if end >= 0:
+            self.__parse_numbers(data=data[:end])
+            self.data_buffer = b""
+            self.__finish_data()
+            return data[end_after:]
+        # the last number can be split over two chunks
+        last_separator = data.rfind(b",")
+        self.__parse_numbers(data=data[:max(last_separator, 0)])
+        self.data_buffer = data[last_separator + 1:]
+        return b""
+
+    def __parse_numbers(
+        self,
+        data: bytes
+        ):
+        """Internal helper method - parse comma separated numbers (and the brackets
+           of the pairs) into an array."""
+        data = data.translate(None, b"[]").replace(b"null", b"nan").replace(b"true", b"1").replace(b"false", b"0")
+        if data.strip(b", \t\r\n"):
+            self.data_chunks.append(np.fromstring(data.decode("ascii"), sep=","))
+
+    def __finish_data(
+        self
+        ):
+        """Internal helper method - concatenate the parsed chunks of the current data
+           array and cast them to the dtype of the stream type."""
+        values = np.concatenate(self.data_chunks) if self.data_chunks else np.empty(0, dtype="float64")
+        if self.stream_key == "latlng" or self.data_nested:
+            values = values.reshape(-1, 2)
+        dtype = STREAM_DTYPES.get(self.stream_key, "float32")
+        # integer streams with sensor dropouts keep NaN as float32
+        if np.issubdtype(np.dtype(dtype), np.integer) and np.isnan(values).any():
+            dtype = "float32"
+        self.streams[self.stream_key] = values.astype(dtype, copy=False)
+        self.stream_key = None
+        self.data_nested = None
+        self.data_chunks = []
+
+    def close(
+        self
+        ) -> tuple:
+        """Finish the decoding.
+
+        Returns:
+            tuple: typed arrays of the stream types and the metadata of the response
+                   (the data arrays are empty lists, error responses are returned unchanged)
+        """
+        if self.stream_key is not None:
+            raise ValueError(f"Stream response ended inside the data of: {self.stream_key}")
+        metadata = json.loads(bytes(self.metadata_buffer)) if self.metadata_buffer.strip() else {}
+        return self.streams, metadata
+
+
+def decode_stream_response(
+    chunks: Iterable[bytes]
+    ) -> tuple:
+    """Decode the chunks of a stream response body incrementally, see StreamResponseDecoder.
+
+    Args:
+        chunks (Iterable[bytes]): chunks of the response body, e.g. response.iter_content()
+
+    Returns:
+        tuple: typed arrays of the stream types and the metadata of the response
+    """
+    stream_response_decoder = StreamResponseDecoder()
+    for chunk in chunks:
+        stream_response_decoder.feed(chunk=chunk)
+    return stream_response_decoder.close()
+
+
+class ActivityStream(Mapping):
+    """Streams of one activity as contiguous typed NumPy arrays (struct of arrays)
+       instead of nested Python lists. The object is a read only mapping of the
+       stream types to their arrays, so it can be passed wherever the unpacked
+       stream dict of StravaClient.unpack_activity_stream is expected.
+    """
+    def __init__(
+        self,
+        streams: Dict[str, np.ndarray],
+        activity_id: int=None
+        ):
+        """Initialisation of the activity stream
+
+        Args:
+            streams (Dict[str, np.ndarray]): typed arrays of the stream types
+            activity_id (int, optional): ID of the activity. Defaults to None.
+        """
+        self.streams = streams
+        self.activity_id = activity_id
+
+    @classmethod
+    def from_response(
+        cls,
+        stream_response: Dict[str, Dict[str, List]],
+        activity_id: int=None
+        ) -> "ActivityStream":
+        """Decode a stream response (requested with key_by_type) into typed arrays.
+
+        Args:
+            stream_response (Dict[str, Dict[str, List]]): activity stream dict
+            activity_id (int, optional): ID of the activity. Defaults to None.
+
+        Returns:
+            ActivityStream: typed streams of the activity
+        """
+        return cls(
+            streams={key: decode_stream_data(key=key, data=value.get("data", [])) for key, value in stream_response.items()},
+            activity_id=activity_id
+        )
+
+    def __getitem__(
+        self,
+        key: str
+        ) -> np.ndarray:
+        return self.streams[key]
+
+    def __iter__(
+        self
+        ) -> Iterator[str]:
+        return iter(self.streams)
+
+    def __len__(
+        self
+        ) -> int:
+        return len(self.streams)
+
+    @property
+    def n_points(
+        self
+        ) -> int:
+        """Number of points of the streams."""
+        return max((len(values) for values in self.streams.values()), default=0)
+
+    @property
+    def nbytes(
+        self
+        ) -> int:
+        """Memory of the arrays in bytes."""
+        return sum(values.nbytes for values in self.streams.values())
+
+    def to_df(
+        self
+        ) -> pd.DataFrame:
+        """Streams as DataFrame with one row per point, latlng is split into lat and lon."""
+        columns = {}
+        for key, values in self.streams.items():
+            if key == "latlng":
+                columns["lat"] = values[:, 0]
+                columns["lon"] = values[:, 1]
+            else:
+                columns[key] = values
+        return pd.DataFrame(columns)
@@ -0,0 +1,196 @@
+from typing import Dict, List
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from util.ActivityHeatmap import project_web_mercator, rasterize_density, TILE_SIZE
+
+
+def render_tile(
+    tile: tuple
+    ) -> str:
+    """Render one density tile and save it as z/x/y .png file, runs in the
+       worker processes of StravaActivitiesTiles.
+
+    Args:
+        tile (tuple): tile path, zoom, tile x, tile y, pixel x and y of the points
+                      inside the tile (relative to the tile), their activity type
+                      codes, the colors of the codes and the max count of the
+                      color ramp
+
+    Returns:
+        str: full path of the saved tile
+    """
+    tiles_path, map_zoom, tile_x, tile_y, x, y, activity_types, activity_colors, max_count = tile
+    tile_image = rasterize_density(
+        x=x,
+        y=y,
+        activity_types=activity_types,
+        activity_colors=activity_colors,
+        image_size=(TILE_SIZE, TILE_SIZE),
+        max_count=max_count
+        )
+    tile_folder_path = f"{tiles_path}/{map_zoom}/{tile_x}"
+    os.makedirs(tile_folder_path, exist_ok=True)
+    tile_full_save_path = f"{tile_folder_path}/{tile_y}.png"
+    Image.fromarray(tile_image, mode='RGBA').save(tile_full_save_path, format='PNG', optimize=True)
+    return tile_full_save_path
+
+
+class StravaActivitiesTiles(object):
+    """Pre-rendered z/x/y density tiles of the activities that can be served as
+       static slippy map tiles. The rendered activities are saved in a state file
+       next to the tiles, later calls only render the tiles touched by newly
+       added activities again.
+    """
+    def __init__(
+        self,
+        activities_coordinates_df: pd.DataFrame,
+        tiles_path: str,
+        activity_colors: Dict[str, str],
+        min_zoom: int=5,
+        max_zoom: int=15,
+        max_count: int=20
+        ):
+        """Initialisation of the tile pyramid
+
+        Args:
+            activities_coordinates_df (pd.DataFrame): coordinates in the long format
+            tiles_path (str): Place where the z/x/y tiles are saved.
+            activity_colors (Dict[str, str]): Colors of the activity types.
+            min_zoom (int, optional): Lowest rendered zoom level. Defaults to 5.
+            max_zoom (int, optional): Highest rendered zoom level. Defaults to 15.
+            max_count (int, optional): Points per pixel at which the color is fully opaque,
+                                       fixed for all tiles so that they fit together.
+                                       Defaults to 20.
+        """
+        if activities_coordinates_df.empty:
+            raise Exception("activities_coordinates_df is empty")
+        self.activities_coordinates_df = activities_coordinates_df
+        self.tiles_path = tiles_path
+        self.activity_colors = activity_colors
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.max_count = max_count
+        self.tiles_state_full_save_path = f"{tiles_path}/tiles_state.json"
+        # the worker processes compare small integer codes instead of type names
+        activity_types = list(activity_colors.keys())
+        self.activity_type_codes = pd.Categorical(
+            activities_coordinates_df['activity_type'],
+            categories=activity_types
+            ).codes
+        self.activity_code_colors = {
+            activity_code: activity_colors[activity_type]
+            for activity_code, activity_type in enumerate(activity_types)
+            }
+
+    def __load_tiles_state(
+        self
+        ) -> Dict:
+        """Internal helper method - load the state of the saved tiles, None if
+           there are no tiles yet or they were rendered with other settings.
+        """
+        if not os.path.isfile(self.tiles_state_full_save_path):
+            return None
+        with open(self.tiles_state_full_save_path) as json_file:
+            tiles_state = json.load(json_file)
+        settings = {
+            "min_zoom": self.min_zoom,
+            "max_zoom": self.max_zoom,
+            "max_count": self.max_count,
+            "activity_colors": self.activity_colors
+            }
+        if any(tiles_state.get(key) != value for key, value in settings.items()):
+            print("Tile settings changed, all tiles are rendered again")
+            return None
+        return tiles_state
+
+    def __get_zoom_tiles(
+        self,
+        map_zoom: int,
+        new_activities: np.ndarray
+        ) -> List[tuple]:
+        """Internal helper method - group the points of the zoom level by tile,
+           only tiles with points of the new activities are returned.
+        """
+        x, y = project_web_mercator(
+            lat=self.activities_coordinates_df['lat'].to_numpy(),
+            lon=self.activities_coordinates_df['lon'].to_numpy(),
+            map_zoom=map_zoom
+            )
+        tiles_per_axis = 2 ** map_zoom
+        tile_x = np.clip(x // TILE_SIZE, 0, tiles_per_axis - 1).astype('int64')
+        tile_y = np.clip(y // TILE_SIZE, 0, tiles_per_axis - 1).astype('int64')
+        # pixels relative to their tile are small enough for float32
+        x = (x - tile_x * TILE_SIZE).astype('float32')
+        y = (y - tile_y * TILE_SIZE).astype('float32')
+        tile_keys = tile_x * tiles_per_axis + tile_y
+        touched_tile_keys = np.unique(tile_keys[new_activities])
+        # points of the touched tiles sorted by tile, every tile is one slice
+        touched_points = np.flatnonzero(np.isin(tile_keys, touched_tile_keys))
+        touched_points = touched_points[np.argsort(tile_keys[touched_points], kind='stable')]
+        tile_keys, tile_starts = np.unique(tile_keys[touched_points], return_index=True)
+        tile_ends = np.append(tile_starts[1:], len(touched_points))
+        return [
+            (
+                self.tiles_path,
+                map_zoom,
+                int(tile_key // tiles_per_axis),
+                int(tile_key % tiles_per_axis),
+                x[touched_points[tile_start:tile_end]],
+                y[touched_points[tile_start:tile_end]],
+                self.activity_type_codes[touched_points[tile_start:tile_end]],
+                self.activity_code_colors,
+                self.max_count
+            )
+            for tile_key, tile_start, tile_end in zip(tile_keys, tile_starts, tile_ends)
+            ]
+
+    def create_tiles(
+        self,
+        rebuild: bool=False,
+        max_workers: int=None
+        ) -> int:
+        """Render the density tiles of all zoom levels. Tiles without points are
+           skipped and, unless rebuild is set, only the tiles that hold points of
+           activities added since the last call are rendered again.
+
+        Args:
+            rebuild (bool, optional): Render all tiles, needed after activities were removed.
+                                      Defaults to False.
+            max_workers (int, optional): Number of processes that render the tiles.
+                                         Defaults to None (number of CPUs).
+
+        Returns:
+            int: number of rendered tiles
+        """
+        os.makedirs(self.tiles_path, exist_ok=True)
+        activity_ids = self.activities_coordinates_df['activity_id'].to_numpy()
+        tiles_state = None if rebuild else self.__load_tiles_state()
+        rendered_activity_ids = [] if tiles_state is None else tiles_state["activity_ids"]
+        new_activities = ~np.isin(activity_ids, rendered_activity_ids)
+        if not new_activities.any():
+            print("No new activities, tiles are up to date")
+            return 0
+        # the tiles of all zoom levels are queued at once, so the few large tiles
+        # of the low zoom levels are rendered next to the many small ones
+        tiles = []
+        for map_zoom in range(self.min_zoom, self.max_zoom + 1):
+            zoom_tiles = self.__get_zoom_tiles(map_zoom=map_zoom, new_activities=new_activities)
+            print(f"Tiles to render of zoom {map_zoom}: {len(zoom_tiles)}")
+            tiles.extend(zoom_tiles)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            number_rendered_tiles = len(list(executor.map(render_tile, tiles, chunksize=max(1, len(tiles) // 256))))
+        with open(self.tiles_state_full_save_path, 'w') as outfile:
+            json.dump({
+                "activity_ids": sorted(int(activity_id) for activity_id in np.unique(activity_ids)),
+                "min_zoom": self.min_zoom,
+                "max_zoom": self.max_zoom,
+                "max_count": self.max_count,
+                "activity_colors": self.activity_colors
+                }, outfile)
+        print(f"Tiles saved at: {self.tiles_path}")
+        return number_rendered_tiles
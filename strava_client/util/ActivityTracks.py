@@ -0,0 +1,275 @@
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+ACTIVITIES_NUMERIC_COLUMNS = ['distance', 'moving_time', 'elapsed_time', 'total_elevation_gain']
+BOUNDING_BOX_MODES = ["points", "tracks"]
+
+
+def get_bounding_box_limits(
+    bounding_box: Dict[str, float]
+    ) -> tuple:
+    """Latitude and longitude limits (lat_min, lat_max, lon_min, lon_max) of the
+       corners of a bounding box."""
+    return (
+        min(bounding_box['latitude_bottom_left'], bounding_box['latitude_bottom_right']),
+        max(bounding_box['latitude_top_left'], bounding_box['latitude_top_right']),
+        min(bounding_box['longitude_bottom_left'], bounding_box['longitude_top_left']),
+        max(bounding_box['longitude_bottom_right'], bounding_box['longitude_top_right']),
+    )
+
+
+class StravaActivitiesTracks(object):
+    """Coordinates of the activities joined once with the activities overview,
+       shared by StravaClient.activities_filter and the heatmap renderers so that
+       neither has to join the coordinates or parse the start dates again.
+
+       The activities are kept once per activity with typed columns (parsed start
+       dates, categorical type and name) and every coordinate holds the position of
+       its activity, the filters are therefore evaluated per activity and only
+       gathered to the coordinates.
+
+       Bounding box queries use a spatial index that is built on the first query:
+       the bounding box of every activity and the coordinates sorted by the cells
+       of a regular latitude/longitude grid, a query only reads the grid cells
+       that overlap the bounding box.
+    """
+    def __init__(
+        self,
+        activities_df: pd.DataFrame,
+        activities_coordinates_df: pd.DataFrame,
+        grid_cell_size: float=0.01
+        ):
+        """Initialisation of the joined track table
+
+        Args:
+            activities_df (pd.DataFrame): activities overview
+            activities_coordinates_df (pd.DataFrame): coordinates in the long format
+            grid_cell_size (float, optional): Size of the cells of the spatial index in degrees.
+                                              Defaults to 0.01 (about 1 km).
+        """
+        if activities_df.empty or activities_coordinates_df.empty:
+            raise Exception(f"activities_df and or activities_coordinates_df is empty: activities_df.empty: {activities_df.empty}\
+                              activities_coordinates_df.empty: {activities_coordinates_df.empty}")
+        self.activities_df = self.__prepare_activities(activities_df=activities_df)
+        # Position of the activity of every coordinate, -1 for coordinates without activity
+        activity_index = pd.Index(self.activities_df['id']).get_indexer(activities_coordinates_df['activity_id'])
+        coordinates_mask = activity_index >= 0
+        if not coordinates_mask.all():
+            activities_coordinates_df = activities_coordinates_df[coordinates_mask]
+            activity_index = activity_index[coordinates_mask]
+        self.activity_index = activity_index.astype('int32')
+        self.joined_coordinates_df = self.__join_coordinates(activities_coordinates_df=activities_coordinates_df)
+        self.grid_cell_size = grid_cell_size
+        # spatial index, built on the first bounding box query
+        self.activities_bounding_box_df = None
+        self.grid_index = None
+
+
+    def __prepare_activities(
+        self,
+        activities_df: pd.DataFrame
+        ) -> pd.DataFrame:
+        """Internal helper method - keep the activities with coordinates once per id
+           and type their columns."""
+        # Remove all activities from the overview that dont hold values for the parameter
+        # end_latlng since they dont have any relevant coordinates, the end_latlng is a list
+        # as returned by the API (create_activities_df) or its string as read from the .csv file
+        if 'end_latlng' in activities_df.columns:
+            activities_df = activities_df[activities_df['end_latlng'].astype(str) != "[]"]
+        activities_df = activities_df.drop_duplicates(subset=['id']).reset_index(drop=True)
+        if 'distance' not in activities_df.columns:
+            activities_df = activities_df.assign(distance=0)
+        # Transform the starting date and time once per activity instead of once per coordinate
+        if 'start_date_local' in activities_df.columns:
+            activities_df['start_date_local'] = pd.to_datetime(activities_df['start_date_local'])
+        else:
+            activities_df = activities_df.assign(start_date_local=pd.Timestamp.now(tz='UTC').replace(tzinfo=None))
+        activities_df['id'] = activities_df['id'].astype('int64')
+        for column in ACTIVITIES_NUMERIC_COLUMNS:
+            if column in activities_df.columns:
+                activities_df[column] = pd.to_numeric(activities_df[column], errors='coerce')
+        # Text columns (type, name, ...) are stored as categories, joined to the coordinates
+        # only their integer codes are repeated instead of the strings. Columns of lists
+        # (end_latlng, ...) are not hashable and stay object columns
+        for column in activities_df.columns:
+            if (pd.api.types.is_object_dtype(activities_df[column]) or pd.api.types.is_string_dtype(activities_df[column])) \
+                    and pd.api.types.infer_dtype(activities_df[column], skipna=True) in ("string", "empty"):
+                activities_df[column] = activities_df[column].astype('category')
+        return activities_df
+
+
+    def __join_coordinates(
+        self,
+        activities_coordinates_df: pd.DataFrame
+        ) -> pd.DataFrame:
+        """Internal helper method - left join the activities to the coordinates by
+           gathering the activity rows at the activity positions of the coordinates."""
+        joined_columns = {
+            column: activities_coordinates_df[column].array
+            for column in activities_coordinates_df.columns
+        }
+        if 'activity_type' in joined_columns and not isinstance(activities_coordinates_df['activity_type'].dtype, pd.CategoricalDtype):
+            joined_columns['activity_type'] = activities_coordinates_df['activity_type'].astype('category').array
+        for column in self.activities_df.columns:
+            # taking from categorical columns only gathers their integer codes
+            joined_columns[column] = self.activities_df[column].array.take(self.activity_index)
+        return pd.DataFrame(joined_columns)
+
+
+    def get_activities_mask(
+        self,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None,
+        activity_name: List[str]=None
+        ) -> np.ndarray:
+        """Boolean mask of the activities (rows of activities_df) that pass the filters."""
+        activities_mask = np.ones(len(self.activities_df), dtype=bool)
+        if activity_year is not None:
+            activities_mask &= self.activities_df['start_date_local'].dt.year.isin(activity_year).to_numpy()
+        if activity_name is not None:
+            activities_mask &= self.activities_df['name'].isin(activity_name).to_numpy()
+        if activity_type is not None:
+            activities_mask &= self.activities_df['type'].isin(activity_type).to_numpy()
+        return activities_mask
+
+
+    def __build_spatial_index(
+        self
+        ):
+        """Internal helper method - build the bounding box of every activity and the
+           grid index of the coordinates."""
+        lat = self.joined_coordinates_df['lat'].to_numpy(dtype='float64')
+        lon = self.joined_coordinates_df['lon'].to_numpy(dtype='float64')
+        self.activities_bounding_box_df = (
+            pd.DataFrame({'activity_index': self.activity_index, 'lat': lat, 'lon': lon})
+            .groupby('activity_index')
+            .agg(lat_min=('lat', 'min'), lat_max=('lat', 'max'), lon_min=('lon', 'min'), lon_max=('lon', 'max'))
+            .reindex(np.arange(len(self.activities_df)))
+        )
+        lat_cells = np.floor(lat / self.grid_cell_size).astype('int64')
+        lon_cells = np.floor(lon / self.grid_cell_size).astype('int64')
+        lat_cell_min, lon_cell_min = lat_cells.min(), lon_cells.min()
+        lat_cell_count = int(lat_cells.max() - lat_cell_min) + 1
+        lon_cell_count = int(lon_cells.max() - lon_cell_min) + 1
+        # cells numbered row by row, the cells of one latitude row in a query are consecutive keys
+        cell_keys = (lat_cells - lat_cell_min) * lon_cell_count + (lon_cells - lon_cell_min)
+        cell_order = np.argsort(cell_keys, kind='stable')
+        self.grid_index = {
+            "cell_keys": cell_keys[cell_order],
+            "cell_order": cell_order,
+            "lat_cell_min": lat_cell_min,
+            "lon_cell_min": lon_cell_min,
+            "lat_cell_count": lat_cell_count,
+            "lon_cell_count": lon_cell_count,
+        }
+
+
+    def query_coordinates(
+        self,
+        bounding_box: Dict[str, float]
+        ) -> np.ndarray:
+        """Positions (rows of joined_coordinates_df, ascending) of the coordinates inside a
+           bounding box, only the coordinates of the overlapping grid cells are compared."""
+        if self.grid_index is None:
+            self.__build_spatial_index()
+        lat_min, lat_max, lon_min, lon_max = get_bounding_box_limits(bounding_box=bounding_box)
+        grid_index = self.grid_index
+        lat_rows = np.arange(
+            max(int(np.floor(lat_min / self.grid_cell_size)) - grid_index["lat_cell_min"], 0),
+            min(int(np.floor(lat_max / self.grid_cell_size)) - grid_index["lat_cell_min"], grid_index["lat_cell_count"] - 1) + 1
+        )
+        lon_first = max(int(np.floor(lon_min / self.grid_cell_size)) - grid_index["lon_cell_min"], 0)
+        lon_last = min(int(np.floor(lon_max / self.grid_cell_size)) - grid_index["lon_cell_min"], grid_index["lon_cell_count"] - 1)
+        if lat_rows.size == 0 or lon_first > lon_last:
+            return np.empty(0, dtype='int64')
+        row_starts = np.searchsorted(grid_index["cell_keys"], lat_rows * grid_index["lon_cell_count"] + lon_first, side='left')
+        row_ends = np.searchsorted(grid_index["cell_keys"], lat_rows * grid_index["lon_cell_count"] + lon_last, side='right')
+        lat = self.joined_coordinates_df['lat'].to_numpy()
+        lon = self.joined_coordinates_df['lon'].to_numpy()
+        # a sequential scan is faster than gathering and sorting most of the coordinates
+        if (row_ends - row_starts).sum() > len(lat) // 4:
+            return np.flatnonzero((lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))
+        positions = np.concatenate([
+            grid_index["cell_order"][row_start:row_end]
+            for row_start, row_end in zip(row_starts, row_ends)
+        ])
+        # exact comparison, the border cells reach beyond the bounding box
+        lat, lon = lat[positions], lon[positions]
+        positions = positions[(lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)]
+        return np.sort(positions)
+
+
+    def query_activities(
+        self,
+        bounding_box: Dict[str, float]
+        ) -> np.ndarray:
+        """Boolean mask of the activities (rows of activities_df) with at least one
+           coordinate inside a bounding box. Activities whose bounding box lies
+           completely inside or outside are decided without their coordinates."""
+        if self.grid_index is None:
+            self.__build_spatial_index()
+        lat_min, lat_max, lon_min, lon_max = get_bounding_box_limits(bounding_box=bounding_box)
+        activities_lat_min, activities_lat_max, activities_lon_min, activities_lon_max = \
+            self.activities_bounding_box_df.to_numpy().T
+        intersecting = (
+            (activities_lat_max >= lat_min) & (activities_lat_min <= lat_max)
+            & (activities_lon_max >= lon_min) & (activities_lon_min <= lon_max)
+        )
+        activities_mask = (
+            (activities_lat_min >= lat_min) & (activities_lat_max <= lat_max)
+            & (activities_lon_min >= lon_min) & (activities_lon_max <= lon_max)
+        )
+        if (intersecting & ~activities_mask).any():
+            activities_mask[self.activity_index[self.query_coordinates(bounding_box=bounding_box)]] = True
+        return activities_mask
+
+
+    def get_activities_in_bounding_box(
+        self,
+        bounding_box: Dict[str, float]
+        ) -> pd.DataFrame:
+        """Activities that pass through a bounding box (with at least one coordinate in it)."""
+        return self.activities_df[self.query_activities(bounding_box=bounding_box)]
+
+
+    def filter(
+        self,
+        activity_type: List[str]=None,
+        activity_year: List[int]=None,
+        activity_name: List[str]=None,
+        bounding_box: Dict[str, float]=None,
+        bounding_box_mode: str="points"
+        ) -> pd.DataFrame:
+        """Filter the joined coordinates like StravaClient.activities_filter.
+
+        Args:
+            activity_type (List[str], optional): Types of the kept activities. Defaults to None.
+            activity_year (List[int], optional): Years of the kept activities. Defaults to None.
+            activity_name (List[str], optional): Names of the kept activities. Defaults to None.
+            bounding_box (Dict[str, float], optional): Corners of the area of the kept coordinates. Defaults to None.
+            bounding_box_mode (str, optional): "points" keeps only the coordinates inside the bounding box,
+                                               "tracks" keeps all coordinates of the activities that pass
+                                               through the bounding box. Defaults to "points".
+
+        Returns:
+            pd.DataFrame: filtered joined coordinates, a copy also if no coordinate is filtered out
+        """
+        if bounding_box_mode not in BOUNDING_BOX_MODES:
+            raise ValueError(f"bounding_box_mode is expected to be one of: {BOUNDING_BOX_MODES}")
+        activities_mask = self.get_activities_mask(
+            activity_type=activity_type,
+            activity_year=activity_year,
+            activity_name=activity_name
+        )
+        # Filter coordinates inside a bounding box via the spatial index
+        if bounding_box is not None and all(value is not None for value in bounding_box.values()):
+            if bounding_box_mode == "points":
+                positions = self.query_coordinates(bounding_box=bounding_box)
+                positions = positions[activities_mask[self.activity_index[positions]]]
+                return self.joined_coordinates_df.iloc[positions]
+            activities_mask &= self.query_activities(bounding_box=bounding_box)
+        coordinates_mask = activities_mask[self.activity_index]
+        if coordinates_mask.all():
+            return self.joined_coordinates_df.copy()
+        return self.joined_coordinates_df[coordinates_mask]
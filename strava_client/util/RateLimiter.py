@@ -0,0 +1,130 @@
+from typing import List
+import datetime as dt
+import random
+import threading
+import time
+
+class StravaRateLimiter(object):
+    """Token buckets for the two Strava rate limit windows. Strava counts the
+       requests in fixed 15 minute windows (reset at the quarter hours) and in
+       daily windows (reset at midnight UTC). Every request takes one token of
+       both buckets, the buckets are refilled when their window starts again
+       and are synchronised with the usage the API reports in the response
+       headers, which also covers requests of other clients of the same
+       application.
+    """
+    def __init__(
+        self,
+        limit_15min: int=100,
+        limit_daily: int=1000,
+        rate_limit_threshold: float=1.0,
+        backoff_base: float=1.0,
+        backoff_cap: float=60.0
+        ):
+        """Initialisation of the rate limiter
+
+        Args:
+            limit_15min (int, optional): Requests per 15 minute window until the
+                                         first response headers are seen. Defaults to 100.
+            limit_daily (int, optional): Requests per day until the first response
+                                         headers are seen. Defaults to 1000.
+            rate_limit_threshold (float, optional): Share of the limits that is used,
+                                                    leaves headroom for other clients.
+                                                    Defaults to 1.0.
+            backoff_base (float, optional): Seconds of the first retry backoff. Defaults to 1.0.
+            backoff_cap (float, optional): Maximum seconds of a retry backoff. Defaults to 60.0.
+        """
+        self.limits = [limit_15min, limit_daily]
+        self.usage = [0, 0]
+        self.rate_limit_threshold = rate_limit_threshold
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.window_ends = self.__get_window_ends(now=dt.datetime.now(dt.timezone.utc))
+        self.lock = threading.Lock()
+
+    def __get_window_ends(
+        self,
+        now: dt.datetime
+        ) -> List[dt.datetime]:
+        """Internal helper method - end of the current 15 minute and daily window."""
+        window_end_15min = now.replace(minute=now.minute - now.minute % 15, second=0, microsecond=0) + dt.timedelta(minutes=15)
+        window_end_daily = now.replace(hour=0, minute=0, second=0, microsecond=0) + dt.timedelta(days=1)
+        return [window_end_15min, window_end_daily]
+
+    def __refill(
+        self,
+        now: dt.datetime
+        ):
+        """Internal helper method - refill the buckets whose window has ended."""
+        window_ends = self.__get_window_ends(now=now)
+        for window in range(len(self.window_ends)):
+            if window_ends[window] != self.window_ends[window]:
+                self.usage[window] = 0
+        self.window_ends = window_ends
+
+    def try_acquire(
+        self
+        ) -> float:
+        """Take one token of both buckets without blocking.
+
+        Returns:
+            float: 0 if the token was taken, otherwise the seconds until
+                   the window of the empty bucket starts again
+        """
+        with self.lock:
+            now = dt.datetime.now(dt.timezone.utc)
+            self.__refill(now=now)
+            wait_until = None
+            for window in range(len(self.limits)):
+                if self.usage[window] + 1 > self.rate_limit_threshold * self.limits[window]:
+                    wait_until = max(wait_until or now, self.window_ends[window])
+            if wait_until is None:
+                self.usage = [usage + 1 for usage in self.usage]
+                return 0.0
+        wait_seconds = (wait_until - now).total_seconds()
+        print(f"Rate limit reached, waiting {wait_seconds:.0f}s until: {wait_until}")
+        return wait_seconds
+
+    def acquire(
+        self
+        ):
+        """Take one token of both buckets, blocks until the next window
+           starts if one of them is empty.
+        """
+        wait_seconds = self.try_acquire()
+        while wait_seconds > 0:
+            time.sleep(wait_seconds)
+            wait_seconds = self.try_acquire()
+
+    def update(
+        self,
+        rate_limit_usage: str,
+        rate_limit_limit: str
+        ):
+        """Synchronise the buckets with the rate limit response headers.
+
+        Args:
+            rate_limit_usage (str): header value "15 minute usage,daily usage"
+            rate_limit_limit (str): header value "15 minute limit,daily limit"
+        """
+        usage = [int(value) for value in rate_limit_usage.split(",")]
+        limits = [int(value) for value in rate_limit_limit.split(",")]
+        with self.lock:
+            self.__refill(now=dt.datetime.now(dt.timezone.utc))
+            self.limits = limits
+            # tokens taken for requests that are still running are kept
+            self.usage = [max(self.usage[window], usage[window]) for window in range(len(usage))]
+
+    def get_backoff_seconds(
+        self,
+        attempt: int
+        ) -> float:
+        """Exponential backoff with full jitter for the retry of a failed request.
+
+        Args:
+            attempt (int): number of the failed attempt, starting at 0
+
+        Returns:
+            float: seconds to wait before the next attempt
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
@@ -0,0 +1,253 @@
+from typing import Dict, List, Iterable, Iterator, AsyncIterable, AsyncIterator
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+# endpoints of single activities (details and streams), completed activities rarely change
+CACHEABLE_URL_PATTERN = re.compile(r"activities/(\d+)(/streams)?/?$")
+
+
+class StravaResponseCache(object):
+    """Persistent cache of API responses in a SQLite file, keyed by the endpoint,
+       the activity id and the request parameters. Only the endpoints of single
+       activities are cached. Responses younger than the ttl are served without
+       a request, older ones are revalidated with their ETag/Last-Modified
+       headers (a 304 response keeps the cached body). The least recently used
+       responses are evicted when the bodies exceed max_size bytes.
+    """
+    def __init__(
+        self,
+        cache_path: str,
+        ttl: float=7 * 24 * 3600,
+        max_size: int=1_000_000_000
+        ):
+        """Initialisation of the response cache
+
+        Args:
+            cache_path (str): Path of the SQLite file, created if not existing.
+            ttl (float, optional): Seconds a response is served without revalidation,
+                                   None serves it forever. Defaults to 7 days.
+            max_size (int, optional): Bytes of the (compressed) bodies kept in the cache.
+                                      Defaults to 1_000_000_000.
+        """
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.max_size = max_size
+        cache_folder_path = os.path.dirname(cache_path)
+        if cache_folder_path:
+            os.makedirs(cache_folder_path, exist_ok=True)
+        # one connection shared by the threads of the client
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(cache_path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT,
+                    activity_id INTEGER,
+                    url TEXT,
+                    body BLOB,
+                    headers TEXT,
+                    stored_at REAL,
+                    accessed_at REAL,
+                    size INTEGER
+                )"""
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_activity_id ON responses (activity_id)")
+            # bytes of the stored bodies, read once and then kept up to date by the writes of this instance
+            self.total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get_key(
+        self,
+        url: str,
+        params: Dict=None
+        ) -> tuple:
+        """Cache key, endpoint and activity id of a request, (None, None, None) if the
+           endpoint is not cached. The parameter values are compared as lower-cased
+           strings, like the API reads them (True and "true" give the same key)."""
+        url_match = CACHEABLE_URL_PATTERN.search(url)
+        if url_match is None:
+            return None, None, None
+        endpoint = "activity_streams" if url_match.group(2) else "activity"
+        params = sorted((str(name), str(value).lower()) for name, value in (params or {}).items())
+        key_content = json.dumps([url, params])
+        return hashlib.sha256(key_content.encode()).hexdigest(), endpoint, int(url_match.group(1))
+
+    def get(
+        self,
+        key: str
+        ) -> Dict:
+        """Cached response of the key with its body, headers and whether it is still
+           within the ttl, None if not cached."""
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT body, headers, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            with self.connection:
+                self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        body, headers, stored_at = row
+        return {
+            "body": zlib.decompress(body),
+            "headers": json.loads(headers),
+            "fresh": self.ttl is None or now - stored_at < self.ttl,
+        }
+
+    def get_validators(
+        self,
+        cached_response: Dict
+        ) -> Dict[str, str]:
+        """Conditional request headers of a cached response."""
+        validators = {}
+        if cached_response["headers"].get("ETag"):
+            validators["If-None-Match"] = cached_response["headers"]["ETag"]
+        if cached_response["headers"].get("Last-Modified"):
+            validators["If-Modified-Since"] = cached_response["headers"]["Last-Modified"]
+        return validators
+
+    def set(
+        self,
+        key: str,
+        endpoint: str,
+        activity_id: int,
+        url: str,
+        body: bytes,
+        headers: Dict[str, str]
+        ):
+        """Store a response and evict the least recently used responses above max_size."""
+        self.__store(
+            key=key,
+            endpoint=endpoint,
+            activity_id=activity_id,
+            url=url,
+            compressed_body=zlib.compress(body, 1),
+            headers=headers
+        )
+
+    def tee(
+        self,
+        chunks: Iterable[bytes],
+        key: str,
+        endpoint: str,
+        activity_id: int,
+        url: str,
+        headers: Dict[str, str]
+        ) -> Iterator[bytes]:
+        """Pass the chunks of a streamed body on and store the body once the last
+           chunk is read, a body that is not read completely is not stored. Only
+           the compressed body is kept in memory until then."""
+        compressor = zlib.compressobj(1)
+        compressed_chunks = []
+        for chunk in chunks:
+            compressed_chunks.append(compressor.compress(chunk))
+            yield chunk
+        compressed_chunks.append(compressor.flush())
+        self.__store(
+            key=key,
+            endpoint=endpoint,
+            activity_id=activity_id,
+            url=url,
+            compressed_body=b"".join(compressed_chunks),
+            headers=headers
+        )
+
+    async def atee(
+        self,
+        chunks: AsyncIterable[bytes],
+        key: str,
+        endpoint: str,
+        activity_id: int,
+        url: str,
+        headers: Dict[str, str]
+        ) -> AsyncIterator[bytes]:
+        """Async version of tee for the chunks of a streamed httpx response."""
+        compressor = zlib.compressobj(1)
+        compressed_chunks = []
+        async for chunk in chunks:
+            compressed_chunks.append(compressor.compress(chunk))
+            yield chunk
+        compressed_chunks.append(compressor.flush())
+        self.__store(
+            key=key,
+            endpoint=endpoint,
+            activity_id=activity_id,
+            url=url,
+            compressed_body=b"".join(compressed_chunks),
+            headers=headers
+        )
+
+    def __store(
+        self,
+        key: str,
+        endpoint: str,
+        activity_id: int,
+        url: str,
+        compressed_body: bytes,
+        headers: Dict[str, str]
+        ):
+        """Internal helper method - insert the compressed body of a response."""
+        headers = {name: headers[name] for name in ["Content-Type", "ETag", "Last-Modified"] if headers.get(name)}
+        now = time.time()
+        with self.lock, self.connection:
+            replaced_row = self.connection.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, activity_id, url, compressed_body, json.dumps(headers), now, now, len(compressed_body))
+            )
+            self.total_size += len(compressed_body) - (replaced_row[0] if replaced_row else 0)
+            self.__evict()
+
+    def refresh(
+        self,
+        key: str
+        ):
+        """Restart the ttl of a response that was revalidated (304)."""
+        with self.lock, self.connection:
+            self.connection.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time.time(), key))
+
+    def __evict(
+        self
+        ):
+        """Internal helper method - delete the least recently used responses until
+           the bodies fit into max_size, called inside the lock."""
+        if self.total_size <= self.max_size:
+            return
+        evicted_keys = []
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if self.total_size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            self.total_size -= size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+
+    def invalidate(
+        self,
+        activity_ids: List[int]=None
+        ):
+        """Delete the cached responses of the activities, all responses if None."""
+        with self.lock, self.connection:
+            if activity_ids is None:
+                self.connection.execute("DELETE FROM responses")
+                self.total_size = 0
+            else:
+                for activity_id in activity_ids:
+                    invalidated_size = self.connection.execute(
+                        "SELECT COALESCE(SUM(size), 0) FROM responses WHERE activity_id = ?", (int(activity_id),)
+                    ).fetchone()[0]
+                    self.connection.execute("DELETE FROM responses WHERE activity_id = ?", (int(activity_id),))
+                    self.total_size -= invalidated_size
+
+    def close(
+        self
+        ):
+        with self.lock:
+            self.connection.close()